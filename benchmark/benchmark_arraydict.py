@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 from nesteddict import ArrayDict
 
@@ -27,4 +28,251 @@ def test_benchmark_setitem(benchmark, large_array_dict):
     array_dict = ArrayDict(large_array_dict)
     def update_deep_nested_key():
         array_dict["key_500"]["nested_key_50"][5] = 999
-    benchmark(update_deep_nested_key)
\ No newline at end of file
+    benchmark(update_deep_nested_key)
+
+@pytest.fixture
+def frames():
+    """Fixture to create 1000 small ArrayDict frames."""
+    return [
+        ArrayDict({"x": np.random.rand(100, 3), "id": np.arange(100)})
+        for _ in range(1000)
+    ]
+
+def test_benchmark_concat_pairwise(benchmark, frames):
+    """Benchmark growing an ArrayDict one concat call at a time."""
+    def merge():
+        result = ArrayDict().concat(frames[0])
+        for frame in frames[1:]:
+            result.concat(frame)
+        return result
+    benchmark.pedantic(merge, rounds=3)
+
+def test_benchmark_concat_kway(benchmark, frames):
+    """Benchmark concatenating all frames in one call."""
+    benchmark.pedantic(lambda: ArrayDict().concat(frames), rounds=3)
+
+@pytest.fixture
+def h5_file(tmp_path):
+    """Fixture to write a 10^7-row ArrayDict to an HDF5 file."""
+    path = tmp_path / "large.h5"
+    ArrayDict({"x": np.random.rand(10**7), "id": np.arange(10**7)}).to_hdf5(path, chunks=10**5)
+    return path
+
+def test_benchmark_hdf5_slice_eager(benchmark, h5_file):
+    """Benchmark reading a whole file to select 1000 rows."""
+    benchmark(lambda: ArrayDict.from_hdf5(h5_file, lazy=False)[5000:6000])
+
+def test_benchmark_hdf5_slice_lazy(benchmark, h5_file):
+    """Benchmark selecting 1000 rows of a lazily opened file."""
+    benchmark(lambda: ArrayDict.from_hdf5(h5_file, cache=0)[5000:6000])
+
+@pytest.fixture
+def wide_frame():
+    """Fixture to create a 20-column, 10^6-row ArrayDict."""
+    return ArrayDict({f"col_{i}": np.random.rand(10**6) for i in range(20)}, copy=False)
+
+def test_benchmark_slice_window(benchmark, wide_frame):
+    """Benchmark taking a large row window, which stays a view."""
+    benchmark(lambda: wide_frame[1000:900000])
+
+def test_benchmark_init_no_copy(benchmark, wide_frame):
+    """Benchmark wrapping existing arrays without copying."""
+    columns = dict(wide_frame.items())
+    benchmark(ArrayDict, columns, copy=False)
+
+@pytest.fixture
+def csv_lines():
+    """Fixture to create 10^5 CSV lines with int, float and str columns."""
+    rng = np.random.default_rng(0)
+    lines = ["id,x,y,z,name"]
+    for i, (x, y, z) in enumerate(rng.random((10**5, 3))):
+        lines.append(f"{i},{x},{y},{z},atom_{i % 7}")
+    return lines
+
+def test_benchmark_csv_dictreader(benchmark, csv_lines):
+    """Benchmark the row-dict path: csv.DictReader into from_dicts, all columns as str."""
+    import csv
+    benchmark(lambda: ArrayDict.from_dicts(list(csv.DictReader(csv_lines))))
+
+def test_benchmark_csv_typed(benchmark, csv_lines):
+    """Benchmark from_csv parsing into typed columns."""
+    benchmark(ArrayDict.from_csv, csv_lines)
+
+def test_benchmark_csv_usecols(benchmark, csv_lines):
+    """Benchmark from_csv reading two of five columns."""
+    benchmark(ArrayDict.from_csv, csv_lines, usecols=["id", "x"])
+
+def _row(t):
+    return {"t": t, "energy": float(t), "x": np.full(3, t, dtype=float)}
+
+def test_benchmark_grow_concat(benchmark):
+    """Benchmark logging 10^4 rows with one concat per row."""
+    def log():
+        ad = ArrayDict({k: [v] for k, v in _row(0).items()})
+        for t in range(1, 10**4):
+            ad.concat(ArrayDict({k: [v] for k, v in _row(t).items()}))
+        return ad
+    benchmark.pedantic(log, rounds=3)
+
+def test_benchmark_grow_append(benchmark):
+    """Benchmark logging 10^4 rows with append."""
+    def log():
+        ad = ArrayDict()
+        for t in range(10**4):
+            ad.append(_row(t))
+        return ad.shrink_to_fit()
+    benchmark.pedantic(log, rounds=3)
+
+@pytest.fixture
+def long_frame():
+    """Fixture to create a 4-column, 10^6-row ArrayDict."""
+    n = 10**6
+    return ArrayDict({"id": np.arange(n), "x": np.random.rand(n), "y": np.random.rand(n), "v": np.random.rand(n, 3)})
+
+def test_benchmark_itertuples_per_cell(benchmark, long_frame):
+    """Benchmark the previous itertuples, indexing every cell through __getitem__."""
+    from collections import namedtuple
+    def iterate():
+        row = namedtuple("Row", long_frame.keys())
+        for i in range(long_frame.array_length):
+            row(*[long_frame[k][i] for k in long_frame.keys()])
+    benchmark.pedantic(iterate, rounds=1)
+
+def test_benchmark_itertuples(benchmark, long_frame):
+    """Benchmark itertuples converting a batch at a time."""
+    benchmark.pedantic(lambda: sum(1 for _ in long_frame.itertuples()), rounds=3)
+
+def test_benchmark_iterrows_copy(benchmark, long_frame):
+    """Benchmark the previous iterrows, copying every row through the constructor."""
+    def iterate():
+        for i in range(long_frame.array_length):
+            ArrayDict({k: v[i] for k, v in long_frame.items()})
+    benchmark.pedantic(iterate, rounds=1)
+
+def test_benchmark_iterrows(benchmark, long_frame):
+    """Benchmark iterrows yielding views."""
+    benchmark.pedantic(lambda: sum(1 for _ in long_frame.iterrows()), rounds=1)
+
+def test_benchmark_iterbatches(benchmark, long_frame):
+    """Benchmark iterating over batches of 4096 rows."""
+    benchmark(lambda: sum(1 for _ in long_frame.iterbatches(4096)))
+
+@pytest.fixture
+def saved_frame(tmp_path, wide_frame):
+    """Fixture to save the wide frame as a directory of .npy files."""
+    return wide_frame.save(tmp_path / "frame")
+
+def test_benchmark_open_load(benchmark, saved_frame):
+    """Benchmark loading a saved frame fully and taking a window."""
+    benchmark(lambda: ArrayDict.open(saved_frame, mmap=False)[5000:6000].copy())
+
+def test_benchmark_open_mmap(benchmark, saved_frame):
+    """Benchmark memory-mapping a saved frame and taking a window."""
+    benchmark(lambda: ArrayDict.open(saved_frame)[5000:6000].copy())
+
+def test_benchmark_arrow_roundtrip(benchmark):
+    """Benchmark converting 10^6 rows with an (n, 3, 3) column to Arrow and back."""
+    pytest.importorskip("pyarrow")
+    ad = ArrayDict({"id": np.arange(10**6), "tensor": np.random.rand(10**6, 3, 3)}, copy=False)
+    benchmark(lambda: ArrayDict.from_arrow(ad.to_arrow()))
+
+@pytest.fixture
+def residues():
+    """Fixture to create 10^6 atoms in 10^4 residues."""
+    n = 10**6
+    return ArrayDict({"res": np.random.randint(0, 10**4, n), "q": np.random.rand(n), "pos": np.random.rand(n, 3)})
+
+def test_benchmark_groupby_loop(benchmark, residues):
+    """Benchmark per-residue sums with a Python loop over the first 10^5 rows."""
+    def aggregate():
+        sums = {}
+        for row in residues[:10**5].itertuples():
+            sums[row.res] = sums.get(row.res, 0.0) + row.q
+        return sums
+    benchmark.pedantic(aggregate, rounds=3)
+
+def test_benchmark_groupby_agg(benchmark, residues):
+    """Benchmark per-residue sum, mean and count of all 10^6 rows with groupby."""
+    benchmark(lambda: residues.groupby("res").agg({"q": ["sum", "count"], "pos": "mean"}))
+
+@pytest.fixture
+def atoms():
+    """Fixture to create 10^6 atoms with shuffled unique ids."""
+    n = 10**6
+    return ArrayDict({"id": np.random.permutation(n), "x": np.random.rand(n)}, copy=False)
+
+def test_benchmark_lookup_mask(benchmark, atoms):
+    """Benchmark 100 id lookups with a full mask scan each."""
+    keys = np.random.randint(0, 10**6, 100)
+    benchmark(lambda: [atoms[atoms["id"] == key] for key in keys])
+
+@pytest.mark.parametrize("kind", ["sorted", "hash"])
+def test_benchmark_lookup_index(benchmark, atoms, kind):
+    """Benchmark 100 id lookups through loc."""
+    keys = np.random.randint(0, 10**6, 100)
+    atoms.set_index("id", kind=kind)
+    benchmark(lambda: [atoms.loc[key] for key in keys])
+
+@pytest.mark.parametrize("kind", ["sorted", "hash"])
+def test_benchmark_lookup_index_batch(benchmark, atoms, kind):
+    """Benchmark 10^5 id lookups in one loc call."""
+    keys = np.random.randint(0, 10**6, 10**5)
+    atoms.set_index("id", kind=kind)
+    benchmark(lambda: atoms.loc[keys])
+
+@pytest.fixture
+def topology():
+    """Fixture to create a 10^4-residue topology table in shuffled order."""
+    n = 10**4
+    return ArrayDict({"res": np.random.permutation(n), "mass": np.random.rand(n), "charge": np.random.randint(-1, 2, n)}, copy=False)
+
+def test_benchmark_merge_loop(benchmark, topology, residues):
+    """Benchmark joining topology masses to the first 10^5 rows with a dict lookup per row."""
+    def join():
+        mass = dict(zip(topology["res"].tolist(), topology["mass"].tolist()))
+        return np.array([mass[r] for r in residues["res"][:10**5].tolist()])
+    benchmark(join)
+
+def test_benchmark_merge(benchmark, topology, residues):
+    """Benchmark an inner join of the topology to all 10^6 rows."""
+    benchmark(lambda: residues.merge(topology, on="res"))
+
+@pytest.fixture
+def frame():
+    """Fixture to create a 10^7-row frame with two predicate columns and positions."""
+    n = 10**7
+    return ArrayDict({"a": np.random.randint(0, 10, n), "b": np.random.rand(n), "pos": np.random.rand(n, 3)}, copy=False)
+
+def test_benchmark_filter_mask(benchmark, frame):
+    """Benchmark filtering positions with full-length masks."""
+    benchmark(lambda: frame[(frame["a"] > 3) & (frame["b"] < 0.5)][["pos"]])
+
+def test_benchmark_filter_query(benchmark, frame):
+    """Benchmark filtering positions with a blocked query."""
+    benchmark(lambda: frame.query("a > 3 & b < 0.5", columns=["pos"]))
+
+def test_benchmark_handoff_pickle(benchmark, frame):
+    """Benchmark handing the frame to another process by pickling it."""
+    import pickle
+    benchmark(lambda: pickle.loads(pickle.dumps(frame)))
+
+def test_benchmark_handoff_shared_memory(benchmark, frame):
+    """Benchmark handing the frame to another process through shared memory, unpickling only the handle."""
+    import pickle
+    def handoff():
+        with frame.to_shared_memory() as handle:
+            ArrayDict.attach(pickle.loads(pickle.dumps(handle)))
+    benchmark(handoff)
+
+def _frame_norms(batch):
+    rows = (batch["a"] > 3) & (batch["b"] < 0.5)
+    return {"norm": np.linalg.norm(batch["pos"][rows], axis=1)}
+
+def test_benchmark_map_batches_serial(benchmark, frame):
+    """Benchmark a per-batch analysis of the frame in this thread."""
+    benchmark(lambda: frame.map_batches(_frame_norms, workers=1))
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_benchmark_map_batches(benchmark, frame, backend):
+    """Benchmark a per-batch analysis of the frame on a pool with a worker per CPU."""
+    benchmark(lambda: frame.map_batches(_frame_norms, backend=backend))
@@ -1,5 +1,11 @@
+import copy
+import io
+import tracemalloc
+from collections import deque
+
+import numpy as np
 import pytest
-from nesteddict import NestDict
+from nesteddict import NestDict, concat, memoize
 
 @pytest.fixture
 def large_nested_dict():
@@ -27,4 +33,223 @@ def test_benchmark_setitem(benchmark, large_nested_dict):
     nest_dict = NestDict(large_nested_dict)
     def update_deep_nested_key():
         nest_dict["key_500"]["nested_key_50"]["deep_key_5"] = 999
-    benchmark(update_deep_nested_key)
\ No newline at end of file
+    benchmark(update_deep_nested_key)
+
+def test_benchmark_get_dotted(benchmark, large_nested_dict):
+    """Benchmark a dotted-string lookup through NestDict.get."""
+    nest_dict = NestDict(large_nested_dict)
+    benchmark(nest_dict.get, "key_500.nested_key_50.deep_key_5")
+
+def test_benchmark_getitem_path(benchmark, large_nested_dict):
+    """Benchmark a lookup with a precompiled NestPath."""
+    nest_dict = NestDict(large_nested_dict)
+    path = NestDict.path("key_500.nested_key_50.deep_key_5")
+    benchmark(nest_dict.__getitem__, path)
+
+def test_benchmark_set_dotted(benchmark, large_nested_dict):
+    """Benchmark a dotted-string update through NestDict.set."""
+    nest_dict = NestDict(large_nested_dict)
+    benchmark(nest_dict.set, "key_500.nested_key_50.deep_key_5", 999)
+
+def test_benchmark_setitem_path(benchmark, large_nested_dict):
+    """Benchmark an update with a precompiled NestPath."""
+    nest_dict = NestDict(large_nested_dict)
+    path = NestDict.path("key_500.nested_key_50.deep_key_5")
+    benchmark(nest_dict.__setitem__, path, 999)
+
+def test_benchmark_get_loop(benchmark, large_nested_dict):
+    """Benchmark reading 50 sibling leaves with one get per path."""
+    nest_dict = NestDict(large_nested_dict)
+    paths = [f"key_500.nested_key_{j}.deep_key_5" for j in range(50)]
+    benchmark(lambda: [nest_dict.get(path) for path in paths])
+
+def test_benchmark_get_many(benchmark, large_nested_dict):
+    """Benchmark reading 50 sibling leaves with a single get_many."""
+    nest_dict = NestDict(large_nested_dict)
+    paths = [f"key_500.nested_key_{j}.deep_key_5" for j in range(50)]
+    benchmark(nest_dict.get_many, paths)
+
+def test_benchmark_set_many(benchmark, large_nested_dict):
+    """Benchmark writing 50 sibling leaves with a single set_many."""
+    nest_dict = NestDict(large_nested_dict)
+    mapping = {f"key_500.nested_key_50.deep_key_{k}": k for k in range(50)}
+    benchmark(nest_dict.set_many, mapping)
+
+@pytest.fixture(scope="module")
+def million_leaf_dict():
+    """Fixture to create a NestDict with 10^6 leaves."""
+    return NestDict({
+        f"key_{i}": {f"leaf_{j}": j for j in range(1000)} for i in range(1000)
+    })
+
+def _recursive_flatten(data, parent_key=[]):
+    """The list-building flatten that iter_items replaced, kept for comparison."""
+    items = []
+    for k, v in data.items():
+        new_key = [*parent_key, k]
+        if isinstance(v, dict):
+            items.extend(_recursive_flatten(v, new_key))
+        else:
+            items.append((tuple(new_key), v))
+    return items
+
+def _peak_memory(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def test_benchmark_flatten_recursive(benchmark, million_leaf_dict):
+    """Benchmark the recursive list-building flatten at 10^6 leaves."""
+    func = lambda: dict(_recursive_flatten(million_leaf_dict._data))
+    benchmark.extra_info["peak_bytes"] = _peak_memory(func)
+    benchmark.pedantic(func, rounds=3)
+
+def test_benchmark_flatten(benchmark, million_leaf_dict):
+    """Benchmark flatten built on iter_items at 10^6 leaves."""
+    benchmark.extra_info["peak_bytes"] = _peak_memory(million_leaf_dict.flatten)
+    benchmark.pedantic(million_leaf_dict.flatten, rounds=3)
+
+def test_benchmark_iter_items(benchmark, million_leaf_dict):
+    """Benchmark streaming all 10^6 leaves without materializing them."""
+    func = lambda: deque(million_leaf_dict.iter_items(), maxlen=0)
+    benchmark.extra_info["peak_bytes"] = _peak_memory(func)
+    benchmark.pedantic(func, rounds=3)
+
+def test_benchmark_unflatten(benchmark, million_leaf_dict):
+    """Benchmark rebuilding a tree from 10^6 flat leaves."""
+    flat = million_leaf_dict.flatten()
+    benchmark.extra_info["peak_bytes"] = _peak_memory(lambda: NestDict.unflatten(flat))
+    benchmark.pedantic(NestDict.unflatten, args=(flat,), rounds=3)
+
+def _deep_dict(depth, width=10):
+    """A tree of the given depth with `width` children at the last level."""
+    data = {f"leaf_{k}": k for k in range(width)}
+    for level in reversed(range(depth - 1)):
+        data = {f"level_{level}_{j}": dict(data) if j else data for j in range(2)}
+    return data
+
+@pytest.mark.parametrize("storage", ["nested", "flat"])
+@pytest.mark.parametrize("depth", [2, 6, 10])
+def test_benchmark_storage_getitem(benchmark, storage, depth):
+    """Benchmark a deep leaf read in each storage mode."""
+    nest_dict = NestDict(_deep_dict(depth), storage=storage)
+    path = NestDict.path([f"level_{level}_1" for level in range(depth - 1)] + ["leaf_5"])
+    benchmark(nest_dict.__getitem__, path)
+
+@pytest.mark.parametrize("storage", ["nested", "flat"])
+@pytest.mark.parametrize("depth", [2, 6, 10])
+def test_benchmark_storage_setitem(benchmark, storage, depth):
+    """Benchmark a deep leaf write in each storage mode."""
+    nest_dict = NestDict(_deep_dict(depth), storage=storage)
+    path = NestDict.path([f"level_{level}_1" for level in range(depth - 1)] + ["leaf_5"])
+    benchmark(nest_dict.__setitem__, path, 999)
+
+@pytest.mark.parametrize("storage", ["nested", "flat"])
+@pytest.mark.parametrize("depth", [2, 6, 10])
+def test_benchmark_storage_flatten(benchmark, storage, depth):
+    """Benchmark flattening the whole tree in each storage mode."""
+    nest_dict = NestDict(_deep_dict(depth), storage=storage)
+    benchmark(nest_dict.flatten)
+
+def test_benchmark_deepcopy(benchmark, large_nested_dict):
+    """Benchmark checkpointing a tree with copy.deepcopy."""
+    nest_dict = NestDict(large_nested_dict)
+    benchmark(copy.deepcopy, nest_dict)
+
+def test_benchmark_snapshot_and_write(benchmark, large_nested_dict):
+    """Benchmark checkpointing with snapshot() followed by one deep write."""
+    nest_dict = NestDict(large_nested_dict)
+    path = NestDict.path("key_500.nested_key_50.deep_key_5")
+    def checkpoint():
+        nest_dict.snapshot()
+        nest_dict[path] = 999
+    benchmark(checkpoint)
+
+def test_benchmark_snapshot_and_write_through_view(benchmark, large_nested_dict):
+    """Benchmark checkpointing with snapshot() followed by one deep write through read subtrees."""
+    nest_dict = NestDict({"state": large_nested_dict})
+    def checkpoint():
+        nest_dict.snapshot()
+        nest_dict["state"]["key_500"]["nested_key_50"]["deep_key_5"] = 999
+    benchmark(checkpoint)
+
+@pytest.fixture
+def frames():
+    """Fixture to create 1000 small trajectory frames."""
+    return [
+        NestDict({"x": np.random.rand(100, 3), "meta": {"step": np.arange(1)}})
+        for _ in range(1000)
+    ]
+
+def test_benchmark_concat_pairwise(benchmark, frames):
+    """Benchmark merging frames one concat call at a time."""
+    def merge():
+        result = concat(frames[:1])
+        for frame in frames[1:]:
+            result.concat(frame)
+        return result
+    benchmark.pedantic(merge, rounds=3)
+
+def test_benchmark_concat_kway(benchmark, frames):
+    """Benchmark merging frames with a single k-way concat."""
+    benchmark.pedantic(concat, args=(frames,), rounds=3)
+
+@pytest.fixture
+def checkpoint_tree():
+    """Fixture to create a tree of 1000 array leaves."""
+    return NestDict({
+        f"group_{i}": {f"leaf_{j}": np.random.rand(100) for j in range(10)}
+        for i in range(100)
+    })
+
+def test_benchmark_checkpoint_full(benchmark, checkpoint_tree):
+    """Benchmark rewriting the whole tree after changing one leaf."""
+    h5py = pytest.importorskip("h5py")
+    def checkpoint():
+        checkpoint_tree[["group_5", "leaf_5"]] = np.random.rand(100)
+        with h5py.File(io.BytesIO(), "w") as f:
+            checkpoint_tree.to_hdf5(f)
+    benchmark(checkpoint)
+
+def test_benchmark_checkpoint_incremental(benchmark, checkpoint_tree):
+    """Benchmark rewriting only the changed leaf of a saved tree."""
+    h5py = pytest.importorskip("h5py")
+    with h5py.File(io.BytesIO(), "w") as f:
+        checkpoint_tree.to_hdf5(f)
+        checkpoint_tree.track_changes()
+        def checkpoint():
+            checkpoint_tree[["group_5", "leaf_5"]] = np.random.rand(100)
+            checkpoint_tree.to_hdf5(f, incremental=True)
+        benchmark(checkpoint)
+
+def _frozen(array):
+    array.flags.writeable = False
+    return array
+
+@pytest.fixture
+def analysis_tree():
+    """Fixture to create a tree of 100 frames of 10^4 read-only positions each, whose digests are cached."""
+    return NestDict({f"frame_{i}": {"pos": _frozen(np.random.rand(10**4, 3)), "box": _frozen(np.eye(3))} for i in range(100)})
+
+def test_benchmark_fingerprint_full(benchmark, analysis_tree):
+    """Benchmark hashing every leaf of the tree."""
+    benchmark(lambda: NestDict(analysis_tree._data).fingerprint())
+
+def test_benchmark_fingerprint_incremental(benchmark, analysis_tree):
+    """Benchmark fingerprinting the tree again after one frame was replaced."""
+    analysis_tree.fingerprint()
+    def fingerprint():
+        analysis_tree[["frame_5", "pos"]] = _frozen(np.random.rand(10**4, 3))
+        return analysis_tree.fingerprint()
+    benchmark(fingerprint)
+
+def test_benchmark_memoize_hit(benchmark, analysis_tree):
+    """Benchmark a memoized analysis called again on an unchanged tree."""
+    @memoize
+    def centers(tree):
+        return {k: v["pos"].mean(axis=0) for k, v in tree.items()}
+    centers(analysis_tree)
+    benchmark(centers, analysis_tree)
@@ -0,0 +1,18 @@
+import numpy as np
+import pytest
+from nesteddict import NestDict, concat, tree_map
+
+@pytest.fixture(scope="module")
+def wide_tree():
+    """Fixture to create a wide NestDict of 32 arrays of 8 MB each."""
+    return NestDict({f"leaf_{i}": np.random.rand(1_000_000) for i in range(32)})
+
+@pytest.mark.parametrize("workers", [1, 2, 4, 8])
+def test_benchmark_concat_workers(benchmark, wide_tree, workers):
+    """Benchmark concatenating wide trees of large arrays with a thread pool."""
+    benchmark.pedantic(concat, args=([wide_tree] * 4,), kwargs={"workers": workers}, rounds=3)
+
+@pytest.mark.parametrize("workers", [1, 2, 4, 8])
+def test_benchmark_tree_map_workers(benchmark, wide_tree, workers):
+    """Benchmark a tree-wide ufunc over large arrays with a thread pool."""
+    benchmark.pedantic(tree_map, args=(np.sqrt, wide_tree), kwargs={"workers": workers}, rounds=3)
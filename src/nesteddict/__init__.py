@@ -1,3 +1,6 @@
-
-from .nestdict import NestDict
-from .arraydict import ArrayDict
\ No newline at end of file
+from .nestdict import NestDict, concat, tree_map
+from .flatdict import FlatNestDict
+from .arraydict import ArrayDict
+from .fingerprint import memoize
+from .parallel import get_executor, set_executor
+from .path import NestPath
@@ -1,18 +1,32 @@
 import io
+import json
 from collections import namedtuple
 from pathlib import Path
-from typing import (TYPE_CHECKING, Any, Iterator, MutableMapping, Union,
-                    overload)
+from typing import (TYPE_CHECKING, Any, Callable, Iterable, Iterator,
+                    MutableMapping, Sequence, Union, overload)
 
 import numpy as np
 
+from .parallel import concatenate_jobs
+from .schema import Field, parse_schema
+
 if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
     import h5py  # type: ignore[import]
-    import pyarray as pa  # type: ignore[import]
+    import pyarrow as pa  # type: ignore[import]
+
+    from .groupby import GroupBy
+    from .index import Loc
+    from .shm import SharedHandle
 
 NestedKey = str | list[str]  # type_check_only
 
-import csv
+MIN_CAPACITY = 16
+BATCH_ROWS = 4096
+MANIFEST = "manifest.json"
+MANIFEST_FORMAT = "nesteddict.ArrayDict"
+
 from collections.abc import MutableMapping
 from typing import TYPE_CHECKING
 
@@ -20,13 +34,107 @@ if TYPE_CHECKING:
     import h5py
 
 class ArrayDict(MutableMapping):
-    """A dictionary-like object that stores arrays."""
+    """A dictionary-like object that stores arrays.
+
+    Selecting columns or rows does not copy where NumPy does not have to:
+    column subsets and int or slice row selections share memory with the
+    original, index arrays and masks copy once. Use `copy` for an independent
+    ArrayDict.
+
+    All columns have the same number of rows. The row count is cached and
+    kept up to date by assignment, `append`, `concat` and row selections, so
+    checking a new column against it costs O(1).
+    """
 
     _data: dict[str, np.ndarray]
+    _buffers: dict[str, np.ndarray] | None = None
+    _index: tuple | None = None
+    _length: int | None = None
+    _schema: dict[str, Field] | None = None
+    _digests: dict[str, bytes] | None = None
+    _fingerprint: str | None = None
+
+    def __init__(self, source: dict = {}, copy: bool = True, schema: dict[str, Any] | None = None):
+        """Create an ArrayDict from a dict of array-likes.
 
-    def __init__(self, source: dict = {}):
-        source = {k: np.array(v) for k, v in source.items()}
-        super().__setattr__("_data", source)
+        Args:
+            source (dict): Column names and array-likes.
+            copy (bool): Copy every column. With False, columns that already are
+                ndarrays are stored as they are, like `np.asarray`.
+            schema (dict[str, Any]|None): A dtype, or a `(dtype, trailing shape)` pair, for some
+                columns. Their values are cast to the dtype on every assignment, within its kind
+                or wider, and must have the trailing shape. Without `source`, the schema columns
+                are created empty.
+
+        Raises:
+            KeyError: if `source` lacks a column of the schema.
+            ValueError: if the columns differ in length or do not fit the schema.
+
+        Examples:
+            >>> ad = ArrayDict({'id': [1, 2]}, schema={'id': np.int32, 'pos': (np.float64, 3)})
+            Traceback (most recent call last):
+            ...
+            KeyError: "Columns ['pos'] of the schema are missing."
+            >>> ArrayDict(schema={'id': np.int32, 'pos': (np.float64, 3)})['pos'].shape
+            (0, 3)
+        """
+        super().__setattr__("_data", {})
+        if schema is not None:
+            schema = parse_schema(schema)
+            super().__setattr__("_schema", schema)
+            missing = [k for k in schema if k not in source]
+            if missing and source:
+                raise KeyError(f"Columns {missing} of the schema are missing.")
+            if not source:
+                source = {k: field.empty() for k, field in schema.items()}
+        self._store({k: self._column(k, v, copy) for k, v in source.items()})
+
+    @classmethod
+    def _wrap(
+        cls, data: dict[str, np.ndarray], length: int | None = None, schema: dict[str, Field] | None = None
+    ) -> "ArrayDict":
+        """Create an ArrayDict around `data` as it is, without converting or copying the columns.
+
+        `length` is the row count if known, `schema` that of the columns.
+        """
+        ad = object.__new__(cls)
+        super(ArrayDict, ad).__setattr__("_data", data)
+        if length is not None:
+            super(ArrayDict, ad).__setattr__("_length", length)
+        if schema is not None:
+            super(ArrayDict, ad).__setattr__("_schema", {k: schema[k] for k in data if k in schema})
+        return ad
+
+    @property
+    def schema(self) -> dict[str, Field] | None:
+        """The dtype and trailing shape of the columns with a schema, or None."""
+        return None if self._schema is None else dict(self._schema)
+
+    def _column(self, key: str, value: Any, copy: bool = False) -> np.ndarray:
+        """Convert a value assigned to the column `key` to an array that fits the schema."""
+        if self._schema is not None and key in self._schema:
+            return self._schema[key].convert(key, value, copy)
+        return np.array(value) if copy else np.asarray(value)
+
+    def _store(self, columns: dict[str, np.ndarray]) -> None:
+        """Store converted columns, checking that they have the row count of the others.
+
+        The check compares lengths with the cached row count, it does not
+        touch the data. 0-d columns, as in a single row, are not checked.
+        """
+        kept = next((v for k, v in self._data.items() if k not in columns), None)
+        rows = self.array_length if kept is not None and np.ndim(kept) else None
+        for k, v in columns.items():
+            if not v.ndim:
+                continue
+            if rows is None:
+                rows = len(v)
+            elif len(v) != rows:
+                raise ValueError(f"Column '{k}' has {len(v)} rows, expected {rows}.")
+        self._data.update(columns)
+        if rows is not None or kept is None:
+            super().__setattr__("_length", rows)
+        self._invalidate(columns)
 
     @classmethod
     def from_dicts(cls, source: list[dict], include: list[str]|None = []) -> "ArrayDict":
@@ -43,41 +151,83 @@ class ArrayDict(MutableMapping):
         if include:
             keys = keys & set(include)
         data = {key: np.array([row[key] for row in source]) for key in keys}
-        return cls(data)
+        return cls._wrap(data)
     
     @classmethod
     def from_csv(
         cls,
-        source: str | list[str] | io.StringIO,
+        source: str | Path | Iterable[str],
         header: list[str] | None = None,
         seq: str = ",",
+        dtype: Any = None,
+        usecols: list[str | int] | None = None,
         **kwargs
     ) -> "ArrayDict":
         """Create an ArrayDict from a CSV file or CSV data with optional custom header and delimiter.
 
+        The CSV is parsed a block of rows at a time straight into typed
+        columns, see `nesteddict.csvio.read_csv`.
+
         Args:
-            source (str|list[str]|io.StringIO): If str, path to the CSV file; if list of strings, CSV lines; if StringIO, CSV data.
-            header (list[str]|None): Optional list of header fields.
+            source (str|Path|Iterable[str]): If str or Path, path to the CSV file; otherwise a file
+                object such as io.StringIO, or an iterable of CSV lines.
+            header (list[str]|None): Optional list of header fields; if given, the first line is data.
             seq (str): Delimiter for CSV data.
+            dtype (Any): A dtype for all columns, a dict of dtypes by column name, or None to infer
+                int64, float64 or str per column. Pass str for columns whose exact text is needed.
+            usecols (list[str|int]|None): Only read these columns, by name or position.
 
         Returns:
             ArrayDict: An ArrayDict where keys are headers and values are arrays of the corresponding values.
+
+        Examples:
+            >>> ad = ArrayDict.from_csv(["id,x,name", "1,0.5,a", "2,1.5,b"], usecols=["id", "x"])
+            >>> ad["id"], ad["x"]
+            (array([1, 2]), array([0.5, 1.5]))
         """
-        if isinstance(source, str):
-            with open(source, "r", encoding="utf-8") as f:
-                reader = csv.DictReader(f, fieldnames=header, delimiter=seq, **kwargs)
-                rows = [dict(row) for row in reader]
-        elif isinstance(source, list):
-            buffer = io.StringIO("\n".join(source))
-            reader = csv.DictReader(buffer, fieldnames=header, delimiter=seq, **kwargs)
-            rows = [dict(row) for row in reader]
-        elif isinstance(source, io.StringIO):
-            reader = csv.DictReader(source, fieldnames=header, delimiter=seq, **kwargs)
-            rows = [dict(row) for row in reader]
-        else:
+        from .csvio import read_csv
+
+        if not isinstance(source, (str, Path, Iterable)):
             raise TypeError("Unsupported source type.")
-        
-        return cls.from_dicts(rows)
+        return cls._wrap(read_csv(source, header, seq, dtype, usecols, **kwargs))
+
+    @classmethod
+    def iter_csv(
+        cls,
+        source: str | Path | Iterable[str],
+        chunksize: int | None = None,
+        header: list[str] | None = None,
+        seq: str = ",",
+        dtype: Any = None,
+        usecols: list[str | int] | None = None,
+        **kwargs
+    ) -> Iterator["ArrayDict"]:
+        """Read a CSV as a stream of ArrayDicts of at most `chunksize` rows.
+
+        Only one chunk is parsed at a time, so files larger than memory can be
+        processed in constant memory. All chunks have the same columns and
+        dtypes: dtypes not given are inferred from the first chunk, and a later
+        field that does not fit raises ValueError.
+
+        Args:
+            source (str|Path|Iterable[str]): A path, a file object or an iterable of CSV lines.
+            chunksize (int|None): The maximum rows per chunk. Defaults to 65536.
+            header, seq, dtype, usecols: See `from_csv`.
+
+        Yields:
+            ArrayDict: The chunks in file order.
+
+        Examples:
+            >>> lines = ["id,x", "1,0.5", "2,1.5", "3,2.5"]
+            >>> [len(chunk["id"]) for chunk in ArrayDict.iter_csv(lines, chunksize=2)]
+            [2, 1]
+        """
+        from .csvio import iter_csv
+
+        if not isinstance(source, (str, Path, Iterable)):
+            raise TypeError("Unsupported source type.")
+        for chunk in iter_csv(source, chunksize, header, seq, dtype, usecols, **kwargs):
+            yield cls._wrap(chunk)
 
     @overload
     def __getitem__(self, key: str) -> np.ndarray: ...
@@ -98,27 +248,56 @@ class ArrayDict(MutableMapping):
         if isinstance(key, str):
             return self._data[key]
         elif isinstance(key, list):
-            return ArrayDict({k: self._data[k] for k in key})
+            return self._wrap({k: self._data[k] for k in key}, self._length, self._schema)
         elif isinstance(key, (slice, int, np.ndarray)):
-            return ArrayDict({k: v[key] for k, v in self._data.items()})
+            if not isinstance(self._data, dict):
+                # lazily read columns select the rows in the file
+                return self._wrap({k: np.asarray(v) for k, v in self._data.rows(key).items()})
+            if isinstance(key, int):
+                # 1-d columns index to NumPy scalars, keep them 0-d arrays
+                return self._wrap({k: np.asarray(v[key]) for k, v in self._data.items()})
+            length = len(range(*key.indices(self.array_length))) if isinstance(key, slice) and self._data else None
+            return self._wrap({k: v[key] for k, v in self._data.items()}, length, self._schema)
         raise KeyError(f"Key {key} not supported in ArrayDict")
 
     def __setitem__(
         self, key: str | list[str], value: Union[np.ndarray, "ArrayDict"]
     ) -> None:
         if isinstance(key, str) and isinstance(value, (np.ndarray, list)):
-            self._data[key] = value
+            self._store({key: self._column(key, value)})
         elif isinstance(key, list) and isinstance(value, ArrayDict):
-            for k in key:
-                self._data[k] = value[k]
+            self._store({k: self._column(k, value[k]) for k in key})
         elif isinstance(key, (slice, int)) and isinstance(value, ArrayDict):
             for k in self._data.keys():
                 self._data[k][key] = value[k]
+            self._invalidate(self._data.keys())
         else:
             raise KeyError(f"set type {type(value)} to '{key}' not support in ArrayDict")
 
     def __delitem__(self, key: str) -> None:
         del self._data[key]
+        if not self._data:
+            super().__setattr__("_length", None)
+        self._invalidate((key,))
+
+    def update(self, other: Any = (), /, **kwargs) -> None:
+        """Assign several columns at once; they are checked against the other columns together.
+
+        Unlike one assignment after the other, this can replace all columns
+        with ones of a new length.
+        """
+        columns = dict(other, **kwargs)
+        self._store({k: self._column(k, v) for k, v in columns.items()})
+
+    def _invalidate(self, keys: Iterable[str]) -> None:
+        """Drop what is derived from the columns `keys` after they were changed."""
+        if self._index is not None and self._index[0] in keys:
+            column, kind, _ = self._index
+            super().__setattr__("_index", (column, kind, None))
+        if self._digests is not None:
+            for k in keys:
+                self._digests.pop(k, None)
+        super().__setattr__("_fingerprint", None)
 
     def __iter__(self) -> Iterator:
         return iter(self._data)
@@ -136,15 +315,67 @@ class ArrayDict(MutableMapping):
         return self._data.items()
 
     def __eq__(self, other: Any) -> bool:
+        """Compare the columns, numeric ones with `np.allclose`, stopping at the first difference.
+
+        Columns that are the same array are equal without being compared.
+        Fingerprints are not used: they are exact while numeric columns are
+        compared with a tolerance.
+        """
         if isinstance(other, ArrayDict):
+            if other is self:
+                return True
             value = other._data
         elif isinstance(other, dict):
             value = other
         else:
             return False
-        return self._data.keys() == value.keys() and all([
-            np.allclose(self[k], value[k]) for k in self._data.keys()
-        ])
+        if self._data.keys() != value.keys():
+            return False
+        for k, a in self._data.items():
+            b = value[k]
+            if a is b:
+                continue
+            a, b = np.asarray(a), np.asarray(b)
+            numeric = a.dtype.kind in "biufc" and b.dtype.kind in "biufc"
+            if not (np.allclose(a, b) if numeric else np.array_equal(a, b)):
+                return False
+        return True
+
+    def fingerprint(self) -> str:
+        """A content hash of the columns, their names, dtypes and shapes.
+
+        The digests of read-only columns are cached; changing columns through
+        the ArrayDict (assignment, row assignment, `append`, `concat`) drops
+        only theirs, so the next call hashes just those. Writeable columns can
+        be written in place and are hashed on every call. Column order does
+        not matter.
+
+        Returns:
+            str: The hex digest.
+
+        Examples:
+            >>> ad = ArrayDict({'a': [1, 2], 'b': [0.5, 1.5]})
+            >>> ad.fingerprint() == ArrayDict({'b': [0.5, 1.5], 'a': [1, 2]}).fingerprint()
+            True
+            >>> ad['a'][1] = 3
+            >>> ad.fingerprint() == ArrayDict({'a': [1, 2], 'b': [0.5, 1.5]}).fingerprint()
+            False
+        """
+        from .fingerprint import combine, frozen, hash_array
+
+        digests = self._digests if self._digests is not None else {}
+        changed = self._fingerprint is None
+        for k, v in self._data.items():
+            v = np.asarray(v)
+            if k in digests and frozen(v):
+                continue
+            new = hash_array(v)
+            changed = changed or digests.get(k) != new
+            digests[k] = new
+        super().__setattr__("_digests", digests)
+        if changed:
+            super().__setattr__("_fingerprint", combine(b"ArrayDict", digests).hex())
+        return self._fingerprint
 
     @property
     def array_length(self) -> int:
@@ -153,23 +384,103 @@ class ArrayDict(MutableMapping):
         Returns:
             int: The length of the arrays.
         """
-        if not self._data:
-            return 0
-        return len(next(iter(self._data.values())))
+        if not isinstance(self._data, dict):
+            return self._data.length
+        if self._length is None:
+            if not self._data:
+                return 0
+            super().__setattr__("_length", len(next(iter(self._data.values()))))
+        return self._length
+
+    def iterbatches(self, batch_size: int) -> Iterator["ArrayDict"]:
+        """Iterate over consecutive blocks of at most `batch_size` rows.
+
+        The batches are views into the columns, nothing is copied.
+
+        Args:
+            batch_size (int): The maximum rows per batch.
+
+        Yields:
+            ArrayDict: The batches in row order.
+
+        Examples:
+            >>> ad = ArrayDict({'a': np.arange(5)})
+            >>> [batch['a'].tolist() for batch in ad.iterbatches(2)]
+            [[0, 1], [2, 3], [4]]
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive.")
+        for start in range(0, self.array_length, batch_size):
+            yield self[start:start + batch_size]
+
+    def map_batches(
+        self,
+        fn: Callable[["ArrayDict"], "ArrayDict | dict"],
+        batch_size: int | None = None,
+        workers: "Executor | int | None" = None,
+        backend: str = "process",
+    ) -> "ArrayDict":
+        """Apply a function to consecutive batches of rows in a pool and concatenate the results.
+
+        `fn` takes an ArrayDict of rows and returns an ArrayDict or a dict of
+        arrays with any number of rows; the results are joined in row order
+        with a single concatenate per column. With the process backend the
+        columns are copied once into shared memory, see `to_shared_memory`,
+        and each worker attaches its batch read-only, so only the results are
+        pickled; `fn` must be picklable, e.g. a module-level function. Columns
+        of dtype object cannot be shared and are pickled with the batches
+        instead. The thread backend passes views of the columns and suits
+        functions that spend their time in NumPy, which releases the GIL.
+
+        Args:
+            fn (Callable): The function of a batch.
+            batch_size (int|None): The maximum rows per batch. Defaults to splitting the rows
+                into four batches per worker.
+            workers (Executor|int|None): The number of workers, or an executor of the backend's
+                kind. Defaults to the number of CPUs; with 1 the batches run in this thread.
+            backend (str): "process" or "thread".
+
+        Raises:
+            ValueError: if the backend is unknown or `batch_size` is not positive.
+            TypeError: if `fn` returns something else than an ArrayDict or a dict.
+
+        Returns:
+            ArrayDict: The concatenated results.
+
+        Examples:
+            >>> ad = ArrayDict({'x': np.arange(5.0)})
+            >>> ad.map_batches(lambda b: {'y': b['x'] * 2}, batch_size=2, workers=2, backend='thread')['y']
+            array([0., 2., 4., 6., 8.])
+        """
+        from .batches import map_batches
+
+        return map_batches(self, fn, batch_size, workers, backend)
 
     def itertuples(self):
         """Iterate over the rows of the array dictionary.
 
+        Rows are converted a batch at a time: 1-d columns become Python
+        scalars with one `tolist` call per batch, other columns yield views of
+        their rows.
+
         Returns:
-            Iterator[dict]: An iterator that yields dictionaries representing each row.
+            Iterator[tuple]: An iterator that yields namedtuples representing each row.
         """
         row = namedtuple("Row", self.keys())
-        for i in range(self.array_length):
-            yield row(*[self[k][i] for k in self.keys()])
+        for batch in self.iterbatches(BATCH_ROWS):
+            columns = [v.tolist() if v.ndim == 1 else list(v) for v in batch.values()]
+            yield from map(row._make, zip(*columns))
 
     def iterrows(self):
-        for i in range(self.array_length):
-            yield self[i]
+        """Iterate over the rows as ArrayDicts of 0-d arrays and row views, without copying.
+
+        Returns:
+            Iterator[ArrayDict]: An iterator that yields an ArrayDict for each row.
+        """
+        for batch in self.iterbatches(BATCH_ROWS):
+            columns = list(batch.items())
+            for i in range(batch.array_length):
+                yield self._wrap({k: v[i, ...] for k, v in columns})
 
     def iterarrays(self):
         """Iterate over the arrays in the array dictionary.
@@ -180,24 +491,407 @@ class ArrayDict(MutableMapping):
         for i in zip(*self.values()):
             yield i
 
+    def set_index(self, column: str, kind: str = "sorted") -> "ArrayDict":
+        """Index the rows by the values of a 1-d column for lookups with `loc`.
+
+        A 'sorted' index answers each key with a binary search, O(log n), and
+        serves ranges; a 'hash' index answers each key in O(1). The index is
+        cached and rebuilt on the next lookup after the column is changed
+        through the ArrayDict (assignment, row assignment, `append`, `concat`);
+        writing into the column array in place is not detected.
+
+        Args:
+            column (str): The key column.
+            kind (str): 'sorted' or 'hash'.
+
+        Returns:
+            ArrayDict: self.
+
+        Examples:
+            >>> ad = ArrayDict({'id': [30, 10, 20], 'x': [0.3, 0.1, 0.2]}).set_index('id')
+            >>> ad.loc[20]['x'], ad.loc[[30, 10]]['x'], ad.loc[10:20]['id']
+            (array([0.2]), array([0.3, 0.1]), array([10, 20]))
+        """
+        from .index import INDEXES
+
+        if kind not in INDEXES:
+            raise ValueError(f"Unknown index kind '{kind}', expected one of {list(INDEXES)}.")
+        if np.ndim(self._data[column]) != 1:
+            raise ValueError(f"Index column '{column}' must be 1-d.")
+        super().__setattr__("_index", (column, kind, None))
+        self._get_index()
+        return self
+
+    def _get_index(self):
+        if self._index is None:
+            raise KeyError("The ArrayDict has no index, call set_index() first.")
+        column, kind, index = self._index
+        values = self._data[column]
+        if index is None or index.values is not values:
+            from .index import INDEXES
+
+            index = INDEXES[kind](np.asarray(values))
+            super().__setattr__("_index", (column, kind, index))
+        return index
+
+    @property
+    def loc(self) -> "Loc":
+        """Select rows by the values of the column set with `set_index`, see `nesteddict.index.Loc`."""
+        from .index import Loc
+
+        return Loc(self)
+
+    def groupby(self, keys: str | list[str]) -> "GroupBy":
+        """Group the rows by the values of one or more 1-d key columns.
+
+        Args:
+            keys (str|list[str]): The key columns.
+
+        Returns:
+            GroupBy: The groups; call `agg` on it, see `nesteddict.groupby.GroupBy`.
+
+        Examples:
+            >>> ad = ArrayDict({'res': [2, 1, 2], 'pos': [[0., 0.], [1., 1.], [2., 4.]]})
+            >>> ad.groupby('res').agg({'pos': 'mean'})['pos']
+            array([[1., 1.],
+                   [1., 2.]])
+        """
+        from .groupby import GroupBy
+
+        return GroupBy(self, keys)
+
+    def merge(
+        self,
+        other: "ArrayDict",
+        on: str | list[str],
+        how: str = "inner",
+        suffixes: tuple[str, str] = ("_x", "_y"),
+        fill_value: Any = None,
+    ) -> "ArrayDict":
+        """Join the rows of `other` to the rows with equal values in the key columns.
+
+        A sort-merge join: the keys of `other` are sorted once (or its sorted
+        index from `set_index` is reused) and every key of this ArrayDict is
+        matched by binary search, then each output column is gathered with a
+        single `np.take`. Rows keep the order of this ArrayDict, a key matched
+        by several rows of `other` yields all of them in their order.
+
+        Args:
+            other (ArrayDict): The right side.
+            on (str|list[str]): The 1-d key columns, present in both.
+            how (str): 'inner' keeps matched rows only, 'left' keeps every row of this ArrayDict.
+            suffixes (tuple[str, str]): Appended to the names of other columns present in both.
+            fill_value (Any): The value of the columns of `other` in unmatched rows of a left join.
+                By default NaN for float columns, '' for str columns, and int and bool
+                columns become float with NaN when a row is unmatched.
+
+        Raises:
+            ValueError: if `how` is unknown or a key column is not 1-d.
+
+        Returns:
+            ArrayDict: The columns of this ArrayDict, then the other columns of `other`.
+
+        Examples:
+            >>> atoms = ArrayDict({'res': [2, 1, 2], 'x': [0., 1., 2.]})
+            >>> residues = ArrayDict({'res': [1, 2], 'name': ['ALA', 'GLY']})
+            >>> atoms.merge(residues, on='res')['name']
+            array(['GLY', 'ALA', 'GLY'], dtype='<U3')
+        """
+        from .join import merge
+
+        return merge(self, other, on, how, suffixes, fill_value)
+
+    def query(
+        self,
+        expr: str,
+        columns: list[str] | None = None,
+        inplace: bool = False,
+        block_rows: int | None = None,
+    ) -> "ArrayDict":
+        """Select the rows for which a boolean expression over the columns holds.
+
+        The expression is evaluated a cache-sized block of rows at a time, so
+        its temporaries are never full-length, see `nesteddict.query.Query`
+        for the syntax. Only the `columns` are gathered, with a single
+        `np.take` each.
+
+        With `inplace`, columns in buffers this ArrayDict owns, as grown by
+        `append`, have the matching rows moved to the front block by block and
+        become views of them, so no column is allocated. The rows past the end
+        stay allocated as spare capacity for `append`; `shrink_to_fit` releases
+        it. Columns that may be shared, e.g. views of another ArrayDict or
+        arrays passed with `copy=False`, are gathered into new arrays instead,
+        which the ArrayDict then owns.
+
+        Args:
+            expr (str): The expression, e.g. 'a > 3 & b < 2'.
+            columns (list[str]|None): The columns to keep. Defaults to all.
+            inplace (bool): Compact this ArrayDict instead of returning a new one.
+            block_rows (int|None): The rows per block. Defaults to 16384.
+
+        Raises:
+            KeyError: if a column is not in the ArrayDict.
+            ValueError: if the expression is invalid or does not give one boolean per row.
+
+        Returns:
+            ArrayDict: The matching rows, self if `inplace`.
+
+        Examples:
+            >>> ad = ArrayDict({'a': [1, 5, 7, 4], 'b': [0, 1, 3, 1], 'c': [1., 2., 3., 4.]})
+            >>> ad.query('a > 3 & b < 2', columns=['c'])['c']
+            array([2., 4.])
+        """
+        from .query import Query
+
+        keep = list(self._data.keys()) if columns is None else list(columns)
+        for k in keep:
+            if k not in self._data:
+                raise KeyError(f"Column '{k}' not in the ArrayDict.")
+        query = Query(expr, self._data.keys())
+
+        if not inplace:
+            rows = [start + found for start, found in query.blocks(self, block_rows)]
+            rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.intp)
+            return self._wrap({k: np.take(self[k], rows, axis=0) for k in keep})
+
+        if not isinstance(self._data, dict):
+            raise ValueError("An in-place query needs the columns in memory.")
+        targets = {k: self._data[k] for k in keep}
+        owners = self._buffers or {}
+        changed = list(self._data.keys())
+        if not all(owners.get(k) is not None and v.base is owners[k] for k, v in targets.items()):
+            # moving rows would write into arrays others may see
+            rows = [start + found for start, found in query.blocks(self, block_rows)]
+            rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.intp)
+            buffers = {k: np.take(v, rows, axis=0) for k, v in targets.items()}
+            self._data.clear()
+            self._data.update((k, v[:]) for k, v in buffers.items())
+            super().__setattr__("_buffers", buffers or None)
+            super().__setattr__("_length", len(rows) if targets else None)
+            self._invalidate(changed)
+            return self
+
+        n = 0
+        for start, found in query.blocks(self, block_rows):
+            if n == start and (not len(found) or found[-1] == len(found) - 1):
+                # every row so far matched, nothing moves
+                n += len(found)
+                continue
+            for v in targets.values():
+                v[n:n + len(found)] = v[start + found]
+            n += len(found)
+
+        self._data.clear()
+        for k, v in targets.items():
+            self._data[k] = owners[k][:n]
+        super().__setattr__("_buffers", {k: owners[k] for k in targets} or None)
+        super().__setattr__("_length", n if targets else None)
+        self._invalidate(changed)
+        return self
+
+    def copy(self) -> "ArrayDict":
+        """Return an ArrayDict with copies of all columns."""
+        return self._wrap({k: np.array(v) for k, v in self._data.items()}, self._length, self._schema)
+
     def __repr__(self) -> str:
         return f"<ArrayDict: {' '.join(self._data.keys())}>"
 
     __str__ = __repr__
 
-    def concat(self, other: "ArrayDict") -> "ArrayDict":
-        """Concatenate two ArrayDict objects along the first axis.
+    def concat(self, others: Union["ArrayDict", Sequence["ArrayDict"]], workers: int | None = None) -> "ArrayDict":
+        """Concatenate ArrayDict objects along the first axis, in place.
+
+        Each column is concatenated once from its parts in all `others`, so
+        appending many ArrayDicts costs a single copy per column. An empty
+        ArrayDict takes its columns from the first of `others`.
 
         Args:
-            other (ArrayDict): The other ArrayDict to concatenate with.
+            others (ArrayDict | Sequence[ArrayDict]): The ArrayDicts to append.
+            workers (int | None): Threads for concatenating large columns, see `nesteddict.set_executor`.
 
         Returns:
-            ArrayDict: A new ArrayDict containing the concatenated data.
+            ArrayDict: self, containing the concatenated data.
         """
-        for key in self._data.keys():
-            self[key] = np.concatenate((self[key], other[key]), axis=0)
+        if isinstance(others, ArrayDict):
+            others = [others]
+        if not self._data and others:
+            head, *others = others
+            columns = head._data
+        else:
+            columns = self._data
+        concatenate_jobs([
+            (self, key, [columns[key], *(other[key] for other in others)])
+            for key in list(columns.keys())
+        ], workers)
         return self
     
+    def _reserve(self, rows: int) -> dict[str, np.ndarray]:
+        """Make sure every column has capacity for `rows` rows.
+
+        The columns are views of the leading rows of over-allocated buffers,
+        which grow geometrically. Buffers no longer backing the columns, e.g.
+        after a column was reassigned, are replaced by fresh ones.
+        """
+        buffers = self._buffers
+        if (
+            buffers is not None
+            and buffers.keys() == self._data.keys()
+            and all(v.base is buffers[k] for k, v in self._data.items())
+        ):
+            capacity = len(next(iter(buffers.values()), ()))
+        else:
+            capacity = -1
+        if rows <= capacity:
+            return buffers
+
+        n = self.array_length
+        capacity = max(rows, 2 * capacity, MIN_CAPACITY)
+        buffers = {}
+        for k, v in self._data.items():
+            buffers[k] = np.empty((capacity, *v.shape[1:]), dtype=v.dtype)
+            buffers[k][:n] = v
+            self._data[k] = buffers[k][:n]
+        super().__setattr__("_buffers", buffers)
+        return buffers
+
+    def _rows(self, values: MutableMapping | dict, single: bool = False) -> dict[str, np.ndarray]:
+        """Convert the columns of rows to append, one row per value if `single`, before anything is written.
+
+        Each column gets the dtype it must be promoted to, as `np.concatenate`
+        would, so every value fits without an unsafe cast; a Python number
+        keeps the dtype of its column when it fits in it. Columns of the
+        schema are cast as on assignment, see `schema.Field.convert`.
+
+        Raises:
+            ValueError: if the columns differ in length, their rows in shape from those of the
+                columns, a value does not fit the schema, or strings meet numbers.
+        """
+        rows = {}
+        for k, value in values.items():
+            column = self._data.get(k)
+            if single and column is not None and type(value) in (bool, int, float, complex):
+                try:
+                    v = np.asarray(value, dtype=np.result_type(column.dtype, value))
+                except (OverflowError, TypeError):
+                    v = np.asarray(value)
+            else:
+                v = np.asarray(value)
+            if single:
+                v = v[np.newaxis]
+            elif not v.ndim:
+                raise ValueError(f"Column '{k}' to append is a scalar, expected rows.")
+            v = self._column(k, v)
+            if column is not None:
+                if v.shape[1:] != column.shape[1:]:
+                    raise ValueError(f"Column '{k}' has rows of shape {v.shape[1:]}, expected {column.shape[1:]}.")
+                if v.dtype != column.dtype:
+                    try:
+                        if (v.dtype.kind in "US") != (column.dtype.kind in "US"):
+                            raise TypeError
+                        v = v.astype(np.result_type(column.dtype, v.dtype))
+                    except TypeError:
+                        raise ValueError(f"Column '{k}' of dtype {column.dtype} cannot take values of dtype {v.dtype}.") from None
+            rows[k] = v
+        lengths = {k: len(v) for k, v in rows.items()}
+        if len(set(lengths.values())) > 1:
+            raise ValueError(f"Columns to append differ in length: {lengths}.")
+        return rows
+
+    def _promote(self, rows: dict[str, np.ndarray]) -> None:
+        """Cast the columns to the dtypes of the rows to append, as found by `_rows`."""
+        for k, v in rows.items():
+            if self._data[k].dtype != v.dtype:
+                self._data[k] = self._data[k].astype(v.dtype)
+
+    def append(self, row: MutableMapping | dict) -> "ArrayDict":
+        """Append one row in place, in amortized O(1).
+
+        Columns are over-allocated and grow geometrically, so a loop of appends
+        copies each row a constant number of times on average. An empty
+        ArrayDict takes its columns from the first row. A value that does not
+        fit the dtype of its column promotes the column, as `concat` would; a
+        Python number keeps the column's dtype when it fits. Nothing is
+        written unless the whole row fits. `shrink_to_fit` releases the spare
+        capacity.
+
+        Args:
+            row (dict): A value for every column.
+
+        Raises:
+            KeyError: if the keys of `row` differ from the columns.
+            ValueError: if a value does not have the shape of a row of its column, or is a
+                string for a numeric column or the reverse.
+
+        Returns:
+            ArrayDict: self.
+
+        Examples:
+            >>> ad = ArrayDict({'t': [0], 'x': [[0.0, 0.0]]})
+            >>> for t in range(1, 4):
+            ...     _ = ad.append({'t': t, 'x': [t, -t]})
+            >>> ad.array_length, ad['x'][-1]
+            (4, array([ 3., -3.]))
+        """
+        if self._data and row.keys() != self._data.keys():
+            raise KeyError(f"Row keys {list(row.keys())} do not match the columns {list(self._data.keys())}.")
+        row = self._rows(row, single=True)
+        if not self._data:
+            for k, v in row.items():
+                self._data[k] = v[:0]
+        self._promote(row)
+
+        n = self.array_length
+        for k, buffer in self._reserve(n + 1).items():
+            buffer[n:n + 1] = row[k]
+            self._data[k] = buffer[:n + 1]
+        super().__setattr__("_length", n + 1)
+        self._invalidate(self._data.keys())
+        return self
+
+    def extend(self, other: Union["ArrayDict", dict]) -> "ArrayDict":
+        """Append all rows of another ArrayDict in place, see `append`.
+
+        Args:
+            other (ArrayDict|dict): Columns of equal length, with the same keys.
+
+        Raises:
+            KeyError: if the keys of `other` differ from the columns.
+            ValueError: if the columns of `other` differ in length, or in the shape of their rows
+                from the columns.
+
+        Returns:
+            ArrayDict: self.
+        """
+        if self._data and other.keys() != self._data.keys():
+            raise KeyError(f"Keys {list(other.keys())} do not match the columns {list(self._data.keys())}.")
+        other = self._rows(other)
+        if not self._data:
+            for k, v in other.items():
+                self._data[k] = v[:0]
+        self._promote(other)
+
+        n = self.array_length
+        m = len(next(iter(other.values()), ()))
+        for k, buffer in self._reserve(n + m).items():
+            buffer[n:n + m] = other[k]
+            self._data[k] = buffer[:n + m]
+        super().__setattr__("_length", n + m)
+        self._invalidate(self._data.keys())
+        return self
+
+    def shrink_to_fit(self) -> "ArrayDict":
+        """Copy the columns grown by `append` or `extend` to arrays without spare capacity.
+
+        Returns:
+            ArrayDict: self.
+        """
+        if self._buffers is not None:
+            for k, v in self._data.items():
+                if v.base is self._buffers.get(k):
+                    self._data[k] = v.copy()
+            super().__setattr__("_buffers", None)
+        return self
+
     def to_dict(self, include: list[str] | None = None, exclude: list[str] | None = None) -> dict[str, np.ndarray]:
 
         return {
@@ -205,30 +899,202 @@ class ArrayDict(MutableMapping):
             if (include is None or k in include) and (exclude is None or k not in exclude)
         }
     
-    def to_hdf5(self, path: Path | None = None, include: list[str] | None = None, exclude: list[str] | None = None) -> Path | io.BytesIO:
+    def to_hdf5(
+        self,
+        path: "Path | h5py.Group | None" = None,
+        include: list[str] | None = None,
+        exclude: list[str] | None = None,
+        chunks: bool | int | tuple | None = None,
+        compression: str | None = None,
+        compression_opts: Any = None,
+        resizable: bool = False,
+    ) -> "Path | io.BytesIO | h5py.Group":
         """Save the ArrayDict to an HDF5 file.
 
         Args:
-            path (str|Path): The path to the HDF5 file.
+            path (str|Path|h5py.Group|None): The path to the HDF5 file, an open group to write into,
+                or None to write to an in-memory buffer.
             include (list[str]|None): Optional list of keys to include.
             exclude (list[str]|None): Optional list of keys to exclude.
+            chunks (bool|int|tuple|None): True for automatic chunking, an int for that many rows
+                per chunk, or an explicit chunk shape.
+            compression (str|None): A compression filter such as 'gzip' or 'lzf'.
+            compression_opts (Any): Options for the compression filter.
+            resizable (bool): Make the first axis unlimited, so `append_hdf5` can grow the columns.
+
+        Returns:
+            Path|io.BytesIO|h5py.Group: Where the data was written.
         """
-        import h5py
+        from .hdf5 import TYPE_ATTR, open_group, write_dataset
+
         data = self.to_dict(include=include, exclude=exclude)
         if path is None:
             _path = io.BytesIO()
-        else:
+        elif isinstance(path, (str, Path)):
             _path = Path(path)
+        else:
+            _path = path
 
-        with h5py.File(_path, 'w') as f:
+        with open_group(_path, "w") as f:
+            f.attrs[TYPE_ATTR] = "ArrayDict"
             for key, value in data.items():
-                f.create_dataset(key, data=value)
+                write_dataset(f, key, value, chunks, compression, compression_opts, resizable)
+        return _path
+
+    def append_hdf5(
+        self,
+        path: "Path | h5py.Group",
+        include: list[str] | None = None,
+        exclude: list[str] | None = None,
+        **options,
+    ) -> "Path | h5py.Group":
+        """Append the rows of the ArrayDict to the columns of an HDF5 file.
+
+        Columns are grown in place, so a run can stream its rows to disk step
+        by step. Missing columns are created resizable and chunked.
+
+        Args:
+            path (str|Path|h5py.Group): The path to the HDF5 file or an open group.
+            include (list[str]|None): Optional list of keys to include.
+            exclude (list[str]|None): Optional list of keys to exclude.
+            **options: `chunks`, `compression` and `compression_opts` for new columns.
+
+        Returns:
+            Path|h5py.Group: Where the data was written.
+        """
+        from .hdf5 import TYPE_ATTR, append_dataset, open_group
+
+        _path = Path(path) if isinstance(path, str) else path
+        with open_group(_path, "a") as f:
+            f.attrs[TYPE_ATTR] = "ArrayDict"
+            for key, value in self.to_dict(include=include, exclude=exclude).items():
+                append_dataset(f, key, value, **options)
         return _path
 
+    @classmethod
+    def from_hdf5(
+        cls,
+        path: "str | Path | io.BytesIO | h5py.Group",
+        lazy: bool = True,
+        cache: Any = None,
+    ) -> "ArrayDict":
+        """Read an ArrayDict from the datasets of an HDF5 file or group.
+
+        A lazy ArrayDict keeps the file open and reads a column on first access,
+        through a byte-bounded LRU cache. Selecting rows with an int, slice or
+        index array reads only those rows from the file. Loaded columns are
+        read-only; assign a new array to change one. A file opened here from a
+        path or buffer is closed by `close`, or at the end of a `with` block over
+        the ArrayDict; an open group stays the caller's.
+
+        Args:
+            path (str|Path|io.BytesIO|h5py.Group): The HDF5 file or an open group.
+            lazy (bool): Load columns on first access instead of now.
+            cache (LeafCache|int|None): The cache for lazily loaded columns or its size in bytes,
+                see `nesteddict.hdf5.read_group`.
+
+        Returns:
+            ArrayDict: The ArrayDict.
+        """
+        import h5py
+
+        from .hdf5 import read_arraydict, read_file
+
+        if isinstance(path, h5py.Group):
+            return read_arraydict(path, lazy, cache)
+        if not lazy:
+            with h5py.File(path, "r") as f:
+                return read_arraydict(f, lazy=False)
+        return read_file(path, read_arraydict, cache)
+
+    def close(self) -> None:
+        """Close the HDF5 file `from_hdf5` opened for this lazy ArrayDict.
+
+        Columns not loaded yet can no longer be read. Other ArrayDicts are left alone.
+        """
+        from .hdf5 import close
+
+        close(self)
+
+    def __enter__(self) -> "ArrayDict":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def save(self, path: str | Path, include: list[str] | None = None, exclude: list[str] | None = None) -> Path:
+        """Save the ArrayDict to a directory, one `.npy` file per column plus a manifest.
+
+        The manifest is written last, so a directory without one is incomplete.
+        See `open` to read it back without loading.
+
+        Args:
+            path (str|Path): The directory, created if missing.
+            include (list[str]|None): Optional list of keys to include.
+            exclude (list[str]|None): Optional list of keys to exclude.
+
+        Returns:
+            Path: The directory.
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        columns = []
+        for i, (key, value) in enumerate(self.to_dict(include=include, exclude=exclude).items()):
+            # column names may not be valid file names
+            filename = f"{i}.npy"
+            np.save(path / filename, np.asarray(value), allow_pickle=False)
+            columns.append([key, filename])
+        manifest = {"format": MANIFEST_FORMAT, "version": 1, "columns": columns}
+        (path / MANIFEST).write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+        return path
+
+    @classmethod
+    def open(cls, path: str | Path, mmap: bool | str = True) -> "ArrayDict":
+        """Open an ArrayDict saved with `save`.
+
+        With `mmap`, every column is an `np.memmap` of its file: opening is O(1),
+        the OS page cache is shared between processes opening the same
+        directory, and selecting rows reads only the pages they are on.
+
+        Args:
+            path (str|Path): The directory.
+            mmap (bool|str): Memory-map the columns read-only, or with the given `np.memmap`
+                mode such as 'r+' or 'c'. False loads them into memory.
+
+        Raises:
+            ValueError: if the directory has no manifest written by `save`.
+
+        Returns:
+            ArrayDict: The ArrayDict.
+
+        Examples:
+            >>> import tempfile
+            >>> path = ArrayDict({'x': np.arange(4)}).save(tempfile.mkdtemp())
+            >>> ad = ArrayDict.open(path)
+            >>> type(ad['x']).__name__, ad[1:3]['x'].tolist()
+            ('memmap', [1, 2])
+        """
+        path = Path(path)
+        try:
+            manifest = json.loads((path / MANIFEST).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            raise ValueError(f"'{path}' has no {MANIFEST}, it was not written by ArrayDict.save.") from None
+        if manifest.get("format") != MANIFEST_FORMAT:
+            raise ValueError(f"'{path / MANIFEST}' is not an ArrayDict manifest.")
+
+        mmap_mode = ("r" if mmap is True else mmap) or None
+        return cls._wrap({
+            key: np.load(path / filename, mmap_mode=mmap_mode, allow_pickle=False)
+            for key, filename in manifest["columns"]
+        })
 
     def to_arrow(self, include: list[str] | None = None, exclude: list[str] | None = None) -> "pa.Table":
         """Convert the ArrayDict to a PyArrow Table.
 
+        Numeric columns are shared with Arrow without copying. Columns with
+        trailing dimensions become nested FixedSizeList columns, see
+        `nesteddict.arrow.to_arrow_array`.
+
         Args:
             include (list[str]|None): Optional list of keys to include.
             exclude (list[str]|None): Optional list of keys to exclude.
@@ -236,6 +1102,157 @@ class ArrayDict(MutableMapping):
         Returns:
             pa.Table: A PyArrow Table containing the data.
         """
-        import pyarrow as pa
-        data = self.to_dict(include=include, exclude=exclude)
-        return pa.Table.from_pydict(data) 
+        from .arrow import to_table
+
+        return to_table(self.to_dict(include=include, exclude=exclude))
+
+    @classmethod
+    def from_arrow(cls, table: "pa.Table | pa.RecordBatch") -> "ArrayDict":
+        """Create an ArrayDict from a PyArrow Table or RecordBatch.
+
+        Numeric columns without nulls are zero-copy views of the Arrow buffers
+        and read-only. FixedSizeList columns become trailing dimensions.
+
+        Args:
+            table (pa.Table|pa.RecordBatch): The data.
+
+        Returns:
+            ArrayDict: The ArrayDict.
+
+        Examples:
+            >>> ad = ArrayDict({'x': np.zeros((2, 3, 3))})
+            >>> ArrayDict.from_arrow(ad.to_arrow())['x'].shape
+            (2, 3, 3)
+        """
+        from .arrow import from_table
+
+        return cls._wrap(from_table(table))
+
+    def to_ipc(
+        self,
+        sink: "str | Path | io.IOBase",
+        stream: bool = False,
+        batch_size: int | None = None,
+        compression: str | None = None,
+        include: list[str] | None = None,
+        exclude: list[str] | None = None,
+    ) -> "str | Path | io.IOBase":
+        """Write the ArrayDict as an Arrow IPC file, which is also a Feather v2 file, or an IPC stream.
+
+        Args:
+            sink (str|Path|io.IOBase): The path or a binary file object.
+            stream (bool): Write the IPC streaming format instead of the file format.
+            batch_size (int|None): The maximum rows per record batch.
+            compression (str|None): 'lz4' or 'zstd' buffer compression.
+            include (list[str]|None): Optional list of keys to include.
+            exclude (list[str]|None): Optional list of keys to exclude.
+
+        Returns:
+            str|Path|io.IOBase: The sink.
+        """
+        columns = self._wrap(self.to_dict(include=include, exclude=exclude))
+        return self.write_ipc(sink, [columns], stream, batch_size, compression)
+
+    @classmethod
+    def write_ipc(
+        cls,
+        sink: "str | Path | io.IOBase",
+        chunks: Iterable["ArrayDict"],
+        stream: bool = True,
+        batch_size: int | None = None,
+        compression: str | None = None,
+    ) -> "str | Path | io.IOBase":
+        """Stream ArrayDicts with the same columns to an Arrow IPC stream or file, one record batch at a time.
+
+        Chunks are converted and written as they come, so e.g. the output of
+        `iter_csv` can be converted without holding the whole data.
+
+        Args:
+            sink (str|Path|io.IOBase): The path or a binary file object.
+            chunks (Iterable[ArrayDict]): The data.
+            stream (bool): Write the IPC streaming format; False writes the file (Feather) format.
+            batch_size, compression: See `to_ipc`.
+
+        Returns:
+            str|Path|io.IOBase: The sink.
+        """
+        from .arrow import write_ipc
+
+        tables = (chunk.to_arrow() for chunk in chunks)
+        return write_ipc(sink, tables, stream, batch_size, compression)
+
+    @classmethod
+    def from_ipc(cls, source: "str | Path | bytes | io.IOBase") -> "ArrayDict":
+        """Read an Arrow IPC file, Feather v2 file or IPC stream.
+
+        Files are memory-mapped, so uncompressed numeric columns of a single
+        record batch are not copied.
+
+        Args:
+            source (str|Path|bytes|io.IOBase): The path, the bytes or a binary file object.
+
+        Returns:
+            ArrayDict: The ArrayDict.
+        """
+        from .arrow import read_ipc
+
+        return cls.from_arrow(read_ipc(source))
+
+    @classmethod
+    def iter_ipc(cls, source: "str | Path | bytes | io.IOBase") -> Iterator["ArrayDict"]:
+        """Read an Arrow IPC file, Feather v2 file or IPC stream one record batch at a time, see `from_ipc`.
+
+        Yields:
+            ArrayDict: The record batches in order.
+        """
+        from .arrow import iter_ipc
+
+        for batch in iter_ipc(source):
+            yield cls.from_arrow(batch)
+
+    def to_shared_memory(self, name: str | None = None) -> "SharedHandle":
+        """Copy the columns into one shared memory block that other processes can map without copying.
+
+        The returned handle is small and picklable; `attach` turns it back
+        into an ArrayDict whose columns are views of the block, in any process
+        on this machine. The block lives until the handle's `unlink` is
+        called, or the handle's `with` block ends; see
+        `nesteddict.shm.SharedHandle`.
+
+        Args:
+            name (str|None): The name of the block; a unique one by default.
+
+        Raises:
+            ValueError: if a column has dtype object.
+
+        Returns:
+            SharedHandle: The handle.
+
+        Examples:
+            >>> ad = ArrayDict({'x': [1.0, 2.0], 'id': [3, 4]})
+            >>> with ad.to_shared_memory() as handle:
+            ...     ArrayDict.attach(handle)['x']
+            array([1., 2.])
+        """
+        from .shm import share
+
+        return share(self, name)
+
+    @classmethod
+    def attach(cls, handle: "SharedHandle", readonly: bool = True) -> "ArrayDict":
+        """Wrap the columns of a shared memory block created by `to_shared_memory`, without copying.
+
+        The block is mapped once per process, however often it is attached,
+        and stays mapped until the handle's `close` is called in this process.
+
+        Args:
+            handle (SharedHandle): The handle, possibly unpickled in another process.
+            readonly (bool): Make the columns read-only. With False, writes are seen by
+                every process that attached the block.
+
+        Returns:
+            ArrayDict: The columns.
+        """
+        from .shm import attach
+
+        return attach(handle, readonly)
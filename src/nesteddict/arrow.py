@@ -0,0 +1,143 @@
+import io
+from itertools import chain
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+import numpy as np
+import pyarrow as pa
+
+
+def to_arrow_array(column: np.ndarray) -> pa.Array:
+    """Convert a column to an Arrow array, zero-copy for numeric data.
+
+    Trailing dimensions become nested FixedSizeList types over the flat
+    values, so an `(n, 3, 3)` column is `fixed_size_list<fixed_size_list<double, 3>, 3>`.
+
+    Examples:
+        >>> to_arrow_array(np.zeros((2, 3))).type
+        FixedSizeListType(fixed_size_list<item: double>[3])
+    """
+    column = np.asarray(column)
+    if column.ndim <= 1:
+        return pa.array(column)
+    column = np.ascontiguousarray(column)
+    array = pa.array(column.reshape(-1))
+    for size in reversed(column.shape[1:]):
+        array = pa.FixedSizeListArray.from_arrays(array, size)
+    return array
+
+
+def from_arrow_array(array: pa.Array | pa.ChunkedArray) -> np.ndarray:
+    """Convert an Arrow array back to a column, zero-copy for numeric data without nulls.
+
+    Nested FixedSizeList arrays become trailing dimensions, nulls become NaN
+    or empty strings. Chunked arrays with more than one chunk are combined
+    first, which copies.
+    """
+    if isinstance(array, pa.ChunkedArray):
+        array = array.chunk(0) if array.num_chunks == 1 else array.combine_chunks()
+    shape = [len(array)]
+    while pa.types.is_fixed_size_list(array.type):
+        shape.append(array.type.list_size)
+        array = array.flatten()
+
+    if pa.types.is_string(array.type) or pa.types.is_large_string(array.type):
+        # missing strings read as empty ones, like empty CSV fields
+        return array.fill_null("").to_numpy(zero_copy_only=False).astype(str).reshape(shape)
+    zero_copy = array.null_count == 0 and (
+        pa.types.is_integer(array.type) or pa.types.is_floating(array.type)
+    )
+    return array.to_numpy(zero_copy_only=zero_copy).reshape(shape)
+
+
+def to_table(columns: dict[str, np.ndarray]) -> pa.Table:
+    return pa.Table.from_arrays(
+        [to_arrow_array(column) for column in columns.values()], names=list(columns)
+    )
+
+
+def from_table(table: pa.Table | pa.RecordBatch) -> dict[str, np.ndarray]:
+    return {name: from_arrow_array(column) for name, column in zip(table.column_names, table.columns)}
+
+
+def _open_source(source: Any) -> Any:
+    # memory-map files so reading them does not copy
+    if isinstance(source, (str, Path)):
+        return pa.memory_map(str(source), "r")
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return pa.BufferReader(source)
+    return source
+
+
+def _reader(source: Any) -> pa.ipc.RecordBatchFileReader | pa.ipc.RecordBatchStreamReader:
+    """Open an IPC file (Feather v2) or stream, whichever `source` holds."""
+    source = _open_source(source)
+    if isinstance(source, io.IOBase) and source.seekable():
+        start = source.tell()
+    else:
+        start = None
+    try:
+        return pa.ipc.open_file(source)
+    except pa.ArrowInvalid:
+        if start is not None:
+            source.seek(start)
+        elif isinstance(source, pa.NativeFile):
+            source.seek(0)
+        return pa.ipc.open_stream(source)
+
+
+def read_ipc(source: Any) -> pa.Table:
+    """Read a whole Arrow IPC file, Feather file or IPC stream as a table."""
+    return _reader(source).read_all()
+
+
+def iter_ipc(source: Any) -> Iterator[pa.RecordBatch]:
+    """Read the record batches of an Arrow IPC file, Feather file or IPC stream one at a time."""
+    reader = _reader(source)
+    if isinstance(reader, pa.ipc.RecordBatchFileReader):
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i)
+    else:
+        yield from reader
+
+
+def write_ipc(
+    sink: Any,
+    tables: Iterable[pa.Table | pa.RecordBatch],
+    stream: bool = False,
+    batch_size: int | None = None,
+    compression: str | None = None,
+) -> Any:
+    """Write tables to an Arrow IPC file, readable as Feather, or to an IPC stream.
+
+    Tables are written as they come, so an iterator of chunks is streamed out
+    without holding more than one in memory. The schema is taken from the first.
+
+    Args:
+        sink (str|Path|file-like): The destination.
+        tables (Iterable[pa.Table|pa.RecordBatch]): The data.
+        stream (bool): Write the streaming format instead of the file format.
+        batch_size (int|None): The maximum rows per record batch.
+        compression (str|None): 'lz4' or 'zstd' buffer compression.
+
+    Returns:
+        The sink.
+    """
+    tables = iter(tables)
+    first = next(tables, None)
+    if first is None:
+        raise ValueError("Nothing to write.")
+
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    out = pa.OSFile(str(sink), "wb") if isinstance(sink, (str, Path)) else sink
+    new_writer = pa.ipc.new_stream if stream else pa.ipc.new_file
+    try:
+        with new_writer(out, first.schema, options=options) as writer:
+            for table in chain([first], tables):
+                if isinstance(table, pa.RecordBatch):
+                    table = pa.Table.from_batches([table])
+                writer.write_table(table, max_chunksize=batch_size)
+    finally:
+        if out is not sink:
+            out.close()
+    return sink
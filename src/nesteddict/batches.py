@@ -0,0 +1,88 @@
+import os
+from collections.abc import Mapping
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable
+
+from .arraydict import ArrayDict
+from .parallel import resolve_executor
+from .shm import SharedHandle
+
+BACKENDS = ("process", "thread")
+BATCHES_PER_WORKER = 4  # so a slow batch does not leave the other workers idle
+
+BatchFunction = Callable[[ArrayDict], ArrayDict | Mapping]
+
+
+def _result(fn: BatchFunction, batch: ArrayDict) -> ArrayDict:
+    result = fn(batch)
+    if isinstance(result, ArrayDict):
+        return result
+    if isinstance(result, Mapping):
+        return ArrayDict(result, copy=False)
+    raise TypeError(f"map_batches expects fn to return an ArrayDict or a dict of arrays, got {type(result).__name__}.")
+
+
+def _run_shared(fn: BatchFunction, handle: SharedHandle, start: int, stop: int) -> ArrayDict:
+    """Run `fn` on rows `start:stop` of a shared block, in a worker process."""
+    result = _result(fn, ArrayDict.attach(handle)[start:stop])
+    try:
+        handle.close()
+    except BufferError:
+        # the result views the block, which the creator may unlink any time
+        result = result.copy()
+        handle.close()
+    return result
+
+
+def map_batches(
+    source: ArrayDict,
+    fn: BatchFunction,
+    batch_size: int | None = None,
+    workers: Executor | int | None = None,
+    backend: str = "process",
+) -> ArrayDict:
+    """Apply a function to batches of rows in a pool and concatenate the results, see `ArrayDict.map_batches`."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}.")
+    if batch_size is not None and batch_size < 1:
+        raise ValueError("batch_size must be positive.")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    n = source.array_length
+    if batch_size is None:
+        count = workers if isinstance(workers, int) else os.cpu_count() or 1
+        batch_size = max(-(-n // (count * BATCHES_PER_WORKER)), 1)
+    # an empty source still gets one call, which decides the columns of the result
+    bounds = [(start, min(start + batch_size, n)) for start in range(0, n, batch_size)] or [(0, 0)]
+
+    if backend == "thread":
+        executor = resolve_executor(workers)
+        if executor is None:
+            results = [_result(fn, source[start:stop]) for start, stop in bounds]
+        else:
+            results = list(executor.map(lambda bound: _result(fn, source[bound[0]:bound[1]]), bounds))
+    elif isinstance(workers, int) and workers <= 1:
+        results = [_result(fn, source[start:stop]) for start, stop in bounds]
+    else:
+        results = _map_processes(source, fn, bounds, workers)
+    return ArrayDict().concat(results)
+
+
+def _map_processes(
+    source: ArrayDict,
+    fn: BatchFunction,
+    bounds: list[tuple[int, int]],
+    workers: Executor | int,
+) -> list[ArrayDict]:
+    executor = ProcessPoolExecutor(min(workers, len(bounds))) if isinstance(workers, int) else workers
+    try:
+        if any(v.dtype.hasobject for v in source.values()):
+            # object columns cannot live in shared memory, the batches are pickled
+            futures = [executor.submit(_result, fn, source[start:stop]) for start, stop in bounds]
+            return [future.result() for future in futures]
+        with source.to_shared_memory() as handle:
+            futures = [executor.submit(_run_shared, fn, handle, start, stop) for start, stop in bounds]
+            return [future.result() for future in futures]
+    finally:
+        if executor is not workers:
+            executor.shutdown()
@@ -0,0 +1,258 @@
+import csv
+from contextlib import contextmanager
+from itertools import islice
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Sequence
+
+import numpy as np
+
+CHUNK_ROWS = 1 << 16
+_TRUE = ("true", "t", "yes", "y", "1")
+_FALSE = ("false", "f", "no", "n", "0", "")
+
+
+@contextmanager
+def open_lines(source: str | Path | Iterable[str]) -> Iterator[Iterable[str]]:
+    """Yield the lines of a CSV path, file object or iterable of lines."""
+    if isinstance(source, (str, Path)):
+        with open(source, "r", encoding="utf-8", newline="") as f:
+            yield f
+    else:
+        yield source
+
+
+def convert(strings: Sequence[str], dtype: Any = None) -> np.ndarray:
+    """Convert a column of strings to an array in one call.
+
+    Without a dtype, int64 is tried first, then float64, then str. Empty
+    fields of float columns become NaN, so an int column with missing values
+    is read as float. Bool columns take the spellings in `_TRUE` and `_FALSE`,
+    in any case; empty fields are False.
+
+    Args:
+        strings (Sequence[str]): The fields of the column.
+        dtype (Any): The dtype, or None to infer it.
+
+    Returns:
+        np.ndarray: The column.
+
+    Raises:
+        ValueError: if a field cannot be converted to the dtype.
+
+    Examples:
+        >>> convert(['1', '2'])
+        array([1, 2])
+        >>> convert(['1', ''])
+        array([ 1., nan])
+        >>> convert(['1', 'x'])
+        array(['1', 'x'], dtype='<U1')
+        >>> convert(['Yes', 'n', ''], bool)
+        array([ True, False, False])
+    """
+    if dtype is None:
+        for dtype in (np.int64, np.float64):
+            try:
+                return convert(strings, dtype)
+            except (ValueError, OverflowError):
+                pass
+        return np.array(strings, dtype=str)
+
+    dtype = np.dtype(dtype)
+    if dtype.kind == "b":
+        fields = np.char.lower(np.char.strip(np.array(strings, dtype=str)))
+        values = np.isin(fields, _TRUE)
+        invalid = ~values & ~np.isin(fields, _FALSE)
+        if invalid.any():
+            raise ValueError(f"invalid literal for bool: '{strings[np.flatnonzero(invalid)[0]]}'")
+        return values
+    if dtype.kind == "U":
+        # an unsized str dtype sizes the column to its longest field
+        return np.array(strings, dtype=str if dtype.itemsize == 0 else dtype)
+    try:
+        return np.array(strings, dtype=dtype)
+    except ValueError:
+        if dtype.kind not in "fc" or "" not in strings:
+            raise
+        return np.array([s or "nan" for s in strings], dtype=dtype)
+
+
+def _text(block: np.ndarray) -> np.ndarray:
+    """Format a numeric block as str, with the NaN of empty float fields back to ""."""
+    text = block.astype(str)
+    if block.dtype.kind == "f":
+        text[np.isnan(block)] = ""
+    return text
+
+
+class ColumnBuffer:
+    """The typed blocks of one column, concatenated once at the end.
+
+    An inferred column keeps the dtype of its first block as long as later
+    blocks convert to it, and is widened (int to float, anything to str)
+    when one does not. Blocks widened to str are formatted from their
+    numbers, not their fields: "007" in an int block becomes "7", "1e3" in a
+    float block "1000.0", and an empty float field "". Pass `dtype=str` for
+    the column to keep its exact text. A given dtype is never changed.
+    """
+
+    __slots__ = ("name", "dtype", "fixed", "blocks")
+
+    def __init__(self, name: str, dtype: Any = None):
+        self.name = name
+        self.fixed = dtype is not None
+        self.dtype = np.dtype(dtype) if self.fixed else None
+        self.blocks: list[np.ndarray] = []
+
+    def convert(self, strings: Sequence[str]) -> np.ndarray:
+        """Convert one block of fields, widening the dtype of an inferred column if needed."""
+        dtype = self.dtype
+        if dtype is not None and dtype.kind == "U":
+            dtype = np.dtype(str)
+        try:
+            return convert(strings, dtype)
+        except (ValueError, OverflowError) as e:
+            if self.fixed:
+                raise ValueError(f"Column '{self.name}': {e}") from None
+        block = convert(strings)
+        if "U" in (block.dtype.kind, self.dtype.kind):
+            self.dtype = np.dtype(str)
+            self.blocks = [_text(b) for b in self.blocks]
+            return block.astype(self.dtype)
+        self.dtype = np.result_type(self.dtype, block)
+        self.blocks = [b.astype(self.dtype) for b in self.blocks]
+        return block.astype(self.dtype)
+
+    def append(self, strings: Sequence[str]) -> None:
+        block = self.convert(strings)
+        if self.dtype is None:
+            self.dtype = block.dtype
+        self.blocks.append(block)
+
+    def finish(self) -> np.ndarray:
+        if not self.blocks:
+            return np.array([], dtype=self.dtype or np.float64)
+        if len(self.blocks) == 1:
+            return self.blocks[0]
+        return np.concatenate(self.blocks)
+
+
+def schema(reader: Iterator[list[str]], header: Sequence[str] | None, usecols: Sequence[str | int] | None) -> tuple[list[str], list[int]]:
+    """Read the header row unless one is given, and resolve `usecols` to names and field indices."""
+    names = list(header) if header is not None else next(reader, [])
+    if usecols is None:
+        return names, list(range(len(names)))
+    indices = []
+    for col in usecols:
+        if isinstance(col, int):
+            indices.append(col)
+        elif col in names:
+            indices.append(names.index(col))
+        else:
+            raise KeyError(f"Column '{col}' not in the CSV header.")
+    return [names[i] for i in indices], indices
+
+
+def iter_blocks(reader: Iterator[list[str]], indices: list[int], rows: int | None = None) -> Iterator[list[Sequence[str]]]:
+    """Yield blocks of at most `rows` rows, `CHUNK_ROWS` by default, as the fields of each selected column.
+
+    Fields of unselected columns are not copied. Blank lines are skipped and
+    missing trailing fields are read as empty.
+    """
+    if not indices:
+        return
+    rows = rows or CHUNK_ROWS
+    width = max(indices) + 1
+    getters = [itemgetter(i) for i in indices]
+    while True:
+        block = list(islice(reader, rows))
+        if not block:
+            return
+        block = [row for row in block if row]
+        if not block:
+            continue
+        if min(map(len, block)) < width:
+            block = [row if len(row) >= width else row + [""] * (width - len(row)) for row in block]
+        # one pass per selected column is much faster than zip(*block) over all of them
+        yield [list(map(getter, block)) for getter in getters]
+
+
+def dtypes(names: list[str], dtype: Any) -> list[Any]:
+    """The dtype of each column from a single dtype or a dict by column name."""
+    if isinstance(dtype, dict):
+        return [dtype.get(name) for name in names]
+    return [dtype] * len(names)
+
+
+def read_csv(
+    source: str | Path | Iterable[str],
+    header: Sequence[str] | None = None,
+    delimiter: str = ",",
+    dtype: Any = None,
+    usecols: Sequence[str | int] | None = None,
+    **kwargs,
+) -> dict[str, np.ndarray]:
+    """Parse a CSV into typed columns, block by block.
+
+    Rows are split by the `csv` module and transposed a block at a time; every
+    block of a column is converted with a single NumPy call, so no per-row
+    dicts or per-column lists of the whole file are built.
+
+    Args:
+        source (str|Path|Iterable[str]): A path, a file object or an iterable of lines.
+        header (Sequence[str]|None): The column names; if given, the first line is data.
+        delimiter (str): The field delimiter.
+        dtype (Any): A dtype for all columns, a dict of dtypes by column name, or None to infer.
+            A column inferred as str may format numbers from its earlier blocks ("7" for "007"),
+            see `ColumnBuffer`; pass str for the columns whose exact text is needed.
+        usecols (Sequence[str|int]|None): The columns to read, by name or position.
+        **kwargs: Passed to `csv.reader`.
+
+    Returns:
+        dict[str, np.ndarray]: The columns.
+    """
+    with open_lines(source) as lines:
+        reader = csv.reader(lines, delimiter=delimiter, **kwargs)
+        names, indices = schema(reader, header, usecols)
+        columns = [ColumnBuffer(name, d) for name, d in zip(names, dtypes(names, dtype))]
+        for block in iter_blocks(reader, indices):
+            for column, strings in zip(columns, block):
+                column.append(strings)
+    return {column.name: column.finish() for column in columns}
+
+
+def iter_csv(
+    source: str | Path | Iterable[str],
+    chunksize: int | None = None,
+    header: Sequence[str] | None = None,
+    delimiter: str = ",",
+    dtype: Any = None,
+    usecols: Sequence[str | int] | None = None,
+    **kwargs,
+) -> Iterator[dict[str, np.ndarray]]:
+    """Parse a CSV into chunks of typed columns, reading one chunk at a time.
+
+    Only one chunk is held in memory. Dtypes not given are inferred from the
+    first chunk and then fixed, so every chunk has the same schema; a later
+    field that does not fit raises ValueError, and passing `dtype` for that
+    column avoids it.
+
+    Args:
+        source (str|Path|Iterable[str]): A path, a file object or an iterable of lines.
+        chunksize (int|None): The maximum rows per chunk. Defaults to `CHUNK_ROWS`.
+        header, delimiter, dtype, usecols, **kwargs: See `read_csv`.
+
+    Yields:
+        dict[str, np.ndarray]: The columns of each chunk.
+    """
+    with open_lines(source) as lines:
+        reader = csv.reader(lines, delimiter=delimiter, **kwargs)
+        names, indices = schema(reader, header, usecols)
+        columns = [ColumnBuffer(name, d) for name, d in zip(names, dtypes(names, dtype))]
+        for block in iter_blocks(reader, indices, chunksize):
+            chunk = {}
+            for column, strings in zip(columns, block):
+                chunk[column.name] = values = column.convert(strings)
+                if not column.fixed:
+                    column.dtype, column.fixed = values.dtype, True
+            yield chunk
@@ -0,0 +1,217 @@
+import pickle
+from collections import OrderedDict
+from collections.abc import Mapping
+from functools import wraps
+from hashlib import blake2b
+from threading import Lock
+from typing import Any, Callable
+
+import numpy as np
+
+from .arraydict import ArrayDict
+from .nestdict import NestDict
+
+DIGEST_SIZE = 16
+_SCALARS = (str, bytes, int, float, complex, bool, type(None))
+
+# `(leaf, digest)` by path; a leaf is re-hashed when the path holds another object
+LeafDigests = dict[tuple, tuple[Any, bytes]]
+
+
+def hash_array(array: np.ndarray) -> bytes:
+    """Hash the dtype, shape and data buffer of an array.
+
+    The buffer of a contiguous array is hashed in place, without a copy.
+
+    Examples:
+        >>> hash_array(np.arange(3)) == hash_array(np.array([0, 1, 2]))
+        True
+        >>> hash_array(np.arange(3)) == hash_array(np.arange(3.0))
+        False
+    """
+    h = blake2b(digest_size=DIGEST_SIZE)
+    h.update(f"{array.dtype.str}{array.shape}".encode())
+    if array.dtype.hasobject:
+        h.update(pickle.dumps(array.tolist()))
+    else:
+        h.update(np.ascontiguousarray(array).reshape(-1).view(np.uint8).data)
+    return h.digest()
+
+
+def frozen(array: np.ndarray) -> bool:
+    """Whether the data of an array cannot change: it and every array it views are read-only.
+
+    Only the digests of frozen arrays are cached, other arrays can be written
+    in place and are hashed again each time.
+
+    Examples:
+        >>> a = np.arange(3)
+        >>> a.flags.writeable = False
+        >>> frozen(a), frozen(np.arange(3)), frozen(a[1:])
+        (True, False, True)
+    """
+    while isinstance(array, np.ndarray):
+        if array.flags.writeable:
+            return False
+        array = array.base
+    # a buffer not owned by NumPy, e.g. shared memory, may be written through another view
+    return array is None or isinstance(array, bytes) or isinstance(array, memoryview) and array.readonly
+
+
+def combine(tag: bytes, digests: Mapping[Any, bytes]) -> bytes:
+    """Hash the digests of the children of a node, in key order so insertion order does not matter."""
+    h = blake2b(tag, digest_size=DIGEST_SIZE)
+    for key, digest in sorted((repr(k).encode(), d) for k, d in digests.items()):
+        h.update(key)
+        h.update(b"\0")
+        h.update(digest)
+    return h.digest()
+
+
+def digest(value: Any) -> bytes:
+    """The content digest of any value of a tree.
+
+    Arrays hash their buffers, NestDicts, ArrayDicts and dicts are Merkle
+    hashes of their children, sequences hash their items in order, and
+    other values hash their pickle.
+
+    Raises:
+        TypeError: if the value cannot be pickled.
+    """
+    if isinstance(value, (ArrayDict, NestDict)):
+        return bytes.fromhex(value.fingerprint())
+    if isinstance(value, np.ndarray):
+        return hash_array(value)
+    if isinstance(value, Mapping):
+        return combine(b"dict", {k: digest(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        h = blake2b(type(value).__name__.encode(), digest_size=DIGEST_SIZE)
+        for item in value:
+            h.update(digest(item))
+        return h.digest()
+    if isinstance(value, np.generic):
+        return hash_array(np.asarray(value))
+    h = blake2b(type(value).__name__.encode(), digest_size=DIGEST_SIZE)
+    if isinstance(value, _SCALARS):
+        h.update(repr(value).encode())
+    else:
+        try:
+            h.update(pickle.dumps(value))
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            raise TypeError(f"Cannot fingerprint a value of type {type(value).__name__}: {e}") from None
+    return h.digest()
+
+
+def tree_digest(node: Mapping, cached: LeafDigests, visited: LeafDigests, path: tuple = ()) -> bytes:
+    """The Merkle digest of a nested mapping.
+
+    Frozen array leaves, see `frozen`, found at the same path in `cached` as
+    the same object reuse their digest; every array leaf is recorded in
+    `visited`. ArrayDict leaves
+    keep their own cache, other leaves are cheap and hashed again.
+    """
+    digests = {}
+    for k, v in node.items():
+        key = (*path, k)
+        if isinstance(v, NestDict):
+            v = v._data
+        if isinstance(v, Mapping) and not isinstance(v, ArrayDict):
+            digests[k] = tree_digest(v, cached, visited, key)
+        elif isinstance(v, np.ndarray):
+            hit = cached.get(key)
+            visited[key] = hit if hit is not None and hit[0] is v and frozen(v) else (v, hash_array(v))
+            digests[k] = visited[key][1]
+        else:
+            digests[k] = digest(v)
+    return combine(b"dict", digests)
+
+
+def tree_equal(a: Any, b: Any) -> bool:
+    """Compare two trees, stopping at the first difference.
+
+    Subtrees that are the same object, as after `NestDict.snapshot`, are
+    equal without being visited. Arrays are compared with `np.array_equal`,
+    ArrayDicts with their own `==`, NestDicts and dicts by their items.
+    """
+    if a is b:
+        return True
+    if isinstance(a, NestDict):
+        a = a._data
+    if isinstance(b, NestDict):
+        b = b._data
+    if a is b:
+        return True
+    if isinstance(a, ArrayDict) or isinstance(b, ArrayDict):
+        return a == b if isinstance(a, ArrayDict) else b == a
+    if isinstance(a, Mapping) or isinstance(b, Mapping):
+        if not (isinstance(a, Mapping) and isinstance(b, Mapping)) or a.keys() != b.keys():
+            return False
+        return all(tree_equal(v, b[k]) for k, v in a.items())
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        return np.array_equal(a, b)
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        return type(a) is type(b) and len(a) == len(b) and all(map(tree_equal, a, b))
+    return bool(a == b)
+
+
+def _key(value: Any) -> Any:
+    if isinstance(value, (ArrayDict, NestDict, np.ndarray, Mapping, list)):
+        return (type(value).__name__, digest(value))
+    try:
+        hash(value)
+    except TypeError:
+        return (type(value).__name__, digest(value))
+    return value
+
+
+def memoize(fn: Callable | None = None, maxsize: int | None = 128) -> Callable:
+    """Cache the results of a function by the contents of its arguments.
+
+    NestDict, ArrayDict, ndarray, dict and list arguments are keyed by their
+    fingerprint, other arguments by themselves, so a tree written in place
+    is a new key. The digests of read-only arrays are cached by the trees:
+    calling again with an unchanged tree of read-only arrays hashes nothing
+    new, and with a changed one only what changed, while writeable arrays
+    are hashed on every call. Results are shared between calls with equal
+    arguments and must not be modified.
+
+    Args:
+        fn (Callable|None): The function, when used as `@memoize` without arguments.
+        maxsize (int|None): The number of results kept, least recently used first out;
+            None keeps all.
+
+    Returns:
+        Callable: The function with a cache; `cache_clear()` empties it.
+
+    Examples:
+        >>> calls = []
+        >>> @memoize
+        ... def total(tree):
+        ...     calls.append(1)
+        ...     return sum(v.sum() for v in tree.values())
+        >>> nd = NestDict({'a': np.arange(3), 'b': np.ones(2)})
+        >>> total(nd), total(NestDict({'b': np.ones(2), 'a': np.arange(3)})), len(calls)
+        (np.float64(5.0), np.float64(5.0), 1)
+    """
+    def decorate(fn: Callable) -> Callable:
+        cache: OrderedDict = OrderedDict()
+        lock = Lock()
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (tuple(map(_key, args)), tuple(sorted((k, _key(v)) for k, v in kwargs.items())))
+            with lock:
+                if key in cache:
+                    cache.move_to_end(key)
+                    return cache[key]
+            result = fn(*args, **kwargs)
+            with lock:
+                cache[key] = result
+                if maxsize is not None and len(cache) > maxsize:
+                    cache.popitem(last=False)
+            return result
+
+        wrapper.cache_clear = cache.clear
+        return wrapper
+
+    return decorate(fn) if fn is not None else decorate
@@ -0,0 +1,326 @@
+from collections.abc import MutableMapping
+from typing import Any, Iterator, Sequence
+
+from .nestdict import NestDict, NestedKey, _iter_mapping
+from .path import NestPath
+
+_MISSING = object()
+
+
+def _is_branch(value: Any) -> bool:
+    return isinstance(value, (dict, NestDict))
+
+
+def _keys(nested_key: NestedKey) -> tuple:
+    if isinstance(nested_key, NestPath):
+        return nested_key.keys
+    if isinstance(nested_key, list):
+        return tuple(nested_key)
+    return (nested_key,)
+
+
+class _FlatStore:
+    """Leaves keyed by their full path tuple, plus a prefix index.
+
+    `children` maps every interior path to an insertion-ordered dict of its
+    child keys, so subtrees can be listed without touching `leaves`.
+    """
+
+    __slots__ = ("leaves", "children")
+
+    def __init__(self):
+        self.leaves: dict[tuple, Any] = {}
+        self.children: dict[tuple, dict] = {(): {}}
+
+    def lookup(self, path: tuple) -> Any:
+        try:
+            return self.leaves[path]
+        except KeyError:
+            if path in self.children:
+                return FlatNestDict._view(self, path)
+            raise KeyError(path[-1]) from None
+
+    def contains(self, path: tuple) -> bool:
+        return path in self.leaves or path in self.children
+
+    def link(self, path: tuple) -> None:
+        """Register `path` in the index of its parent, creating missing ancestors."""
+        children = self.children
+        for i in range(len(path) - 1, -1, -1):
+            parent = path[:i]
+            siblings = children.get(parent)
+            if siblings is not None:
+                siblings[path[i]] = None
+                return
+            if parent in self.leaves:
+                raise TypeError(f"Cannot create '{path[i]}' below the leaf at {parent}.")
+            children[parent] = {path[i]: None}
+
+    def ensure(self, path: tuple) -> None:
+        """Make sure `path` is an interior node."""
+        if path in self.children:
+            return
+        if path in self.leaves:
+            raise TypeError(f"Cannot use the leaf at {path} as a container.")
+        self.children[path] = {}
+        self.link(path)
+
+    def set(self, path: tuple, value: Any) -> None:
+        leaves = self.leaves
+        if not isinstance(value, (dict, NestDict)):
+            if path in leaves:
+                leaves[path] = value
+                return
+        elif isinstance(value, FlatNestDict):
+            value = value.copy()
+        self.discard(path)
+        self.link(path)
+
+        children = self.children
+        stack = [(path, value)]
+        while stack:
+            path, value = stack.pop()
+            if _is_branch(value):
+                children[path] = dict.fromkeys(value)
+                stack.extend(((*path, k), v) for k, v in value.items())
+            else:
+                leaves[path] = value
+
+    def discard(self, path: tuple) -> bool:
+        """Drop the leaf or subtree at `path`, leaving the parent index alone."""
+        if self.leaves.pop(path, _MISSING) is not _MISSING:
+            return True
+        if path not in self.children:
+            return False
+        stack = [path]
+        while stack:
+            parent = stack.pop()
+            for k in self.children.pop(parent):
+                child = (*parent, k)
+                if child in self.children:
+                    stack.append(child)
+                else:
+                    del self.leaves[child]
+        return True
+
+    def delete(self, path: tuple) -> None:
+        if not path or not self.discard(path):
+            raise KeyError(path[-1] if path else path)
+        del self.children[path[:-1]][path[-1]]
+
+    def materialize(self, path: tuple) -> dict:
+        """Build plain nested dicts for the subtree at `path`."""
+        root = {}
+        stack = [(path, root)]
+        while stack:
+            parent, node = stack.pop()
+            for k in self.children[parent]:
+                child = (*parent, k)
+                if child in self.children:
+                    node[k] = {}
+                    stack.append((child, node[k]))
+                else:
+                    node[k] = self.leaves[child]
+        return root
+
+    def copy(self, path: tuple) -> "_FlatStore":
+        """Copy the index and leaf references of the subtree at `path`, re-rooted."""
+        store = _FlatStore()
+        cut = len(path)
+        if not cut:
+            store.leaves = self.leaves.copy()
+            store.children = {k: v.copy() for k, v in self.children.items()}
+            return store
+        stack = [path]
+        while stack:
+            parent = stack.pop()
+            store.children[parent[cut:]] = self.children[parent].copy()
+            for k in self.children[parent]:
+                child = (*parent, k)
+                if child in self.children:
+                    stack.append(child)
+                else:
+                    store.leaves[child[cut:]] = self.leaves[child]
+        return store
+
+
+class _FlatNode(MutableMapping):
+    """The `_data` of a FlatNestDict: a mapping view of one interior path."""
+
+    __slots__ = ("store", "prefix")
+
+    def __init__(self, store: _FlatStore, prefix: tuple):
+        self.store = store
+        self.prefix = prefix
+
+    def __getitem__(self, key: Any) -> Any:
+        return self.store.lookup((*self.prefix, key))
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self.store.set((*self.prefix, key), value)
+
+    def __delitem__(self, key: Any) -> None:
+        self.store.delete((*self.prefix, key))
+
+    def __contains__(self, key: Any) -> bool:
+        return self.store.contains((*self.prefix, key))
+
+    def __iter__(self) -> Iterator:
+        return iter(self.store.children.get(self.prefix, ()))
+
+    def __len__(self) -> int:
+        return len(self.store.children.get(self.prefix, ()))
+
+    def keys(self):
+        return self.store.children.get(self.prefix, {}).keys()
+
+    def clear(self) -> None:
+        for key in list(self):
+            del self[key]
+
+    def copy(self) -> dict:
+        return self.store.materialize(self.prefix)
+
+    def __repr__(self) -> str:
+        return repr(self.copy())
+
+
+class FlatNestDict(NestDict):
+    """A NestDict that keeps its leaves in a single dict keyed by path tuples.
+
+    Reading or writing a leaf is one hash lookup regardless of depth. Interior
+    nodes are not stored as dicts; a prefix index lists the child keys of each
+    one, and indexing an interior path returns a live FlatNestDict view of it.
+    Plain dicts and NestDicts assigned into the tree are split into leaves,
+    every other value is stored as a leaf.
+
+    Created with `NestDict(source, storage="flat")`.
+
+    Examples:
+
+    >>> nd = NestDict({'a': {'b': {'c': 1}}}, storage='flat')
+    >>> nd[['a', 'b', 'c']]
+    1
+    >>> nd['a']['b']['d'] = 2
+    >>> nd.flatten()
+    {('a', 'b', 'c'): 1, ('a', 'b', 'd'): 2}
+    """
+
+    storage = "flat"
+
+    def __init__(self, source: dict = {}, storage: str = "flat"):
+        node = _FlatNode(_FlatStore(), ())
+        for key, value in dict(source).items():
+            node[key] = value
+        super(NestDict, self).__setattr__("_data", node)
+
+    @classmethod
+    def _view(cls, store: _FlatStore, prefix: tuple) -> "FlatNestDict":
+        view = object.__new__(cls)
+        super(NestDict, view).__setattr__("_data", _FlatNode(store, prefix))
+        return view
+
+    def _walk(self, keys: Sequence, construct: bool = False) -> Any:
+        path = self._full(tuple(keys))
+        if construct:
+            self._data.store.ensure(path)
+        if not keys:
+            return self
+        return self._data.store.lookup(path)
+
+    def _full(self, keys: tuple) -> tuple:
+        prefix = self._data.prefix
+        return prefix + keys if prefix else keys
+
+    def __getitem__(self, nested_key: NestedKey) -> Any:
+        return self._data.store.lookup(self._full(_keys(nested_key)))
+
+    def __setitem__(self, nested_key: NestedKey, value: Any) -> None:
+        keys = _keys(nested_key)
+        if self._changes is not None:
+            self._changes.add(keys)
+        self._data.store.set(self._full(keys), value)
+
+    def __delitem__(self, nested_key: NestedKey) -> None:
+        keys = _keys(nested_key)
+        if self._changes is not None:
+            self._changes.add(keys)
+        self._data.store.delete(self._full(keys))
+
+    def __contains__(self, nested_key: NestedKey) -> bool:
+        try:
+            return self._data.store.contains(self._full(_keys(nested_key)))
+        except TypeError:
+            return False
+
+    def get(self, nested_path: str | NestPath, sep: str = "."):
+        try:
+            return self._data.store.lookup(self._full(self.path(nested_path, sep).keys))
+        except KeyError:
+            return None
+
+    def set(self, nested_path: str | NestPath, value: Any, sep: str = ".") -> None:
+        keys = self.path(nested_path, sep).keys
+        if self._changes is not None:
+            self._changes.add(keys)
+        self._data.store.set(self._full(keys), value)
+
+    def get_many(self, nested_paths: Sequence[str | list | NestPath], sep: str = ".") -> list:
+        results = []
+        for nested_path in nested_paths:
+            try:
+                results.append(self._data.store.lookup(self._full(self.path(nested_path, sep).keys)))
+            except (KeyError, TypeError):
+                results.append(None)
+        return results
+
+    def set_many(self, mapping: dict, sep: str = ".") -> None:
+        for nested_path, value in mapping.items():
+            keys = self.path(nested_path, sep).keys
+            if self._changes is not None:
+                self._changes.add(keys)
+            self._data.store.set(self._full(keys), value)
+
+    def iter_items(self, prefix: NestedKey | None = None, sep: str = ".") -> Iterator[tuple[tuple, Any]]:
+        store, base = self._data.store, self._data.prefix
+        keys = () if prefix is None else self.path(prefix, sep).keys
+        start = (*base, *keys)
+        leaves, children = store.leaves, store.children
+        if start not in children:
+            value = store.lookup(start)
+            if isinstance(value, MutableMapping):
+                yield from _iter_mapping(keys, value)
+            else:
+                yield keys, value
+            return
+
+        cut = len(base)
+        stack = [(start, iter(children[start]))]
+        while stack:
+            parent, child_keys = stack[-1]
+            for k in child_keys:
+                path = (*parent, k)
+                if path in children:
+                    stack.append((path, iter(children[path])))
+                    break
+                value = leaves[path]
+                if cut:
+                    path = path[cut:]
+                if isinstance(value, MutableMapping):
+                    yield from _iter_mapping(path, value)
+                else:
+                    yield path, value
+            else:
+                stack.pop()
+
+    def snapshot(self) -> "FlatNestDict":
+        """Take a snapshot of the tree.
+
+        Leaf values are shared, the path index is copied, so unlike the nested
+        storage this costs O(leaves).
+        """
+        return self.__copy__()
+
+    def __copy__(self) -> "FlatNestDict":
+        """Return a copy sharing the leaf values but not the index."""
+        return self._view(self._data.store.copy(self._data.prefix), ())
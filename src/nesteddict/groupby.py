@@ -0,0 +1,129 @@
+from typing import Callable, Sequence
+
+import numpy as np
+
+from .arraydict import ArrayDict
+
+
+def _sum(values: np.ndarray, starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    if values.dtype == bool:
+        values = values.astype(np.int64)
+    return np.add.reduceat(values, starts, axis=0)
+
+
+def _mean(values: np.ndarray, starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    return _sum(values, starts, counts) / counts.reshape(-1, *(1,) * (values.ndim - 1))
+
+
+def _min(values: np.ndarray, starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    return np.minimum.reduceat(values, starts, axis=0)
+
+
+def _max(values: np.ndarray, starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    return np.maximum.reduceat(values, starts, axis=0)
+
+
+def _count(values: np.ndarray, starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    return counts
+
+
+AGGREGATIONS: dict[str, Callable[[np.ndarray, np.ndarray, np.ndarray], np.ndarray]] = {
+    "sum": _sum,
+    "mean": _mean,
+    "min": _min,
+    "max": _max,
+    "count": _count,
+}
+
+
+class GroupBy:
+    """Rows of an ArrayDict grouped by the values of key columns.
+
+    The rows are sorted by the keys once, so every group is a contiguous
+    segment; aggregations are segment reductions such as `np.add.reduceat`,
+    one call per output column. Groups come out sorted by their keys.
+
+    Created by `ArrayDict.groupby`.
+
+    Examples:
+        >>> ad = ArrayDict({'mol': [1, 0, 1], 'q': [0.5, 1.0, -0.5]})
+        >>> result = ad.groupby('mol').agg({'q': ['sum', 'count']})
+        >>> result['mol'], result['q_sum'], result['q_count']
+        (array([0, 1]), array([1., 0.]), array([1, 2]))
+    """
+
+    def __init__(self, source: ArrayDict, keys: str | Sequence[str]):
+        self.source = source
+        self.keys = [keys] if isinstance(keys, str) else list(keys)
+        if not self.keys:
+            raise ValueError("groupby needs at least one key column.")
+
+        columns = [np.asarray(source[k]) for k in self.keys]
+        for key, column in zip(self.keys, columns):
+            if column.ndim != 1:
+                raise ValueError(f"Key column '{key}' must be 1-d.")
+        # lexsort sorts by its last key first; one key does not need a stable sort
+        self.order = np.lexsort(columns[::-1]) if len(columns) > 1 else np.argsort(columns[0])
+
+        sorted_keys = [column[self.order] for column in columns]
+        n = len(self.order)
+        boundary = np.zeros(n, dtype=bool)
+        boundary[:1] = True
+        for column in sorted_keys:
+            boundary[1:] |= column[1:] != column[:-1]
+        self.starts = np.flatnonzero(boundary)
+        self.counts = np.diff(np.append(self.starts, n))
+        self.unique = {k: column[self.starts] for k, column in zip(self.keys, sorted_keys)}
+        self._first_rows = None
+
+    @property
+    def first_rows(self) -> np.ndarray:
+        """The index of the first row of each group."""
+        if self._first_rows is None:
+            self._first_rows = np.minimum.reduceat(self.order, self.starts) if len(self.starts) else self.starts
+        return self._first_rows
+
+    def __len__(self) -> int:
+        """The number of groups."""
+        return len(self.starts)
+
+    def agg(self, spec: dict[str, str | Sequence[str]]) -> ArrayDict:
+        """Aggregate columns per group.
+
+        Args:
+            spec (dict[str, str | Sequence[str]]): For each column, one or more of 'sum', 'mean',
+                'min', 'max', 'count' and 'first'. A single function keeps the column name, a list
+                names the outputs '{column}_{function}'.
+
+        Raises:
+            ValueError: if a function is unknown.
+
+        Returns:
+            ArrayDict: The key columns with one row per group, and the aggregated columns.
+        """
+        result = dict(self.unique)
+        for column, funcs in spec.items():
+            names = [(funcs, column)] if isinstance(funcs, str) else [(f, f"{column}_{f}") for f in funcs]
+            for func, _ in names:
+                if func not in AGGREGATIONS and func != "first":
+                    raise ValueError(f"Unknown aggregation '{func}', expected one of {[*AGGREGATIONS, 'first']}.")
+
+            values = np.asarray(self.source[column])
+            if len(self.starts):
+                # one gather per column, shared by all of its reductions
+                ordered = None
+                for func, name in names:
+                    if func == "first":
+                        result[name] = np.take(values, self.first_rows, axis=0)
+                        continue
+                    if ordered is None:
+                        ordered = np.take(values, self.order, axis=0)
+                    result[name] = AGGREGATIONS[func](ordered, self.starts, self.counts)
+            else:
+                for func, name in names:
+                    if func == "count":
+                        result[name] = np.empty(0, dtype=np.int64)
+                    else:
+                        dtype = np.float64 if func == "mean" else values.dtype
+                        result[name] = np.empty((0, *values.shape[1:]), dtype=dtype)
+        return ArrayDict._wrap(result)
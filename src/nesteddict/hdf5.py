@@ -0,0 +1,377 @@
+import io
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Hashable, Iterable, Iterator
+
+import h5py
+import numpy as np
+
+from .arraydict import ArrayDict
+from .nestdict import NestDict
+
+CACHE_BYTES = 256 << 20  # bytes
+TYPE_ATTR = "nesteddict"
+_UNLOADED = object()
+
+
+@contextmanager
+def open_group(target: str | Path | io.BytesIO | h5py.Group, mode: str) -> Iterator[h5py.Group]:
+    """Yield `target` if it is already an open group, otherwise open it as a file."""
+    if isinstance(target, h5py.Group):
+        yield target
+    else:
+        with h5py.File(target, mode) as f:
+            yield f
+
+
+def write_dataset(
+    group: h5py.Group,
+    key: str,
+    value: Any,
+    chunks: bool | int | tuple | None = None,
+    compression: str | None = None,
+    compression_opts: Any = None,
+    resizable: bool = False,
+) -> h5py.Dataset:
+    """Create a dataset with optional chunking, compression and a growable first axis.
+
+    Scalars cannot be chunked, so they are always written as plain datasets.
+
+    Args:
+        group (h5py.Group): The group to create the dataset in.
+        key (str): The dataset name.
+        value (Any): The data.
+        chunks (bool|int|tuple|None): True for automatic chunking, an int for that many
+            rows per chunk, or an explicit chunk shape.
+        compression (str|None): A compression filter such as 'gzip' or 'lzf'.
+        compression_opts (Any): Options for the compression filter.
+        resizable (bool): Make the first axis unlimited so `append_dataset` can grow it.
+
+    Returns:
+        h5py.Dataset: The new dataset.
+    """
+    shape = np.shape(value)
+    if not shape:
+        return group.create_dataset(key, data=value)
+
+    kwargs = {}
+    if isinstance(chunks, int) and not isinstance(chunks, bool):
+        chunks = (max(chunks, 1), *(max(n, 1) for n in shape[1:]))
+    if chunks:
+        kwargs["chunks"] = chunks
+    if compression is not None:
+        kwargs["compression"] = compression
+        kwargs["compression_opts"] = compression_opts
+    if resizable:
+        kwargs["maxshape"] = (None, *shape[1:])
+    return group.create_dataset(key, data=value, **kwargs)
+
+
+def write_node(group: h5py.Group, key: str, value: Any, **options) -> None:
+    """Write a value as a dataset, or as a group if it is a mapping or has a `to_hdf5` method.
+
+    Args:
+        group (h5py.Group): The parent group.
+        key (str): The member name.
+        value (Any): The value.
+        **options: Passed to `write_dataset`.
+    """
+    if hasattr(value, "to_hdf5"):
+        value.to_hdf5(group.create_group(key), **options)
+    elif isinstance(value, dict):
+        subgroup = group.create_group(key)
+        for k, v in value.items():
+            write_node(subgroup, str(k), v, **options)
+    else:
+        write_dataset(group, key, value, **options)
+
+
+def write_changes(tree: NestDict, group: h5py.Group, paths: Iterable[tuple], **options) -> None:
+    """Rewrite the members at `paths` from `tree`, leaving the rest of the file untouched.
+
+    Paths that are no longer in the tree are deleted from the file.
+
+    Args:
+        tree (NestDict): The tree the file was written from.
+        group (h5py.Group): The group the tree was written to.
+        paths (Iterable[tuple]): The changed paths, see `NestDict.changes`.
+        **options: Passed to `write_dataset`.
+    """
+    for path in paths:
+        parent = group
+        for k in path[:-1]:
+            parent = parent.require_group(str(k))
+        name = str(path[-1])
+        if name in parent:
+            del parent[name]
+        try:
+            value = tree._walk(path)
+        except KeyError:
+            continue
+        write_node(parent, name, value, **options)
+
+
+def append_dataset(group: h5py.Group, key: str, value: Any, **options) -> h5py.Dataset:
+    """Append rows to a resizable dataset, creating it on the first call.
+
+    Scalars have no rows to append and overwrite the stored value instead.
+
+    Args:
+        group (h5py.Group): The group holding the dataset.
+        key (str): The dataset name.
+        value (Any): The rows to append.
+        **options: Passed to `write_dataset` when the dataset is created.
+
+    Raises:
+        ValueError: if the existing dataset cannot grow along its first axis.
+
+    Returns:
+        h5py.Dataset: The dataset.
+    """
+    if key not in group:
+        options.setdefault("chunks", True)
+        return write_dataset(group, key, value, resizable=True, **options)
+
+    dataset = group[key]
+    if not np.shape(value):
+        dataset[()] = value
+        return dataset
+    if not dataset.maxshape or dataset.maxshape[0] is not None:
+        raise ValueError(f"Dataset '{dataset.name}' is not resizable; write it with resizable=True.")
+    start = dataset.shape[0]
+    dataset.resize(start + len(value), axis=0)
+    dataset[start:] = value
+    return dataset
+
+
+class LeafCache:
+    """A least-recently-used cache of loaded datasets, bounded by their total size in bytes.
+
+    Values larger than the whole cache are returned without being kept.
+
+    Examples:
+        >>> cache = LeafCache(max_bytes=16)
+        >>> cache.get("a", lambda: np.zeros(1))
+        array([0.])
+        >>> _ = cache.get("b", lambda: np.zeros(2))
+        >>> "a" in cache, cache.nbytes
+        (False, 16)
+    """
+
+    def __init__(self, max_bytes: int = CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._items: OrderedDict[Hashable, Any] = OrderedDict()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        """Return the cached value of `key`, calling `load` on a miss."""
+        items = self._items
+        try:
+            items.move_to_end(key)
+            return items[key]
+        except KeyError:
+            pass
+
+        value = load()
+        size = getattr(value, "nbytes", 0)
+        if size > self.max_bytes:
+            return value
+        items[key] = value
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            _, evicted = items.popitem(last=False)
+            self.nbytes -= getattr(evicted, "nbytes", 0)
+        return value
+
+    def clear(self) -> None:
+        self._items.clear()
+        self.nbytes = 0
+
+
+default_cache = LeafCache()
+
+
+def read_dataset(dataset: h5py.Dataset, readonly: bool = False) -> Any:
+    """Read a whole dataset, decoding strings."""
+    if h5py.check_string_dtype(dataset.dtype) is not None:
+        dataset = dataset.asstr()
+    value = dataset[()]
+    if readonly and isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    return value
+
+
+def read_rows(dataset: h5py.Dataset, key: int | slice | np.ndarray) -> Any:
+    """Read the selected rows of a dataset with a hyperslab read.
+
+    h5py only accepts increasing, unique index arrays and positive steps, so
+    other selections read the covering unique rows and reorder them in memory.
+    """
+    n = dataset.shape[0]
+    if isinstance(key, slice):
+        start, stop, step = key.indices(n)
+        if step > 0:
+            return dataset[start:stop:step]
+        key = np.arange(start, stop, step)
+    elif not isinstance(key, np.ndarray):
+        return dataset[key]
+
+    if key.dtype == bool:
+        return dataset[key] if key.any() else dataset[:0]
+    key = np.where(key < 0, key + n, key)
+    rows, inverse = np.unique(key, return_inverse=True)
+    if not len(rows):
+        return dataset[:0]
+    return dataset[rows][inverse]
+
+
+class LazyGroup(MutableMapping):
+    """The `_data` of a lazily read NestDict: an HDF5 group whose members load on first access.
+
+    Subgroups become lazy NestDict (or ArrayDict) nodes once visited; datasets
+    are read through a `LeafCache` every time and never pinned, so resident
+    memory stays bounded by the cache. Assigned values live in memory only and
+    take precedence over the file. `file` is the file the tree owns and closes,
+    see `read_file`, or None when the caller opened it.
+    """
+
+    __slots__ = ("group", "cache", "entries", "file")
+
+    def __init__(self, group: h5py.Group, cache: LeafCache):
+        self.group = group
+        self.cache = cache
+        self.entries = dict.fromkeys(group, _UNLOADED)
+        self.file = None
+
+    def __getitem__(self, key: Any) -> Any:
+        value = self.entries[key]
+        if value is _UNLOADED:
+            member = self.group[key]
+            if isinstance(member, h5py.Group):
+                value = self.entries[key] = read_group(member, lazy=True, cache=self.cache)
+            else:
+                return self.cache.get(member.id, lambda: read_dataset(member, readonly=True))
+        return value
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self.entries[key] = value
+
+    def __delitem__(self, key: Any) -> None:
+        del self.entries[key]
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self.entries
+
+    def __iter__(self) -> Iterator:
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def keys(self):
+        return self.entries.keys()
+
+    def copy(self) -> "LazyGroup":
+        """A shallow copy that stays lazy: unloaded members are shared through the file and the cache."""
+        copy = object.__new__(type(self))
+        copy.group = self.group
+        copy.cache = self.cache
+        copy.entries = dict(self.entries)
+        copy.file = self.file
+        return copy
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.group.name!r}, {list(self.entries)!r})"
+
+
+class LazyColumns(LazyGroup):
+    """The `_data` of a lazily read ArrayDict: columns load on first access, row selections are read as hyperslabs."""
+
+    __slots__ = ()
+
+    @property
+    def length(self) -> int:
+        for key, value in self.entries.items():
+            return len(self.group[key] if value is _UNLOADED else value)
+        return 0
+
+    def rows(self, key: int | slice | np.ndarray) -> dict[str, Any]:
+        """Read the selected rows of every column, using cached columns when there are any."""
+        result = {}
+        for k, value in self.entries.items():
+            if value is _UNLOADED:
+                dataset = self.group[k]
+                if dataset.id in self.cache:
+                    value = self[k]
+                else:
+                    result[k] = read_rows(dataset, key)
+                    continue
+            result[k] = value[key]
+        return result
+
+
+def _cache(cache: LeafCache | int | None) -> LeafCache:
+    if cache is None:
+        return default_cache
+    if isinstance(cache, int):
+        return LeafCache(cache)
+    return cache
+
+
+def read_group(group: h5py.Group, lazy: bool = True, cache: LeafCache | int | None = None) -> NestDict | ArrayDict:
+    """Read a group written by `to_hdf5` as a NestDict, or an ArrayDict if it was written from one.
+
+    Args:
+        group (h5py.Group): The group to read.
+        lazy (bool): Load datasets on first access instead of now.
+        cache (LeafCache|int|None): The cache for lazily loaded datasets, or its size in
+            bytes for a private one. Defaults to a cache of `CACHE_BYTES` shared by all lazy trees.
+
+    Returns:
+        NestDict|ArrayDict: The tree.
+    """
+    if group.attrs.get(TYPE_ATTR) == "ArrayDict":
+        return read_arraydict(group, lazy, cache)
+    if lazy:
+        nd = object.__new__(NestDict)
+        super(NestDict, nd).__setattr__("_data", LazyGroup(group, _cache(cache)))
+        return nd
+    return NestDict({
+        key: read_group(member, lazy, cache) if isinstance(member, h5py.Group) else read_dataset(member)
+        for key, member in group.items()
+    })
+
+
+def read_arraydict(group: h5py.Group, lazy: bool = True, cache: LeafCache | int | None = None) -> ArrayDict:
+    """Read the datasets of a group as the columns of an ArrayDict, see `read_group`."""
+    if lazy:
+        ad = object.__new__(ArrayDict)
+        super(ArrayDict, ad).__setattr__("_data", LazyColumns(group, _cache(cache)))
+        return ad
+    return ArrayDict._wrap({key: np.asarray(read_dataset(member)) for key, member in group.items()})
+
+
+def read_file(path: str | Path | io.BytesIO, read: Callable, cache: LeafCache | int | None = None) -> NestDict | ArrayDict:
+    """Open an HDF5 file and read it lazily with `read_group` or `read_arraydict`, handing the file to the tree.
+
+    The tree, and every snapshot or copy of it, keeps the file open until its
+    `close` is called.
+    """
+    tree = read(h5py.File(path, "r"), True, cache)
+    tree._data.file = tree._data.group.file
+    return tree
+
+
+def close(tree: NestDict | ArrayDict) -> None:
+    """Close the file a lazy tree owns, see `read_file`. Other trees are left alone."""
+    file = getattr(tree._data, "file", None)
+    if file is not None:
+        file.close()
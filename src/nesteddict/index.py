@@ -0,0 +1,164 @@
+from typing import Any
+
+import numpy as np
+
+from .arraydict import ArrayDict
+
+
+def _expand(order: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """Concatenate `order[lo[i]:hi[i]]` for every i without a Python loop."""
+    counts = hi - lo
+    if (counts == 1).all():
+        return order[lo]
+    total = counts.sum()
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return order[np.repeat(lo, counts) + offsets]
+
+
+def _missing(keys: Any) -> KeyError:
+    return KeyError(f"Keys not in the index: {keys}")
+
+
+class SortedIndex:
+    """Row positions of a column sorted by value; lookups are binary searches.
+
+    Scalars and arrays of keys cost O(log n) per key, ranges O(log n) plus
+    the rows they return.
+    """
+
+    kind = "sorted"
+
+    def __init__(self, values: np.ndarray):
+        self.values = values
+        self.order = np.argsort(values, kind="stable")
+        self.keys = values[self.order]
+        self.table = None
+
+    def _use_table(self, keys: np.ndarray) -> bool:
+        """Whether to look up `keys` by address in a table of the start of each int value.
+
+        The table covers the range of the index, and is built once a batch has
+        at least as many keys as that range, if it is dense enough.
+        """
+        if np.result_type(keys, self.keys).kind != "i" or not len(self.keys):
+            return False
+        if self.table is None:
+            first, last = int(self.keys[0]), int(self.keys[-1])
+            span = last - first + 1
+            if span > len(keys) or span > 8 * len(self.keys):
+                return False
+            table = np.empty(span + 2, dtype=np.intp)
+            table[:-1] = np.searchsorted(self.keys, np.arange(first, last + 2))
+            table[-1] = len(self.keys)
+            self.table = table
+        return True
+
+    def bounds(self, keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """The start and stop in `order` of the rows holding each of `keys`; equal where a key is missing."""
+        if self._use_table(keys):
+            first, span = int(self.keys[0]), len(self.table) - 2
+            slot = keys.astype(np.int64) - first
+            # keys out of the range share the empty slot past the last value
+            slot[(slot < 0) | (slot >= span)] = span
+            return self.table[slot], self.table[slot + 1]
+
+        # searching the keys in sorted order keeps the binary searches in cache
+        by_key = np.argsort(keys)
+        needles = keys[by_key]
+        lo = np.empty(len(keys), dtype=np.intp)
+        hi = np.empty(len(keys), dtype=np.intp)
+        lo[by_key] = np.searchsorted(self.keys, needles, "left")
+        hi[by_key] = np.searchsorted(self.keys, needles, "right")
+        return lo, hi
+
+    def rows(self, key: Any) -> np.ndarray:
+        """The positions of the rows whose value is `key`, a sequence of keys, or in a `start:stop` range."""
+        keys = self.keys
+        if isinstance(key, slice):
+            lo = 0 if key.start is None else np.searchsorted(keys, key.start, "left")
+            hi = len(keys) if key.stop is None else np.searchsorted(keys, key.stop, "right")
+            return self.order[lo:hi]
+
+        if np.ndim(key) == 0:
+            lo = np.searchsorted(keys, key, "left")
+            hi = np.searchsorted(keys, key, "right")
+            if lo == hi:
+                raise KeyError(key)
+            return self.order[lo:hi]
+
+        lo, hi = self.bounds(np.asarray(key))
+        if (lo == hi).any():
+            raise _missing(np.asarray(key)[lo == hi])
+        return _expand(self.order, lo, hi)
+
+
+class HashIndex:
+    """Row positions of a column in a dict keyed by value; lookups cost O(1) per key.
+
+    Ranges are answered with a scan of the column.
+    """
+
+    kind = "hash"
+
+    def __init__(self, values: np.ndarray):
+        self.values = values
+        self.order = np.argsort(values, kind="stable")
+        ordered = values[self.order]
+        boundary = np.ones(len(ordered), dtype=bool)
+        boundary[1:] = ordered[1:] != ordered[:-1]
+        starts = np.flatnonzero(boundary)
+        stops = np.append(starts[1:], len(ordered))
+        self.unique = len(starts) == len(ordered)
+        if self.unique:
+            # no duplicates: map each key straight to its row
+            self.slots = dict(zip(values.tolist(), range(len(values))))
+        else:
+            self.slots = dict(zip(ordered[starts].tolist(), zip(starts.tolist(), stops.tolist())))
+
+    def rows(self, key: Any) -> np.ndarray:
+        """The positions of the rows whose value is `key`, a sequence of keys, or in a `start:stop` range."""
+        if isinstance(key, slice):
+            mask = np.ones(len(self.values), dtype=bool)
+            if key.start is not None:
+                mask &= self.values >= key.start
+            if key.stop is not None:
+                mask &= self.values <= key.stop
+            rows = np.flatnonzero(mask)
+            return rows[np.argsort(self.values[rows], kind="stable")]
+
+        slots = self.slots
+        scalar = np.ndim(key) == 0
+        keys = [key] if scalar else np.asarray(key).tolist()
+        try:
+            found = [slots[k] for k in keys]
+        except KeyError as e:
+            raise (e if scalar else _missing(e.args[0])) from None
+        if self.unique:
+            return np.array(found, dtype=np.intp)
+        lo, hi = np.array(found, dtype=np.intp).reshape(-1, 2).T
+        return _expand(self.order, lo, hi)
+
+
+INDEXES = {"sorted": SortedIndex, "hash": HashIndex}
+
+
+class Loc:
+    """Row selection by the values of the indexed column, see `ArrayDict.set_index`."""
+
+    __slots__ = ("source",)
+
+    def __init__(self, source: ArrayDict):
+        self.source = source
+
+    def __getitem__(self, key: Any) -> ArrayDict:
+        """Select the rows whose index value is `key`, one of a sequence of keys, or within an inclusive `start:stop` range.
+
+        Rows come out in the order of the keys; a key held by several rows
+        yields all of them.
+
+        Raises:
+            KeyError: if a key is not in the index.
+        """
+        source = self.source
+        rows = source._get_index().rows(key)
+        return ArrayDict._wrap({k: np.take(v, rows, axis=0) for k, v in source.items()})
@@ -0,0 +1,110 @@
+from typing import Any, Sequence
+
+import numpy as np
+
+from .arraydict import ArrayDict
+from .index import SortedIndex, _expand
+
+HOW = ("inner", "left")
+
+
+def _codes(left: list[np.ndarray], right: list[np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+    """Replace several key columns by one int column with equal codes for equal key tuples."""
+    n = len(left[0])
+    codes = None
+    for lkey, rkey in zip(left, right):
+        unique, inverse = np.unique(np.concatenate([lkey, rkey]), return_inverse=True)
+        if codes is None:
+            codes = inverse
+        else:
+            # renumber after each key so the combined codes cannot overflow
+            codes = np.unique(codes * len(unique) + inverse, return_inverse=True)[1]
+    codes = codes.reshape(-1)
+    return codes[:n], codes[n:]
+
+
+def _fill(dtype: np.dtype, fill_value: Any) -> tuple[Any, np.dtype]:
+    """The value for rows without a match and the dtype that can hold it."""
+    if fill_value is not None:
+        return fill_value, dtype
+    if dtype.kind in "fc":
+        return np.nan, dtype
+    if dtype.kind in "US":
+        return "", dtype
+    if dtype.kind in "mM":
+        return np.datetime64("NaT") if dtype.kind == "M" else np.timedelta64("NaT"), dtype
+    if dtype.kind == "O":
+        return None, dtype
+    # like CSV columns with missing values, int and bool columns become float
+    return np.nan, np.dtype(np.float64)
+
+
+def _take(values: np.ndarray, rows: np.ndarray, missing: np.ndarray | None, fill_value: Any) -> np.ndarray:
+    if missing is None or not missing.any():
+        return np.take(values, rows, axis=0)
+    fill, dtype = _fill(values.dtype, fill_value)
+    if len(values):
+        out = np.take(values, rows, axis=0).astype(dtype, copy=False)
+    else:
+        out = np.empty((len(rows), *values.shape[1:]), dtype=dtype)
+    out[missing] = fill
+    return out
+
+
+def merge(
+    left: ArrayDict,
+    right: ArrayDict,
+    on: str | Sequence[str],
+    how: str = "inner",
+    suffixes: tuple[str, str] = ("_x", "_y"),
+    fill_value: Any = None,
+) -> ArrayDict:
+    """Join the rows of two ArrayDicts on equal values of key columns, see `ArrayDict.merge`."""
+    if how not in HOW:
+        raise ValueError(f"Unknown join '{how}', expected one of {list(HOW)}.")
+    on = [on] if isinstance(on, str) else list(on)
+    if not on:
+        raise ValueError("merge needs at least one key column.")
+    lkeys, rkeys = [], []
+    for key in on:
+        for side, keys in ((left, lkeys), (right, rkeys)):
+            column = np.asarray(side[key])
+            if column.ndim != 1:
+                raise ValueError(f"Key column '{key}' must be 1-d.")
+            keys.append(column)
+
+    if len(on) == 1:
+        lkey = lkeys[0]
+        # reuse the sorted index of the right side if it has one on the key
+        if right._index is not None and right._index[:2] == (on[0], "sorted"):
+            index = right._get_index()
+        else:
+            index = SortedIndex(rkeys[0])
+    else:
+        lkey, rkey = _codes(lkeys, rkeys)
+        index = SortedIndex(rkey)
+
+    # sort-merge: every left key is matched to its run of rows in the sorted right keys
+    lo, hi = index.bounds(lkey)
+    counts = hi - lo
+    missing = None
+    if how == "left":
+        unmatched = counts == 0
+        if unmatched.any():
+            lo = np.where(unmatched, 0, lo)
+            counts = np.maximum(counts, 1)
+            hi = lo + counts
+            missing = np.repeat(unmatched, counts)
+    left_rows = np.repeat(np.arange(len(lkey)), counts)
+    right_rows = _expand(index.order, lo, hi) if len(index.order) else np.zeros(len(left_rows), dtype=np.intp)
+
+    result = {}
+    for k, v in left.items():
+        name = k + suffixes[0] if k not in on and k in right.keys() else k
+        result[name] = np.take(v, left_rows, axis=0)
+    for k, v in right.items():
+        if k in on:
+            continue
+        name = k + suffixes[1] if k in left.keys() else k
+        result[name] = _take(np.asarray(v), right_rows, missing, fill_value)
+    return ArrayDict._wrap(result)
@@ -1,28 +1,74 @@
 import operator
 from functools import reduce
+from itertools import chain
 from typing import Any, Iterator, Callable, Sequence, Union
 import numpy as np
 from .arraydict import ArrayDict
+from .parallel import concatenate_jobs, parallel_map
+from .path import NestPath, compile_path, path_trie
 
-NestedKey = str | list[str]  # type_check_only
+NestedKey = str | list[str] | NestPath  # type_check_only
 dictlike = Union[dict, "NestDict"]
 
 from collections.abc import MutableMapping
 
 
+def _iter_mapping(parent_key: tuple, node: MutableMapping) -> Iterator[tuple[tuple, Any]]:
+    """Depth-first walk over the leaves of a mapping with an explicit stack."""
+    stack = [(parent_key, iter(node.items()))]
+    while stack:
+        parent_key, items = stack[-1]
+        for k, v in items:
+            if isinstance(v, MutableMapping):
+                stack.append(((*parent_key, k), iter(v.items())))
+                break
+            yield (*parent_key, k), v
+        else:
+            stack.pop()
+
+
 class NestDict(MutableMapping):
 
-    def __init__(self, source: dict = {}):
+    storage = "nested"
+    _owned = None
+    _changes = None
+    _digests = None
+
+    def __new__(cls, source: dict = {}, storage: str = "nested"):
+        if storage == "flat" and cls is NestDict:
+            from .flatdict import FlatNestDict
+
+            cls = FlatNestDict
+        elif storage not in ("nested", "flat"):
+            raise ValueError(f"Unknown storage '{storage}', expected 'nested' or 'flat'.")
+        return super().__new__(cls)
+
+    def __init__(self, source: dict = {}, storage: str = "nested"):
         """Initializes a NestDict with or without a source dictionary.
 
         Args:
             source (dict, optional): Source dictionary. Defaults to None.
+            storage (str, optional): 'nested' keeps a tree of dicts; 'flat' keeps leaves
+                in one dict keyed by path tuples, see `FlatNestDict`. Defaults to 'nested'.
+
+        Interior nodes read with `nd[key]`, `get`, `get_many`, `values` or
+        `items` depend on the storage. With 'nested' storage they are the
+        stored nodes, plain dicts for a tree built from dicts, or copy-on-write
+        NestDict views of them after `snapshot`. With 'flat' storage they are
+        always live FlatNestDict views. All of them are mutable mappings whose
+        writes change the tree; call `.copy()` on a node for a plain dict
+        that does not, whatever the storage.
 
         Raises:
             TypeError: source must be a dict
 
         Examples:
 
+        >>> type(NestDict({'a': {'b': 1}})['a']).__name__
+        'dict'
+        >>> node = NestDict({'a': {'b': 1}}, storage='flat')['a']
+        >>> type(node).__name__, type(node.copy()).__name__
+        ('FlatNestDict', 'dict')
         >>> nd = NestDict()
         >>> len(nd)
         0
@@ -36,22 +82,48 @@ class NestDict(MutableMapping):
         """
         super().__setattr__("_data", dict(source))
 
+    @staticmethod
+    def path(nested_path: str | list | NestPath, sep: str = ".") -> NestPath:
+        """Compile a nested path once so it can be reused without parsing.
+
+        String paths are cached, so repeated calls with the same path return
+        the same NestPath object.
+
+        Args:
+            nested_path (str | list | NestPath): The nested path.
+            sep (str, optional): Defaults to '.'.
+
+        Returns:
+            NestPath: The compiled path.
+
+        Examples:
+            >>> nd = NestDict({'a': {'b': {'c': 1}}})
+            >>> path = NestDict.path('a.b.c')
+            >>> nd[path]
+            1
+        """
+        if isinstance(nested_path, NestPath):
+            return nested_path
+        if isinstance(nested_path, str):
+            return compile_path(nested_path, sep)
+        return NestPath(nested_path)
+
     @classmethod
     def _construct(cls, data, nested_key: NestedKey):
-        """_construct_path is a recursive function that constructs a nested path in a dictionary.
+        """_construct_path constructs a nested path in a dictionary.
 
         Args:
             data (dict): The dictionary to construct the path in.
             nested_key (NestedKey): The nested path to construct.
 
         Returns:
-            dict: The constructed dictionary.
+            dict: The innermost constructed dictionary.
         """
-        if nested_key:
-            key = nested_key[0]
+        for key in nested_key:
             if key not in data:
                 data[key] = cls()
-            return NestDict._construct(data[key], nested_key[1:])
+            data = data[key]
+        return data
 
     def _traverse(self, nested_key: NestedKey, construct: bool = False) -> Any:
         """Traverses a nested path in a dictionary.
@@ -66,24 +138,210 @@ class NestDict(MutableMapping):
         Returns:
             Any: The value at the end of the nested path.
         """
+        if isinstance(nested_key, NestPath):
+            return self._walk(nested_key.keys, construct)
+        if isinstance(nested_key, list):
+            return self._walk(nested_key, construct)
+        return self._data[nested_key]
+
+    def _walk(self, keys: Sequence, construct: bool = False) -> Any:
+        """Walks a sequence of keys from the root.
+
+        Args:
+            keys (Sequence): The keys to walk, outermost first.
+            construct (bool, optional): if create new container . Defaults to False.
+
+        Returns:
+            Any: The value at the end of the keys.
+        """
         if construct:
-            self._construct(self._data, nested_key)
+            self._construct(self._data, keys)
+        return reduce(operator.getitem, keys, self._data)
 
+    @staticmethod
+    def _key_seq(nested_key: NestedKey) -> Sequence:
+        if isinstance(nested_key, NestPath):
+            return nested_key.keys
         if isinstance(nested_key, list):
-            return reduce(operator.getitem, nested_key, self._data)
-        return self._data[nested_key]
+            return nested_key
+        return (nested_key,)
+
+    def snapshot(self) -> "NestDict":
+        """Take an O(1) copy-on-write snapshot of the tree.
+
+        The snapshot and this NestDict share every node. A write through either
+        one copies only the containers on the path to the written key, so all
+        untouched subtrees and all leaf values stay shared. Plain dict nodes
+        handed out by `__getitem__`, `get`, `values` or `items` come as
+        copy-on-write NestDict views, so writing through them copies only the
+        path below them too; leaf values such as arrays are never copied and
+        must not be modified in place.
+
+        Returns:
+            NestDict: The snapshot.
+
+        Examples:
+            >>> nd = NestDict({'a': {'b': 1}, 'c': {'d': 2}})
+            >>> snap = nd.snapshot()
+            >>> nd[['a', 'b']] = 10
+            >>> snap[['a', 'b']]
+            1
+            >>> nd['c']['d'] = 3
+            >>> snap[['c', 'd']], nd._data['a'] is snap._data['a']
+            (2, False)
+        """
+        snap = object.__new__(type(self))
+        super(NestDict, snap).__setattr__("_data", self._data)
+        super(NestDict, snap).__setattr__("_owned", {})
+        if self._owned is None:
+            super().__setattr__("_owned", {})
+        else:
+            # views of this tree share the registry and must stop writing in place too
+            self._owned.clear()
+        return snap
+
+    def _cow_copy(self, node: Any) -> Any:
+        """Copy a shared container for a copy-on-write tree, shallowly.
+
+        NestDict nodes become copy-on-write themselves, so their children stay
+        shared until written. Other mappings keep their type, so a lazily read
+        HDF5 group is not loaded.
+        """
+        if isinstance(node, NestDict):
+            node = node.__copy__()
+            if node.storage == "nested":
+                super(NestDict, node).__setattr__("_owned", {id(node._data): node._data})
+            return node
+        return node.copy()
+
+    def _cow_view(self, node: Any) -> Any:
+        """Hand out an owned node of a copy-on-write tree.
+
+        A plain dict cannot intercept writes, so it is wrapped in a NestDict
+        that shares the ownership registry of this one: its writes copy only
+        the shared nodes on their path, in place in this tree.
+        """
+        if not isinstance(node, dict):
+            return node
+        view = object.__new__(type(self))
+        super(NestDict, view).__setattr__("_data", node)
+        super(NestDict, view).__setattr__("_owned", self._owned)
+        return view
+
+    def _own(self, keys: Sequence, construct: bool = False) -> Any:
+        """Walks keys like `_walk`, copying every shared container on the way.
+
+        Only used once `snapshot` has been called. The returned node is owned by
+        this NestDict alone and can be written to.
+        """
+        owned = self._owned
+        node = self._data
+        if id(node) not in owned:
+            node = self._cow_copy(node)
+            super().__setattr__("_data", node)
+            owned[id(node)] = node
+
+        for key in keys:
+            node = self._own_child(node, key, construct)
+        return node
+
+    def _own_child(self, node: Any, key: Any, construct: bool = False) -> Any:
+        """One step of `_own`: make `node[key]` owned if it is a shared container."""
+        owned = self._owned
+        if construct and key not in node:
+            child = node[key] = type(self)()
+        else:
+            child = node[key]
+            if id(child) in owned or not isinstance(child, (dict, NestDict)):
+                return child
+            child = node[key] = self._cow_copy(child)
+        owned[id(child)] = child
+        return child
+
+    def track_changes(self, enabled: bool = True) -> None:
+        """Start or stop recording the paths written through this NestDict.
+
+        `__setitem__`, `set`, `set_many`, `__delitem__`, `update`, `clear` and
+        `concat` called on this NestDict record the path they change. Writes
+        made directly on a child node are not seen.
+
+        Args:
+            enabled (bool, optional): Defaults to True.
+
+        Examples:
+            >>> nd = NestDict({'a': {'b': 1}, 'c': 2})
+            >>> nd.track_changes()
+            >>> nd.set('a.b', 3)
+            >>> del nd['c']
+            >>> sorted(nd.changes())
+            [('a', 'b'), ('c',)]
+        """
+        super().__setattr__("_changes", set() if enabled else None)
+
+    def changes(self) -> set[tuple]:
+        """The paths changed since tracking started or `clear_changes` was called.
+
+        Paths below another changed path are left out, so each changed subtree
+        is reported once.
+
+        Returns:
+            set[tuple]: The changed paths, each a tuple of keys.
+        """
+        changed = set()
+        for path in sorted(self._changes or (), key=len):
+            if not any(path[:i] in changed for i in range(1, len(path))):
+                changed.add(path)
+        return changed
+
+    def clear_changes(self) -> None:
+        """Forget the recorded changes, e.g. after they have been persisted."""
+        if self._changes is not None:
+            self._changes.clear()
 
     def __bool__(self) -> bool:
         return bool(self._data)
 
     def __eq__(self, other: Any) -> bool:
-        return self._data == other
+        """Compare with another NestDict or dict, stopping at the first difference.
 
-    def flatten(self) -> dict:
-        """get a python dict with a flat structure. The key is the nested key joined by the separator.
+        Shared subtrees, as after `snapshot`, are equal without being visited;
+        array leaves are compared with `np.array_equal`.
+        """
+        from .fingerprint import tree_equal
 
-        Args:
-            separator (str, optional): separator of nested key. Defaults to ".".
+        return tree_equal(self, other)
+
+    def fingerprint(self) -> str:
+        """A Merkle hash of the tree: leaves are hashed, and each node hashes the digests of its children.
+
+        Array leaves are hashed from their buffers. The digests of read-only
+        arrays are cached by path, so the next call only hashes read-only
+        arrays that were replaced or added, wherever in the tree that happened;
+        writeable arrays may have been written in place and are hashed on every
+        call. ArrayDict leaves cache their own, see `ArrayDict.fingerprint`. Equal trees have equal fingerprints whatever the insertion
+        order or the storage, and a NestDict has the fingerprint of the same
+        nested dict.
+
+        Returns:
+            str: The hex digest.
+
+        Examples:
+            >>> nd = NestDict({'a': {'b': np.arange(3)}, 'c': 'label'})
+            >>> nd.fingerprint() == NestDict({'c': 'label', 'a': {'b': np.arange(3)}}).fingerprint()
+            True
+            >>> nd.set('a.b', np.arange(4))
+            >>> nd.fingerprint() == NestDict({'c': 'label', 'a': {'b': np.arange(3)}}).fingerprint()
+            False
+        """
+        from .fingerprint import tree_digest
+
+        visited = {}
+        root = tree_digest(self._data, self._digests or {}, visited)
+        super().__setattr__("_digests", visited)
+        return root.hex()
+
+    def flatten(self) -> dict:
+        """get a python dict with a flat structure. The key is the nested key as a tuple.
 
         Returns:
             dict: a python dict with a flat structure.
@@ -92,60 +350,145 @@ class NestDict(MutableMapping):
             >>> NestDict({'a': {'b': {'c': 1}}}).flatten()
             {('a', 'b', 'c'): 1}
         """
+        return dict(self.iter_items())
 
-        def _flatten(data, parent_key: list[str] = []):
-            items = []
-            for k, v in data.items():
-                new_key = [*parent_key, k]
-                if isinstance(v, MutableMapping):
-                    items.extend(_flatten(v, new_key))
-                else:
-                    items.append((tuple(new_key), v))
-            return items
+    def iter_items(self, prefix: NestedKey | None = None, sep: str = ".") -> Iterator[tuple[tuple, Any]]:
+        """Lazily iterate over the leaves below a prefix.
+
+        The tree is walked depth-first with an explicit stack, so deep trees do
+        not hit the recursion limit and no intermediate lists are built.
+
+        Args:
+            prefix (NestedKey, optional): Only yield leaves below this path. Defaults to the root.
+            sep (str, optional): Separator for a string prefix. Defaults to '.'.
 
-        flat_dict = dict(_flatten(self._data, []))
-        return flat_dict
+        Yields:
+            tuple[tuple, Any]: The full path of each leaf and its value.
+
+        Examples:
+            >>> nd = NestDict({'a': {'b': 1, 'c': {'d': 2}}, 'e': 3})
+            >>> list(nd.iter_items())
+            [(('a', 'b'), 1), (('a', 'c', 'd'), 2), (('e',), 3)]
+            >>> list(nd.iter_items('a.c'))
+            [(('a', 'c', 'd'), 2)]
+        """
+        if prefix is None:
+            parent_key, node = (), self._data
+        else:
+            parent_key = self.path(prefix, sep).keys
+            node = self._walk(parent_key)
+            if not isinstance(node, MutableMapping):
+                yield parent_key, node
+                return
+        yield from _iter_mapping(parent_key, node)
+
+    def iter_leaves(self) -> Iterator[Any]:
+        """Lazily iterate over the leaf values of the tree.
+
+        Examples:
+            >>> list(NestDict({'a': {'b': 1, 'c': {'d': 2}}, 'e': 3}).iter_leaves())
+            [1, 2, 3]
+        """
+        for _, value in self.iter_items():
+            yield value
+
+    @classmethod
+    def unflatten(cls, flat: dict, sep: str | None = ".") -> "NestDict":
+        """Build a NestDict from a flat dict in one pass. The inverse of `flatten`.
+
+        Args:
+            flat (dict): Leaves keyed by tuple paths or separated strings.
+            sep (str | None, optional): Separator of string keys. None keeps them whole. Defaults to '.'.
+
+        Returns:
+            NestDict: The nested dict.
+
+        Examples:
+            >>> NestDict.unflatten({('a', 'b'): 1, 'a.c': 2})
+            <{'a': {'b': 1, 'c': 2}}>
+        """
+        root = {}
+        for key, value in flat.items():
+            if isinstance(key, tuple):
+                keys = key
+            elif isinstance(key, str) and sep is not None:
+                keys = compile_path(key, sep).keys
+            else:
+                keys = (key,)
+            node = root
+            for k in keys[:-1]:
+                child = node.get(k)
+                if child is None:
+                    child = node[k] = {}
+                node = child
+            node[keys[-1]] = value
+        return cls(root)
 
     def __getitem__(self, nested_key: NestedKey) -> Any:
         item = self._traverse(nested_key)
+        if self._owned is not None and isinstance(item, (dict, NestDict)):
+            item = self._cow_view(self._own(self._key_seq(nested_key)))
         return item
 
     def __delitem__(self, nested_key: NestedKey) -> None:
-        if isinstance(nested_key, list):
+        if self._changes is not None:
+            self._changes.add(tuple(self._key_seq(nested_key)))
+        if self._owned is not None:
+            keys = self._key_seq(nested_key)
+            self._walk(keys)
+            del self._own(keys[:-1])[keys[-1]]
+        elif isinstance(nested_key, NestPath):
+            parent = self._walk(nested_key.parent)
+            del parent[nested_key.leaf]
+        elif isinstance(nested_key, list):
             parent = self._traverse(nested_key[:-1])
             del parent[nested_key[-1]]
         else:
             del self._data[nested_key]
 
     def __setitem__(self, nested_key: NestedKey, value: Any) -> None:
-        if isinstance(nested_key, list):
+        if self._changes is not None:
+            self._changes.add(tuple(self._key_seq(nested_key)))
+        if self._owned is not None:
+            keys = self._key_seq(nested_key)
+            self._own(keys[:-1], construct=True)[keys[-1]] = value
+        elif isinstance(nested_key, NestPath):
+            parent = self._walk(nested_key.parent, construct=True)
+            parent[nested_key.leaf] = value
+        elif isinstance(nested_key, list):
             dest_key = nested_key[-1]
             parent = self._traverse(nested_key[:-1], construct=True)
             parent[dest_key] = value
         else:
             self._data[nested_key] = value
 
-    def get(self, nested_path: str, sep: str = "."):
+    def get(self, nested_path: str | NestPath, sep: str = "."):
         """get a value from a nested path in a dictionary.
 
         Args:
-            nested_path (str): The nested path to traverse.
+            nested_path (str | NestPath): The nested path to traverse.
             sep (str, optional): Defaults to '.'.
 
         Returns:
-            Any: The value at the end of the nested path.
+            Any: The value at the end of the nested path, None where the path is missing or
+                passes through a leaf.
 
         Examples:
             >>> nd = NestDict({'a': {'b': {'c': 1}}})
             >>> nd.get('a.b.c')
             1
+            >>> nd.get('a.b.c.d') is None
+            True
 
         """
-        path = nested_path.split(sep)
+        path = self.path(nested_path, sep)
         try:
-            return self._traverse(path)
-        except KeyError:
+            value = self._walk(path.keys)
+        except (KeyError, TypeError, IndexError):
             return None
+        if self._owned is not None and isinstance(value, (dict, NestDict)):
+            value = self._cow_view(self._own(path.keys))
+        return value
 
     def __contains__(self, nested_key: NestedKey) -> bool:
         try:
@@ -161,13 +504,13 @@ class NestDict(MutableMapping):
         return len(self._data)
 
     def __ne__(self, other: Any) -> bool:
-        return self._data != other
+        return not self == other
 
-    def set(self, nested_path: str, value: Any, sep: str = ".") -> None:
+    def set(self, nested_path: str | NestPath, value: Any, sep: str = ".") -> None:
         """set a value at a nested path in a dictionary.
 
         Args:
-            nested_path (str): The nested path to traverse.
+            nested_path (str | NestPath): The nested path to traverse.
             value (Any): The value to set.
             sep (str, optional): Defaults to '.'.
 
@@ -180,8 +523,94 @@ class NestDict(MutableMapping):
             >>> nd[['a', 'b', 'c']]
             2
         """
-        path = nested_path.split(sep)
-        self._traverse(path[:-1], construct=True)[path[-1]] = value
+        path = self.path(nested_path, sep)
+        if self._changes is not None:
+            self._changes.add(path.keys)
+        if self._owned is not None:
+            self._own(path.parent, construct=True)[path.leaf] = value
+        else:
+            self._walk(path.parent, construct=True)[path.leaf] = value
+
+    def get_many(self, nested_paths: Sequence[str | list | NestPath], sep: str = ".") -> list:
+        """get values from many nested paths, walking each shared prefix once.
+
+        Args:
+            nested_paths (Sequence[str | list | NestPath]): The nested paths to traverse.
+            sep (str, optional): Defaults to '.'.
+
+        Returns:
+            list: The values in the order of `nested_paths`, None where a path is missing or
+                passes through a leaf.
+
+        Examples:
+            >>> nd = NestDict({'a': {'b': {'c': 1, 'd': 2}}})
+            >>> nd.get_many(['a.b.c', 'a.b.d', 'a.x', 'a.b.c.e'])
+            [1, 2, None, None]
+        """
+        results = [None] * len(nested_paths)
+        stack = [(self._data, path_trie(nested_paths, sep))]
+        while stack:
+            data, trie = stack.pop()
+            for key, (children, indices) in trie.items():
+                try:
+                    value = data[key]
+                except (KeyError, TypeError, IndexError):
+                    continue
+                for i in indices:
+                    results[i] = value
+                if children:
+                    stack.append((value, children))
+
+        if self._owned is not None:
+            for i, value in enumerate(results):
+                if isinstance(value, (dict, NestDict)):
+                    results[i] = self._cow_view(self._own(self.path(nested_paths[i], sep).keys))
+        return results
+
+    def set_many(self, mapping: dict, sep: str = ".") -> None:
+        """set values at many nested paths, walking each shared prefix once.
+
+        The result is that of calling `set` for each item in order: when a
+        path is a prefix of another, the later write wins.
+
+        Args:
+            mapping (dict): Nested paths and the values to set at them.
+            sep (str, optional): Defaults to '.'.
+
+        Examples:
+            >>> nd = NestDict()
+            >>> nd.set_many({'a.b.c': 1, 'a.b.d': 2})
+            >>> nd[['a', 'b', 'd']]
+            2
+            >>> nd.set_many({'a.b.c': 3, 'a': 5})
+            >>> nd['a']
+            5
+        """
+        trie = path_trie(list(mapping), sep)
+        if _nested_writes(trie):
+            # writes below another write depend on their order, apply them one by one
+            for nested_path, value in mapping.items():
+                self.set(nested_path, value, sep)
+            return
+
+        if self._changes is not None:
+            self._changes.update(self.path(nested_path, sep).keys for nested_path in mapping)
+        values = list(mapping.values())
+        root = self._data if self._owned is None else self._own(())
+        stack = [(root, trie)]
+        while stack:
+            data, trie = stack.pop()
+            for key, (children, indices) in trie.items():
+                if indices:
+                    data[key] = values[indices[-1]]
+                if children:
+                    if self._owned is not None:
+                        child = self._own_child(data, key, construct=True)
+                    else:
+                        if key not in data:
+                            data[key] = type(self)()
+                        child = data[key]
+                    stack.append((child, children))
 
     def __str__(self) -> str:
         return f"<{str(self._data)}>"
@@ -190,6 +619,10 @@ class NestDict(MutableMapping):
         return f"<{repr(self._data)}>"
 
     def clear(self) -> None:
+        if self._changes is not None:
+            self._changes.update((k,) for k in self._data)
+        if self._owned is not None:
+            return self._own(()).clear()
         return self._data.clear()
 
     def copy(self) -> dict:
@@ -199,99 +632,353 @@ class NestDict(MutableMapping):
         return self._data.keys()
 
     def values(self):
+        if self._owned is not None:
+            return self._own_all().values()
         return self._data.values()
 
     def items(self):
+        if self._owned is not None:
+            return self._own_all().items()
         return self._data.items()
 
+    def _own_all(self) -> dict:
+        """The children of a copy-on-write root, owned, with dict nodes as views."""
+        data = self._own(())
+        return {key: self._cow_view(self._own_child(data, key)) for key in data}
+
     def update(self, other: dict):
-        self._data.update(other)
+        if self._changes is not None:
+            self._changes.update((k,) for k in other)
+        if self._owned is not None:
+            self._own(()).update(other)
+        else:
+            self._data.update(other)
+
+    def concat(self, others: Sequence["NestDict"], fallback: dict[type, Callable] = {}, workers: int | None = None):
+        """Concatenate other NestDicts with compatible types into this one.
+
+        The parts of every leaf are collected across all `others` first, so each
+        ndarray or list leaf is built exactly once however many inputs there are.
+        Types without a built-in rule, or leaves whose types differ, are folded
+        pairwise with `fallback[type](this, other)`. NestDict children are
+        concatenated recursively; plain dict children, which is what every
+        interior node of 'flat' storage is, are merged with `update`.
 
-    def concat(self, others: Sequence["NestDict"], fallback: dict[type, Callable] = {}):
-        """Concatenate two dictionaries with compatible types."""
+        Args:
+            others (NestDict | Sequence[NestDict]): The NestDicts to append.
+            fallback (dict[type, Callable], optional): Concatenation functions by type.
+            workers (int | None, optional): Threads for concatenating large ndarray leaves,
+                see `nesteddict.set_executor`. Defaults to the global executor.
+
+        Returns:
+            NestDict: self.
+
+        Examples:
+            >>> nd = NestDict({'x': [1], 'y': {'z': np.array([1])}})
+            >>> nd.concat([NestDict({'x': [2]}), NestDict({'x': [3]})])['x']
+            [1, 2, 3]
+        """
         if not isinstance(others, Sequence):
             others = [others]
         if not all(isinstance(other, NestDict) for other in others):
             raise TypeError(f"Cannot concatenate `{type(others)}` to NestDict.")
 
-        for other in others:
-            for k, v in other.items():
-                if k not in self._data:
-                    raise KeyError(f"Key '{k}' not in self")
-
-                this = self._data[k]
-
-                if type(this) is not type(v):
-                    # try:
-                    #     self._data[k] = fallback[type(this)](this, v)
-                    # except:
-                    #     raise TypeError(
-                    #         f"Type mismatch for key '{k}': "
-                    #         f"expected {type(this)}, got {type(v)}"
-                    #     )
-                    self._data[k] = fallback[type(v)](this, v)
+        if self._changes is not None:
+            self._changes.update((k,) for other in others for k in other)
+        jobs = []
+        self._plan_concat(others, fallback, jobs)
+        concatenate_jobs(jobs, workers)
+        return self
 
-                elif isinstance(this, NestDict):
-                    this.concat(v)
+    def _plan_concat(self, others: Sequence["NestDict"], fallback: dict[type, Callable], jobs: list) -> None:
+        """Apply `concat` to this node, deferring ndarray concatenations to `jobs`.
 
-                elif isinstance(this, dict):
-                    self._data[k].update(v)
+        Each job is a `(target, key, parts)` triple whose result is stored as
+        `target[key] = np.concatenate(parts)`.
+        """
+        cow = self._owned is not None
+        data = self._own(()) if cow else self._data
 
-                elif isinstance(v, list):
-                    self._data[k] = this + v
+        parts_by_key = {}
+        for other in others:
+            for k, v in other.items():
+                if k not in data:
+                    raise KeyError(f"Key '{k}' not in self")
+                parts_by_key.setdefault(k, []).append(v)
 
-                elif isinstance(v, np.ndarray):
-                    self._data[k] = np.concatenate((this, v))
+        for k, parts in parts_by_key.items():
+            this = self._own_child(data, k) if cow else data[k]
 
-                elif isinstance(v, ArrayDict):
-                    self._data[k].concat(v)
+            # flat storage keeps its interior nodes as plain dicts, which are merged below
+            if isinstance(this, NestDict) and this.storage == "nested" and all(isinstance(v, NestDict) for v in parts):
+                this._plan_concat(parts, fallback, jobs)
 
+            elif all(type(v) is type(this) for v in parts) and isinstance(this, (list, np.ndarray, ArrayDict)):
+                if isinstance(this, list):
+                    data[k] = list(chain(this, *parts))
+                elif isinstance(this, np.ndarray):
+                    jobs.append((data, k, [this, *parts]))
                 else:
-                    self._data[k] = fallback[type(this)](this, v)
-        return self
+                    # the leaf may be shared, after a snapshot or by the copy that `+` and
+                    # `concat` build (flat storage always shares leaves with its copies):
+                    # it gets a new container, with its schema, not its columns rewritten
+                    shared = cow or self.storage == "flat"
+                    target = ArrayDict._wrap(dict(this._data), this._length, this._schema) if shared else this
+                    for key, column in this.items():
+                        jobs.append((target, key, [column, *(v[key] for v in parts)]))
+                    data[k] = target
+
+            else:
+                for v in parts:
+                    this = data[k] = _concat_pair(this, v, fallback)
 
     def __add__(self, other: dictlike) -> "NestDict":
-        """Concatenate two dictionaries with compatible types."""
-        if not isinstance(other, dictlike):
+        """Concatenate two dictionaries with compatible types into a new NestDict.
+
+        Neither operand is modified, nor put in copy-on-write mode; the result
+        is a copy-on-write copy of `self` that copies the nodes it concatenates
+        into and shares the others.
+        """
+        if not isinstance(other, (dict, NestDict)):
             raise TypeError(f"Cannot concatenate `{type(other)}` to NestDict.")
-        result = self.copy()
+        if not isinstance(other, NestDict):
+            other = NestDict(other)
+        result = self._cow_copy(self)
         result.concat(other)
         return result
 
     def __copy__(self) -> "NestDict":
-        """Return a shallow copy of the NestDict."""
-        return NestDict({k: v for k, v in self._data.items()})
+        """Return a shallow copy of the NestDict; a lazily read one stays lazy."""
+        nd = object.__new__(NestDict)
+        super(NestDict, nd).__setattr__("_data", self._data.copy())
+        return nd
     
-    def to_hdf5(self, h5file):
+    def to_hdf5(self, h5file, incremental: bool = False, **options):
         """Save the NestDict to an HDF5 file.
 
         Args:
             h5file (h5py.File): The HDF5 file to save to.
+            incremental (bool, optional): Only rewrite the subtrees in `changes()` in a file
+                this NestDict was saved to before, then clear the changes. Needs `track_changes`.
+                Defaults to False.
+            **options: `chunks`, `compression`, `compression_opts` and `resizable`,
+                see `nesteddict.hdf5.write_dataset`.
+
+        Raises:
+            ValueError: if `incremental` is set but changes are not tracked.
         """
-        def _to_hdf5(data, h5group):
+        from .hdf5 import write_changes, write_node
+
+        if incremental:
+            if self._changes is None:
+                raise ValueError("Incremental writes need change tracking, call track_changes() first.")
+            write_changes(self, h5file, self.changes(), **options)
+            self.clear_changes()
+        else:
+            for k, v in self._data.items():
+                write_node(h5file, str(k), v, **options)
+        return h5file
+
+    @classmethod
+    def from_hdf5(cls, h5file, lazy: bool = True, cache=None) -> "NestDict":
+        """Read a NestDict from an HDF5 file written by `to_hdf5`.
+
+        Groups become NestDict nodes and groups written from an ArrayDict become
+        ArrayDicts. A lazy NestDict keeps the file open and opens instantly: a
+        dataset is read on first access, through a byte-bounded LRU cache shared
+        by all lazy trees, so resident memory stays bounded however large the
+        file is. Loaded arrays are read-only; assign a new value to change one.
+        A file opened here from a path or buffer is closed by `close`, or at the
+        end of a `with` block over the tree; an open group stays the caller's.
+
+        Args:
+            h5file (str|Path|io.BytesIO|h5py.Group): The HDF5 file or an open group.
+            lazy (bool, optional): Load datasets on first access instead of now. Defaults to True.
+            cache (LeafCache|int|None, optional): The cache for lazily loaded datasets or its size
+                in bytes, see `nesteddict.hdf5.read_group`.
+
+        Returns:
+            NestDict: The tree.
+        """
+        import h5py
+
+        from .hdf5 import read_group, read_file
+
+        if isinstance(h5file, h5py.Group):
+            return read_group(h5file, lazy, cache)
+        if not lazy:
+            with h5py.File(h5file, "r") as f:
+                return read_group(f, lazy=False)
+        return read_file(h5file, read_group, cache)
+
+    def close(self) -> None:
+        """Close the HDF5 file `from_hdf5` opened for this lazy NestDict.
+
+        Datasets not loaded yet can no longer be read, in this tree or in its
+        snapshots. Other NestDicts are left alone.
+
+        Examples:
+            >>> import io, h5py
+            >>> buffer = io.BytesIO()
+            >>> with h5py.File(buffer, "w") as f:
+            ...     _ = NestDict({'a': {'b': np.arange(3)}}).to_hdf5(f)
+            >>> with NestDict.from_hdf5(buffer) as nd:
+            ...     nd[['a', 'b']]
+            array([0, 1, 2])
+        """
+        from .hdf5 import close
+
+        close(self)
+
+    def __enter__(self) -> "NestDict":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def append_hdf5(self, h5file, **options):
+        """Append the leaves of the NestDict to the datasets of an HDF5 file.
+
+        Datasets are grown along their first axis in place, so a simulation can
+        stream its frames to disk step by step. Missing groups and datasets are
+        created, datasets resizable and chunked. Scalar leaves overwrite the
+        stored value.
+
+        Args:
+            h5file (h5py.File): The HDF5 file to append to.
+            **options: `chunks`, `compression` and `compression_opts` for new datasets.
+        """
+        from .hdf5 import append_dataset
+
+        def _append_hdf5(data, h5group):
             for k, v in data.items():
-                if hasattr(v, "to_hdf5"):
-                    group = h5group.create_group(str(k))
-                    v.to_hdf5(group)
+                if hasattr(v, "append_hdf5"):
+                    v.append_hdf5(h5group.require_group(str(k)), **options)
                 elif isinstance(v, dict):
-                    group = h5group.create_group(str(k))
-                    _to_hdf5(v, group)
+                    _append_hdf5(v, h5group.require_group(str(k)))
                 else:
-                    h5group.create_dataset(str(k), data=v)
-        _to_hdf5(self._data, h5file)
+                    append_dataset(h5group, str(k), v, **options)
+        _append_hdf5(self._data, h5file)
         return h5file
-            
-            
-def concat(nds: Sequence[dictlike]):
-    """Concatenate a list of dictionaries or NestDicts.
+
+
+def _nested_writes(trie: dict) -> bool:
+    """Whether a path trie has a path that is a prefix of another."""
+    stack = [trie]
+    while stack:
+        for children, indices in stack.pop().values():
+            if children:
+                if indices:
+                    return True
+                stack.append(children)
+    return False
+
+
+def _concat_pair(this: Any, other: Any, fallback: dict[type, Callable]) -> Any:
+    """Concatenate a single pair of values, returning the result."""
+    if isinstance(this, NestDict) and this.storage == "flat" and isinstance(other, (dict, NestDict)):
+        # a flat subtree stands in for what was a plain dict child
+        this.update(other)
+        return this
+
+    elif isinstance(this, NestDict) and isinstance(other, NestDict):
+        return this.concat(other, fallback)
+
+    elif type(this) is not type(other):
+        return fallback[type(other)](this, other)
+
+    elif isinstance(this, dict):
+        this.update(other)
+        return this
+
+    elif isinstance(other, list):
+        return this + other
+
+    elif isinstance(other, np.ndarray):
+        return np.concatenate((this, other))
+
+    elif isinstance(other, ArrayDict):
+        return this.concat(other)
+
+    return fallback[type(this)](this, other)
+
+
+def concat(nds: Sequence[dictlike | ArrayDict], fallback: dict[type, Callable] = {}, workers: int | None = None):
+    """Concatenate a list of dictionaries, NestDicts or ArrayDicts.
+
+    All inputs are merged in a single pass: every leaf is concatenated once
+    from its parts in all inputs, so the cost is linear in the total size.
+    The inputs are not modified.
+
+    Args:
+        nds (Sequence[dictlike | ArrayDict]): A sequence of dictionaries, NestDicts or ArrayDicts to concatenate.
+        fallback (dict[type, Callable], optional): Concatenation functions by type, see `NestDict.concat`.
+        workers (int | None, optional): Threads for concatenating large leaves, see `nesteddict.set_executor`.
+
+    Returns:
+        NestDict | ArrayDict: A new NestDict, or ArrayDict, containing the concatenated data.
+
+    Examples:
+        >>> concat([{'x': [1]}, {'x': [2]}, {'x': [3]}])
+        <{'x': [1, 2, 3]}>
+    """
+    if isinstance(nds[0], ArrayDict):
+        return ArrayDict().concat(nds, workers)
+
+    nds = [nd if isinstance(nd, NestDict) else NestDict(nd) for nd in nds]
+    head = nds[0]
+    # a one-sided copy-on-write copy, so concatenating never writes into nds[0]
+    result = head._cow_copy(head)
+    return result.concat(nds[1:], fallback, workers)
+
+
+def tree_map(fn: Callable[[np.ndarray], Any], tree: dictlike | ArrayDict, workers: int | None = None):
+    """Apply a function to every ndarray leaf of a tree, returning a new tree.
+
+    Leaves of at least the `set_executor` threshold size are processed in the
+    thread pool. Containers are rebuilt, other leaves are carried over as they are.
 
     Args:
-        nds (Sequence[dictlike]): A sequence of dictionaries or NestDicts to concatenate.
+        fn (Callable[[np.ndarray], Any]): The function to apply to each array.
+        tree (dictlike | ArrayDict): A dict, NestDict or ArrayDict.
+        workers (int | None, optional): Threads for large leaves, see `nesteddict.set_executor`.
 
     Returns:
-        NestDict: A new NestDict containing the concatenated data.
+        NestDict | ArrayDict: The mapped tree, of the same kind as `tree`.
+
+    Examples:
+        >>> tree_map(np.sqrt, {'a': {'b': np.array([4.0])}, 'c': 'label'})
+        <{'a': {'b': array([2.])}, 'c': 'label'}>
     """
-    result = nds[0].copy()
-    for nd in nds[1:]:
-        result.concat(nd)
-    return result
\ No newline at end of file
+    jobs = []
+
+    def _map_arraydict(source):
+        target = ArrayDict()
+        jobs.extend((target, k, v) for k, v in source.items())
+        return target
+
+    if isinstance(tree, ArrayDict):
+        result = _map_arraydict(tree)
+    else:
+        if not isinstance(tree, NestDict):
+            tree = NestDict(tree)
+        result = NestDict({}, storage=tree.storage)
+        stack = [(tree._data, result)]
+        while stack:
+            source, target = stack.pop()
+            for k, v in source.items():
+                if isinstance(v, (dict, NestDict)):
+                    target[k] = {} if isinstance(v, dict) else NestDict({}, storage=v.storage)
+                    stack.append((v._data if isinstance(v, NestDict) else v, target[k]))
+                elif isinstance(v, ArrayDict):
+                    target[k] = _map_arraydict(v)
+                elif isinstance(v, np.ndarray):
+                    target[k] = v
+                    jobs.append((target, k, v))
+                else:
+                    target[k] = v
+
+    results = parallel_map(fn, [v for _, _, v in jobs], [v.nbytes for _, _, v in jobs], workers)
+    for (target, k, _), value in zip(jobs, results):
+        target[k] = value
+    return result
@@ -0,0 +1,113 @@
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Sequence
+
+import numpy as np
+
+PARALLEL_THRESHOLD = 1 << 20  # bytes
+
+_executor: Executor | None = None
+_threshold: int = PARALLEL_THRESHOLD
+_pools: dict[int, ThreadPoolExecutor] = {}
+
+
+def set_executor(executor: Executor | int | None, threshold: int | None = None) -> None:
+    """Set the executor used for leaf-wise work when no `workers` are given.
+
+    NumPy releases the GIL while copying and in most ufuncs, so a thread pool
+    lets independent large leaves be processed concurrently.
+
+    Args:
+        executor (Executor | int | None): An executor, a number of threads, or None to run serially.
+        threshold (int, optional): Leaves smaller than this many bytes run inline. Defaults to 1 MiB.
+
+    Examples:
+        >>> set_executor(4)
+        >>> get_executor() is not None
+        True
+        >>> set_executor(None)
+    """
+    global _executor, _threshold
+    _executor = _pool(executor) if isinstance(executor, int) else executor
+    if threshold is not None:
+        _threshold = threshold
+
+
+def get_executor() -> Executor | None:
+    """Get the executor set by `set_executor`."""
+    return _executor
+
+
+def _pool(workers: int) -> ThreadPoolExecutor | None:
+    if workers <= 1:
+        return None
+    if workers not in _pools:
+        _pools[workers] = ThreadPoolExecutor(workers, thread_name_prefix="nesteddict")
+    return _pools[workers]
+
+
+def resolve_executor(workers: Executor | int | None = None) -> Executor | None:
+    """The executor for a `workers` argument: a given executor, a shared pool of that size, or the global one."""
+    if workers is None:
+        return _executor
+    if isinstance(workers, int):
+        return _pool(workers)
+    return workers
+
+
+def parallel_map(
+    fn: Callable[[Any], Any],
+    items: Sequence[Any],
+    sizes: Sequence[int],
+    workers: Executor | int | None = None,
+) -> list:
+    """Apply `fn` to every item, sending items of at least the threshold size to the executor.
+
+    Small items are processed inline on the calling thread while the large
+    ones run in the pool. Results keep the order of `items`.
+
+    Args:
+        fn (Callable): The function to apply.
+        items (Sequence): The inputs.
+        sizes (Sequence[int]): The size in bytes of each input.
+        workers (Executor | int | None, optional): See `resolve_executor`.
+
+    Returns:
+        list: `fn(item)` for every item.
+    """
+    executor = resolve_executor(workers)
+    if executor is None:
+        return [fn(item) for item in items]
+
+    futures = {
+        i: executor.submit(fn, item)
+        for i, (item, size) in enumerate(zip(items, sizes))
+        if size >= _threshold
+    }
+    results = [None if i in futures else fn(item) for i, item in enumerate(items)]
+    for i, future in futures.items():
+        results[i] = future.result()
+    return results
+
+
+def concatenate_jobs(jobs: list[tuple[Any, Any, list]], workers: Executor | int | None = None) -> None:
+    """Run deferred concatenations, storing `np.concatenate(parts)` as `target[key]` for each job.
+
+    The concatenations may run in parallel; the results are stored on the
+    calling thread in job order, with one `update` per target so that all
+    columns of an ArrayDict change length together.
+
+    Args:
+        jobs (list[tuple]): `(target, key, parts)` triples.
+        workers (Executor | int | None, optional): See `resolve_executor`.
+    """
+    results = parallel_map(
+        np.concatenate,
+        [parts for _, _, parts in jobs],
+        [sum(getattr(part, "nbytes", 0) for part in parts) for _, _, parts in jobs],
+        workers,
+    )
+    updates: dict[int, tuple[Any, dict]] = {}
+    for (target, key, _), result in zip(jobs, results):
+        updates.setdefault(id(target), (target, {}))[1][key] = result
+    for target, columns in updates.values():
+        target.update(columns)
@@ -0,0 +1,119 @@
+from functools import lru_cache
+from typing import Any, Iterable, Iterator, Sequence
+
+PATH_CACHE_SIZE = 4096
+
+
+class NestPath:
+    """A pre-parsed nested key.
+
+    A NestPath holds the keys of a nested path as a tuple, together with the
+    parent keys and the leaf key, so NestDict can walk it without parsing.
+
+    Examples:
+
+    >>> path = NestPath(['a', 'b', 'c'])
+    >>> path.keys
+    ('a', 'b', 'c')
+    >>> path.parent, path.leaf
+    (('a', 'b'), 'c')
+    """
+
+    __slots__ = ("keys", "parent", "leaf")
+
+    def __init__(self, keys: Iterable[Any]):
+        keys = tuple(keys)
+        if not keys:
+            raise ValueError("NestPath requires at least one key.")
+        object.__setattr__(self, "keys", keys)
+        object.__setattr__(self, "parent", keys[:-1])
+        object.__setattr__(self, "leaf", keys[-1])
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("NestPath is immutable.")
+
+    def __iter__(self) -> Iterator:
+        return iter(self.keys)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, NestPath):
+            return self.keys == other.keys
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((NestPath, self.keys))
+
+    def __repr__(self) -> str:
+        return f"NestPath({self.keys!r})"
+
+
+@lru_cache(maxsize=PATH_CACHE_SIZE)
+def compile_path(nested_path: str, sep: str = ".") -> NestPath:
+    """Parse a separated string into a NestPath, caching the result.
+
+    Args:
+        nested_path (str): The nested path, e.g. 'a.b.c'.
+        sep (str, optional): Defaults to '.'.
+
+    Returns:
+        NestPath: The compiled path.
+
+    Examples:
+        >>> compile_path('a.b.c') is compile_path('a.b.c')
+        True
+    """
+    return NestPath(nested_path.split(sep))
+
+
+def build_trie(nested_paths: Sequence[str | Sequence | NestPath], sep: str = ".") -> dict:
+    """Group nested paths into a prefix trie.
+
+    Each trie node maps a key to a pair of its child node and the indices of
+    the paths that end at that key.
+
+    Args:
+        nested_paths (Sequence[str | Sequence | NestPath]): The nested paths.
+        sep (str, optional): Separator for string paths. Defaults to '.'.
+
+    Returns:
+        dict: The root node of the trie.
+
+    Examples:
+        >>> build_trie(['a.b', 'a.c'])
+        {'a': ({'b': ({}, [0]), 'c': ({}, [1])}, [])}
+    """
+    trie = {}
+    for i, nested_path in enumerate(nested_paths):
+        if isinstance(nested_path, NestPath):
+            keys = nested_path.keys
+        elif isinstance(nested_path, str):
+            keys = compile_path(nested_path, sep).keys
+        else:
+            keys = NestPath(nested_path).keys
+        node = trie
+        for key in keys:
+            entry = node.get(key)
+            if entry is None:
+                entry = node[key] = ({}, [])
+            node = entry[0]
+        entry[1].append(i)
+    return trie
+
+
+@lru_cache(maxsize=256)
+def _cached_trie(nested_paths: tuple, sep: str) -> dict:
+    return build_trie(nested_paths, sep)
+
+
+def path_trie(nested_paths: Sequence[str | Sequence | NestPath], sep: str = ".") -> dict:
+    """Like `build_trie`, but reuses the trie for a repeated set of hashable paths.
+
+    The returned trie is shared between callers and must not be modified.
+    """
+    try:
+        return _cached_trie(tuple(nested_paths), sep)
+    except TypeError:
+        return build_trie(nested_paths, sep)
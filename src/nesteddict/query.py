@@ -0,0 +1,176 @@
+import ast
+import io
+import tokenize
+from typing import Any, Callable, Iterable, Iterator
+
+import numpy as np
+
+from .arraydict import ArrayDict
+
+QUERY_ROWS = 1 << 14  # rows per block, so a block of a column fits in the L2 cache
+
+_LOGICAL = {"&": "and", "|": "or", "~": "not"}
+_COMPARE = {
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal,
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+}
+_ARITHMETIC = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.true_divide,
+    ast.FloorDiv: np.floor_divide,
+    ast.Mod: np.mod,
+    ast.Pow: np.power,
+}
+
+Block = dict[str, np.ndarray]
+Evaluate = Callable[[Block], Any]
+
+
+def _rewrite(expr: str) -> str:
+    """Spell `&`, `|` and `~` as `and`, `or` and `not`, so they bind looser than comparisons."""
+    try:
+        tokens = [
+            (tokenize.NAME, _LOGICAL[tok.string]) if tok.type == tokenize.OP and tok.string in _LOGICAL
+            else (tok.type, tok.string)
+            for tok in tokenize.generate_tokens(io.StringIO(expr).readline)
+        ]
+    except (tokenize.TokenError, SyntaxError) as e:
+        raise ValueError(f"Invalid query '{expr}': {e}") from None
+    return tokenize.untokenize(tokens)
+
+
+def _constant(node: ast.AST) -> Any:
+    if isinstance(node, ast.Constant) and isinstance(node.value, (bool, int, float, complex, str)):
+        return node.value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        return -_constant(node.operand)
+    raise ValueError(f"Expected a constant in query, got '{ast.unparse(node)}'.")
+
+
+def _compile(node: ast.AST, names: set[str], columns: Iterable[str]) -> Evaluate:
+    """Turn a parsed expression into a function of a block of columns, collecting the column `names` it reads."""
+    if isinstance(node, ast.Name):
+        if node.id not in columns:
+            raise KeyError(f"Column '{node.id}' not in the ArrayDict.")
+        names.add(node.id)
+        name = node.id
+        return lambda block: block[name]
+
+    if isinstance(node, ast.Constant):
+        value = _constant(node)
+        return lambda block: value
+
+    if isinstance(node, ast.BoolOp):
+        parts = [_compile(value, names, columns) for value in node.values]
+        logical = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+
+        def boolop(block: Block) -> np.ndarray:
+            result = parts[0](block)
+            for part in parts[1:]:
+                result = logical(result, part(block))
+            return result
+        return boolop
+
+    if isinstance(node, ast.UnaryOp):
+        operand = _compile(node.operand, names, columns)
+        if isinstance(node.op, ast.Not):
+            return lambda block: np.logical_not(operand(block))
+        if isinstance(node.op, ast.USub):
+            return lambda block: np.negative(operand(block))
+        if isinstance(node.op, ast.UAdd):
+            return operand
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _ARITHMETIC:
+        ufunc = _ARITHMETIC[type(node.op)]
+        left, right = _compile(node.left, names, columns), _compile(node.right, names, columns)
+        return lambda block: ufunc(left(block), right(block))
+
+    if isinstance(node, ast.Compare):
+        operands = [_compile(node.left, names, columns)]
+        ops = []
+        for op, comparator in zip(node.ops, node.comparators):
+            if isinstance(op, (ast.In, ast.NotIn)):
+                if not isinstance(comparator, (ast.List, ast.Tuple, ast.Set)):
+                    raise ValueError(f"Expected a list after 'in', got '{ast.unparse(comparator)}'.")
+                values = np.array([_constant(e) for e in comparator.elts])
+                invert = isinstance(op, ast.NotIn)
+                ops.append(lambda a, b, values=values, invert=invert: np.isin(a, values, invert=invert))
+                operands.append(lambda block: None)
+            elif type(op) in _COMPARE:
+                ops.append(_COMPARE[type(op)])
+                operands.append(_compile(comparator, names, columns))
+            else:
+                raise ValueError(f"Unsupported comparison in query: '{ast.unparse(node)}'.")
+
+        def compare(block: Block) -> np.ndarray:
+            # a chain `lo < x < hi` is `lo < x and x < hi`
+            left = operands[0](block)
+            result = None
+            for op, operand in zip(ops, operands[1:]):
+                right = operand(block)
+                step = op(left, right)
+                result = step if result is None else np.logical_and(result, step)
+                left = right
+            return result
+        return compare
+
+    raise ValueError(f"Unsupported syntax in query: '{ast.unparse(node)}'.")
+
+
+class Query:
+    """A boolean expression over the columns of an ArrayDict, evaluated a block of rows at a time.
+
+    The expression is parsed once. Comparisons, arithmetic, `in` with a list
+    of constants, and `and`, `or`, `not` are supported; `&`, `|` and `~` mean
+    the same and, as in pandas, bind looser than comparisons, so
+    `a > 3 & b < 2` is `(a > 3) & (b < 2)`.
+
+    Examples:
+        >>> ad = ArrayDict({'a': [1, 5, 7], 'b': [0, 1, 3]})
+        >>> q = Query('a > 3 & b < 2', ad.keys())
+        >>> sorted(q.names), [rows.tolist() for _, rows in q.blocks(ad)]
+        (['a', 'b'], [[1]])
+    """
+
+    def __init__(self, expr: str, columns: Iterable[str]):
+        self.expr = expr
+        try:
+            tree = ast.parse(_rewrite(expr).strip(), mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"Invalid query '{expr}': {e.msg}") from None
+        self.names: set[str] = set()
+        self.evaluate = _compile(tree.body, self.names, set(columns))
+
+    def blocks(self, source: ArrayDict, block_rows: int | None = None) -> Iterator[tuple[int, np.ndarray]]:
+        """Evaluate the expression block by block.
+
+        Only the columns the expression reads are sliced, and temporaries
+        never exceed one block. The next block is read after the caller has
+        handled the current one.
+
+        Args:
+            source (ArrayDict): The columns.
+            block_rows (int|None): The rows per block. Defaults to `QUERY_ROWS`.
+
+        Yields:
+            tuple[int, np.ndarray]: The first row of each block and the positions of its matching rows within it.
+        """
+        block_rows = block_rows or QUERY_ROWS
+        columns = {k: np.asarray(source[k]) for k in self.names}
+        n = source.array_length
+        for start in range(0, n, block_rows):
+            stop = min(start + block_rows, n)
+            mask = np.asarray(self.evaluate({k: v[start:stop] for k, v in columns.items()}))
+            if mask.dtype != bool:
+                raise ValueError(f"Query '{self.expr}' does not evaluate to booleans.")
+            if mask.ndim == 0:
+                mask = np.broadcast_to(mask, stop - start)
+            elif mask.shape != (stop - start,):
+                raise ValueError(f"Query '{self.expr}' does not evaluate to one boolean per row.")
+            yield start, np.flatnonzero(mask)
@@ -0,0 +1,62 @@
+from typing import Any, NamedTuple
+
+import numpy as np
+
+
+class Field(NamedTuple):
+    """The dtype and trailing shape of an ArrayDict column.
+
+    An unsized str or bytes dtype accepts strings of any length.
+
+    Examples:
+        >>> Field(np.dtype(np.float32), (3,)).convert('pos', [[0, 1, 2]])
+        array([[0., 1., 2.]], dtype=float32)
+    """
+
+    dtype: np.dtype
+    shape: tuple[int, ...] = ()
+
+    def convert(self, name: str, value: Any, copy: bool = False) -> np.ndarray:
+        """Convert a column to the dtype of the field and check its trailing shape.
+
+        Values are only cast within their kind or to a wider one (`same_kind`),
+        so floats are not silently truncated to ints.
+
+        Raises:
+            ValueError: if the value cannot be cast or has another trailing shape.
+        """
+        value = np.array(value) if copy else np.asarray(value)
+        dtype = self.dtype
+        if dtype.kind in "US" and value.dtype.kind == dtype.kind and dtype.itemsize == 0:
+            dtype = value.dtype
+        if value.dtype != dtype:
+            # NumPy casts anything to strings, a str column only takes strings
+            if not np.can_cast(value.dtype, dtype, "same_kind") or dtype.kind in "US" and value.dtype.kind != dtype.kind:
+                raise ValueError(f"Column '{name}' of dtype {value.dtype} cannot be cast to {dtype}.")
+            value = value.astype(dtype)
+        if value.ndim == 0 or value.shape[1:] != self.shape:
+            raise ValueError(f"Column '{name}' has shape {value.shape}, expected rows of shape {self.shape}.")
+        return value
+
+    def empty(self, rows: int = 0) -> np.ndarray:
+        """An uninitialized column of `rows` rows."""
+        return np.empty((rows, *self.shape), dtype=self.dtype)
+
+
+def parse_schema(spec: dict[str, Any]) -> dict[str, Field]:
+    """Parse a schema given as column names and dtypes or `(dtype, trailing shape)` pairs.
+
+    Examples:
+        >>> parse_schema({'id': int, 'pos': ('f8', (3,))})['pos']
+        Field(dtype=dtype('float64'), shape=(3,))
+    """
+    schema = {}
+    for name, field in spec.items():
+        if isinstance(field, Field):
+            schema[name] = field
+        elif isinstance(field, tuple):
+            dtype, shape = field
+            schema[name] = Field(np.dtype(dtype), (shape,) if isinstance(shape, int) else tuple(shape))
+        else:
+            schema[name] = Field(np.dtype(field))
+    return schema
@@ -0,0 +1,141 @@
+import sys
+import weakref
+from math import prod
+from multiprocessing.shared_memory import SharedMemory
+from typing import NamedTuple
+
+import numpy as np
+
+from .arraydict import ArrayDict
+
+ALIGN = 64  # bytes, every column starts on a cache line
+
+# the blocks mapped in this process, by name, and the arrays viewing each
+_segments: dict[str, SharedMemory] = {}
+_views: dict[str, list[weakref.ref]] = {}
+
+
+class SharedColumn(NamedTuple):
+    """Where a column lives in a shared memory block."""
+
+    name: str
+    dtype: np.dtype
+    shape: tuple[int, ...]
+    offset: int
+
+
+class SharedHandle:
+    """A small, picklable reference to the columns of an ArrayDict in a shared memory block.
+
+    Created by `ArrayDict.to_shared_memory`. Send it to other processes and
+    call `ArrayDict.attach` there; nothing but the handle is pickled. The
+    block exists until `unlink` is called, normally by its creator once the
+    workers are done, and each process keeps its mapping until it calls
+    `close`. Used as a context manager, the handle unlinks the block and
+    closes the mapping of this process on exit.
+    """
+
+    __slots__ = ("name", "columns", "length", "nbytes")
+
+    def __init__(self, name: str, columns: tuple[SharedColumn, ...], length: int, nbytes: int):
+        self.name = name
+        self.columns = columns
+        self.length = length
+        self.nbytes = nbytes
+
+    def __getstate__(self) -> tuple:
+        return self.name, self.columns, self.length, self.nbytes
+
+    def __setstate__(self, state: tuple) -> None:
+        self.name, self.columns, self.length, self.nbytes = state
+
+    def __repr__(self) -> str:
+        return f"<SharedHandle {self.name}: {' '.join(c.name for c in self.columns)}, {self.nbytes} bytes>"
+
+    def close(self) -> None:
+        """Release the mapping of the block in this process.
+
+        Raises:
+            BufferError: if arrays of an attached ArrayDict still use it.
+        """
+        segment = _segments.get(self.name)
+        if segment is not None:
+            # closing the mapping under a live view would leave it dangling
+            if any(view() is not None for view in _views[self.name]):
+                raise BufferError(f"Arrays attached from {self.name} are still in use.")
+            segment.close()
+            del _segments[self.name], _views[self.name]
+
+    def unlink(self) -> None:
+        """Destroy the block. Processes that mapped it keep their mapping until they close it."""
+        segment = _segments.get(self.name)
+        try:
+            (segment or SharedMemory(self.name)).unlink()
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> "SharedHandle":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.unlink()
+        try:
+            self.close()
+        except BufferError:
+            # attached arrays are still alive; `close` can be called again later
+            pass
+
+
+def _open(name: str) -> SharedMemory:
+    segment = _segments.get(name)
+    if segment is None:
+        if sys.version_info >= (3, 13):
+            segment = SharedMemory(name, track=False)
+        else:
+            # processes started by multiprocessing share the resource tracker
+            # of their parent, which already has the block registered
+            segment = SharedMemory(name)
+        _segments[name] = segment
+        _views[name] = []
+    return segment
+
+
+def _view(segment: SharedMemory, column: SharedColumn) -> np.ndarray:
+    # frombuffer holds the buffer, so the block cannot be closed under the array
+    count = prod(column.shape)
+    return np.frombuffer(segment.buf, column.dtype, count, column.offset).reshape(column.shape)
+
+
+def share(source: ArrayDict, name: str | None = None) -> SharedHandle:
+    """Copy the columns of an ArrayDict into a new shared memory block, see `ArrayDict.to_shared_memory`."""
+    columns = []
+    arrays = []
+    offset = 0
+    for k, v in source.items():
+        v = np.asarray(v)
+        if v.dtype.hasobject:
+            raise ValueError(f"Column '{k}' of dtype object cannot be shared.")
+        offset = -(-offset // ALIGN) * ALIGN
+        columns.append(SharedColumn(k, v.dtype, v.shape, offset))
+        arrays.append(v)
+        offset += v.nbytes
+
+    segment = SharedMemory(name, create=True, size=max(offset, 1))
+    _segments[segment.name] = segment
+    _views[segment.name] = []
+    for column, array in zip(columns, arrays):
+        _view(segment, column)[...] = array
+    return SharedHandle(segment.name, tuple(columns), source.array_length, offset)
+
+
+def attach(handle: SharedHandle, readonly: bool = True) -> ArrayDict:
+    """Map the block of a handle and wrap its columns, see `ArrayDict.attach`."""
+    segment = _open(handle.name)
+    views = _views[handle.name] = [view for view in _views[handle.name] if view() is not None]
+    columns = {}
+    for column in handle.columns:
+        columns[column.name] = array = _view(segment, column)
+        views.append(weakref.ref(array))
+        if readonly:
+            array.flags.writeable = False
+    return ArrayDict._wrap(columns, handle.length)
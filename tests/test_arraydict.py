@@ -39,6 +39,22 @@ class TestNumpy:
             "tensorial": ad["tensorial"][0:2],
         }
 
+    def test_views(self, ad):
+
+        assert np.shares_memory(ad[1:]["vectorial"], ad["vectorial"])
+        assert np.shares_memory(ad[1]["tensorial"], ad["tensorial"])
+        assert ad[1]["scalar"].shape == ()
+        assert ad[["scalar"]]["scalar"] is ad["scalar"]
+        assert not np.shares_memory(ad[np.array([0, 1])]["vectorial"], ad["vectorial"])
+
+        column = np.arange(3)
+        assert ArrayDict({"a": column}, copy=False)["a"] is column
+        assert ArrayDict({"a": column})["a"] is not column
+
+        copied = ad[1:].copy()
+        assert copied == ad[1:]
+        assert not np.shares_memory(copied["vectorial"], ad["vectorial"])
+
     def test_setitem(self, ad):
         """
         Test the __setitem__ method of NestDict.
@@ -75,8 +91,19 @@ class TestNumpy:
         with pytest.raises(KeyError):
             ad[0: 2] = ArrayDict({
                 "scalar": np.array([4, 5]),
-                "tensorial": np.random.rand(3, 3),
+                "tensorial": np.random.rand(2, 3),
             })
+
+        # columns are converted and keep the row count
+        ad["listed"] = [1, 2, 3]
+        assert isinstance(ad["listed"], np.ndarray)
+        with pytest.raises(ValueError):
+            ad["short"] = np.array([1, 2])
+        with pytest.raises(ValueError):
+            ad[["scalar", "listed"]] = ArrayDict({"scalar": [1, 2], "listed": [1, 2]})
+        with pytest.raises(ValueError):
+            ArrayDict({"a": [1, 2], "b": [1, 2, 3]})
+        assert "short" not in ad and ad.array_length == 3
         
 
     def test_getitem_invalscalar(self, ad):
@@ -99,6 +126,25 @@ class TestNumpy:
             assert "scalar" in row
             assert row["vectorial"].shape == ad["vectorial"][i].shape
 
+    def test_iterbatches(self, ad, monkeypatch):
+
+        batches = list(ad.iterbatches(2))
+        assert [batch.array_length for batch in batches] == [2, 1]
+        assert np.shares_memory(batches[1]["tensorial"], ad["tensorial"])
+        with pytest.raises(ValueError):
+            next(ad.iterbatches(0))
+
+        from nesteddict import arraydict
+        monkeypatch.setattr(arraydict, "BATCH_ROWS", 2)
+        rows = list(ad.itertuples())
+        assert [row.scalar for row in rows] == [1, 2, 3]
+        assert np.array_equal(rows[2].vectorial, ad["vectorial"][2])
+
+        rows = list(ad.iterrows())
+        assert len(rows) == 3
+        assert rows[2]["scalar"].shape == ()
+        assert rows[2] == ad[2]
+
     def test_from_dicts(self):
         """
         Test the from_dicts method of ArrayDict.
@@ -112,6 +158,151 @@ class TestNumpy:
         assert len(ad) == 2
         assert set(ad.keys()) == {"scalar", "vectorial"}
 
+    def test_from_csv(self, tmp_path):
+
+        lines = ["id,x,name,flag", "1,0.5,a,true", "2,,b,false", "", "3,2.5,c"]
+        ad = ArrayDict.from_csv(lines)
+        assert ad["id"].dtype == np.int64
+        assert np.array_equal(ad["x"], [0.5, np.nan, 2.5], equal_nan=True)
+        assert ad["name"].tolist() == ["a", "b", "c"]
+        assert ad["flag"].tolist() == ["true", "false", ""]
+
+        path = tmp_path / "test.csv"
+        path.write_text("\n".join(lines))
+        for source in (str(path), path, io.StringIO("\n".join(lines))):
+            typed = ArrayDict.from_csv(source, dtype={"flag": bool, "id": np.float32}, usecols=["flag", "id"])
+            assert list(typed.keys()) == ["flag", "id"]
+            assert typed["flag"].tolist() == [True, False, False]
+            assert typed["id"].dtype == np.float32
+
+        ad = ArrayDict.from_csv(["1;x", "2;y"], header=["id", "name"], seq=";", usecols=[1])
+        assert ad["name"].tolist() == ["x", "y"]
+
+        with pytest.raises(KeyError):
+            ArrayDict.from_csv(lines, usecols=["missing"])
+        with pytest.raises(ValueError):
+            ArrayDict.from_csv(lines, dtype={"name": int})
+        with pytest.raises(ValueError):
+            ArrayDict.from_csv(lines, dtype={"name": bool})
+        with pytest.raises(TypeError):
+            ArrayDict.from_csv(1)
+
+    def test_from_csv_widening(self, monkeypatch):
+
+        from nesteddict import csvio
+
+        monkeypatch.setattr(csvio, "CHUNK_ROWS", 2)
+        lines = ["a,b,c", "1,1,1", "2,2,2", "3,3.5,x", "4,4,4"]
+        ad = ArrayDict.from_csv(lines)
+        assert ad["a"].tolist() == [1, 2, 3, 4]
+        assert ad["b"].tolist() == [1.0, 2.0, 3.5, 4.0]
+        assert ad["c"].tolist() == ["1", "2", "x", "4"]
+
+        # blocks parsed as numbers before widening to str are formatted, dtype=str keeps the text
+        lines = ["d,e", "1,a", "007,b", "2.50,c", ",d", "x,e"]
+        assert ArrayDict.from_csv(lines)["d"].tolist() == ["1.0", "7.0", "2.5", "", "x"]
+        assert ArrayDict.from_csv(lines, dtype=str)["d"].tolist() == ["1", "007", "2.50", "", "x"]
+
+    def test_iter_csv(self, tmp_path):
+
+        lines = ["id,x,name"] + [f"{i},{i / 2},n{i}" for i in range(10)]
+        path = tmp_path / "test.csv"
+        path.write_text("\n".join(lines))
+        whole = ArrayDict.from_csv(lines)
+        for source in (path, str(path), io.StringIO("\n".join(lines)), iter(lines)):
+            chunks = list(ArrayDict.iter_csv(source, chunksize=4))
+            assert [chunk.array_length for chunk in chunks] == [4, 4, 2]
+            assert all(chunk["x"].dtype == np.float64 for chunk in chunks)
+            merged = ArrayDict().concat(chunks)
+            assert merged[["id", "x"]] == whole[["id", "x"]]
+            assert merged["name"].tolist() == whole["name"].tolist()
+
+        chunks = list(ArrayDict.iter_csv(lines, chunksize=3, usecols=["name"]))
+        assert list(chunks[0].keys()) == ["name"]
+
+        with pytest.raises(ValueError):
+            list(ArrayDict.iter_csv(["a", "1", "2", "x"], chunksize=2))
+        chunks = ArrayDict.iter_csv(["a", "1", "2", "x"], chunksize=2, dtype={"a": str})
+        assert [chunk["a"].tolist() for chunk in chunks] == [["1", "2"], ["x"]]
+
+    def test_concat(self, ad):
+        """
+        Test concatenating several ArrayDicts at once.
+        """
+        parts = [ad[0:1], ad[1:2], ad[2:3]]
+        result = ArrayDict().concat(parts)
+        assert result == ad
+        assert ad[0:1].concat(parts[1:]) == ad
+
+        from nesteddict import concat
+        assert concat(parts) == ad
+        assert parts[0].array_length == 1
+
+    def test_append(self, ad):
+
+        expected = ArrayDict().concat([ad, ad[0:1], ad[1:3]])
+        head = ad["scalar"]
+        ad.append({k: v[0] for k, v in ad.items()})
+        ad.extend(ad[1:3].copy())
+        assert ad == expected
+        assert ad.array_length == 6
+        assert np.array_equal(head, [1, 2, 3])
+
+        capacity = len(ad._buffers["scalar"])
+        for _ in range(capacity - 6):
+            ad.append(ad[0])
+        assert len(ad._buffers["scalar"]) == capacity
+        ad.append(ad[0])
+        assert len(ad._buffers["scalar"]) == 2 * capacity
+
+        ad["scalar"] = np.zeros(ad.array_length, dtype=int)
+        ad.append(ad[0])
+        assert ad["scalar"].shape == (capacity + 2,)
+        assert ad["vectorial"].base is ad._buffers["vectorial"]
+
+        ad.shrink_to_fit()
+        assert ad["vectorial"].base is None
+        assert ad.array_length == capacity + 2
+
+        with pytest.raises(KeyError):
+            ad.append({"scalar": 1})
+
+        empty = ArrayDict()
+        empty.append({"t": 0, "x": [1.0, 2.0]})
+        empty.extend({"t": [1, 2], "x": np.ones((2, 2))})
+        assert empty["x"].shape == (3, 2)
+        assert empty["t"].tolist() == [0, 1, 2]
+
+        # rows that do not fit are refused instead of broadcast
+        pair = ArrayDict({"a": [0], "b": [0]})
+        with pytest.raises(ValueError):
+            pair.extend({"a": [1, 2, 3], "b": [9]})
+        with pytest.raises(ValueError):
+            pair.extend({"a": 1, "b": 2})
+        assert pair["b"].tolist() == [0]
+        with pytest.raises(ValueError):
+            empty.append({"t": 3, "x": 5})
+        with pytest.raises(ValueError):
+            empty.extend({"t": [3], "x": np.ones((1, 3))})
+        assert empty.array_length == 3
+
+        # values are promoted like concat does, never cast unsafely
+        ints = ArrayDict({"i": [1, 2]})
+        ints.extend({"i": [0.9, 1e20]})
+        assert ints["i"].dtype == np.float64 and ints["i"].tolist() == [1, 2, 0.9, 1e20]
+        small = ArrayDict({"u": np.array([1], dtype=np.uint8), "f": np.array([0.5], dtype=np.float32)})
+        small.append({"u": 2, "f": 1.5})
+        assert small["u"].dtype == np.uint8 and small["f"].dtype == np.float32
+        small.append({"u": 300, "f": 2.5})
+        assert small["u"].tolist() == [1, 2, 300]
+        # and a row that does not fit leaves every column as it was
+        pair = ArrayDict({"a": [1, 2], "b": [1, 2]})
+        with pytest.raises(ValueError):
+            pair.append({"a": 3, "b": "oops"})
+        with pytest.raises(ValueError):
+            ArrayDict({"s": ["x"]}).extend({"s": [1]})
+        assert pair.array_length == 2 and pair["a"].tolist() == [1, 2]
+
     def test_to_hdf5(self, ad, tmp_path):
         """
         Test the to_hdf5 method of ArrayDict.
@@ -138,3 +329,477 @@ class TestNumpy:
             assert "vectorial" in f
             assert np.array_equal(f["scalar"][:], ad["scalar"])
             assert np.array_equal(f["vectorial"][:], ad["vectorial"])
+
+    def test_to_hdf5_options(self, ad, tmp_path):
+
+        path = ad.to_hdf5(tmp_path / "test.h5", chunks=2, compression="gzip", compression_opts=4, resizable=True)
+        with h5py.File(path, "r") as f:
+            assert f["tensorial"].chunks == (2, 3, 3)
+            assert f["tensorial"].compression_opts == 4
+            assert f["tensorial"].maxshape == (None, 3, 3)
+            assert np.array_equal(f["tensorial"][:], ad["tensorial"])
+
+    def test_append_hdf5(self, ad, tmp_path):
+
+        path = tmp_path / "test.h5"
+        ad.to_hdf5(path, resizable=True)
+        ad.append_hdf5(path)
+        ad.append_hdf5(str(path), include=["scalar"])
+        with h5py.File(path, "r") as f:
+            assert f["scalar"].shape == (9,)
+            assert f["vectorial"].shape == (6, 3)
+            assert np.array_equal(f["vectorial"][3:], ad["vectorial"])
+
+        new = tmp_path / "new.h5"
+        ad.append_hdf5(new)
+        ad.append_hdf5(new)
+        with h5py.File(new, "r") as f:
+            assert f["tensorial"].shape == (6, 3, 3)
+
+    def test_from_hdf5(self, ad, tmp_path):
+
+        path = ad.to_hdf5(tmp_path / "test.h5")
+        assert ArrayDict.from_hdf5(path, lazy=False) == ad
+
+        lazy = ArrayDict.from_hdf5(path)
+        assert lazy.array_length == 3
+        assert lazy[1:] == ad[1:]
+        assert lazy[-1] == ad[-1]
+        assert lazy[::-1] == ad[::-1]
+        index = np.array([2, 0, 2])
+        assert lazy[index] == ad[index]
+        mask = np.array([True, False, True])
+        assert lazy[mask] == ad[mask]
+        assert lazy == ad
+        assert lazy[1:] == ad[1:]
+
+        # the file opened from the path is the lazy ArrayDict's to close
+        lazy.close()
+        ad.to_hdf5(path)
+        with ArrayDict.from_hdf5(path) as lazy:
+            file = lazy._data.file
+            assert lazy == ad
+        assert not file
+        with h5py.File(path, "r") as f:
+            lazy = ArrayDict.from_hdf5(f)
+            lazy.close()
+            assert f and lazy == ad
+
+    def test_save_open(self, ad, tmp_path):
+
+        ad["label"] = np.array(["a", "b", "c"])
+        path = ad.save(tmp_path / "ad")
+        assert (path / "manifest.json").exists()
+
+        opened = ArrayDict.open(path)
+        assert list(opened.keys()) == list(ad.keys())
+        assert isinstance(opened["tensorial"], np.memmap)
+        assert opened[["scalar", "vectorial", "tensorial"]] == ad[["scalar", "vectorial", "tensorial"]]
+        assert isinstance(opened[1:]["vectorial"], np.memmap)
+        assert opened["label"].tolist() == ["a", "b", "c"]
+        with pytest.raises(ValueError):
+            opened["scalar"][0] = 0
+
+        loaded = ArrayDict.open(path, mmap=False)
+        assert not isinstance(loaded["scalar"], np.memmap)
+
+        writable = ArrayDict.open(path, mmap="r+")
+        writable["scalar"][0] = 10
+        writable["scalar"].flush()
+        assert ArrayDict.open(path)["scalar"][0] == 10
+
+        subset = ad.save(tmp_path / "subset", include=["scalar"])
+        assert list(ArrayDict.open(subset).keys()) == ["scalar"]
+        with pytest.raises(ValueError):
+            ArrayDict.open(tmp_path)
+
+    def test_arrow(self, ad):
+
+        pa = pytest.importorskip("pyarrow")
+        table = ad.to_arrow()
+        assert table.num_rows == 3
+        assert table.schema.field("tensorial").type.list_size == 3
+        result = ArrayDict.from_arrow(table)
+        assert result == ad
+        assert result["tensorial"].shape == (3, 3, 3)
+        assert np.shares_memory(result["tensorial"], ad["tensorial"])
+
+        sliced = ArrayDict.from_arrow(table.slice(1, 2))
+        assert sliced == ad[1:]
+        labels = ArrayDict.from_arrow(pa.table({"s": ["a", None, "c"], "i": [1, None, 3]}))
+        assert labels["s"].tolist() == ["a", "", "c"]
+        assert np.isnan(labels["i"][1])
+
+    def test_ipc(self, ad, tmp_path):
+
+        pytest.importorskip("pyarrow")
+        feather = pytest.importorskip("pyarrow.feather")
+        path = ad.to_ipc(tmp_path / "ad.arrow", batch_size=2)
+        assert ArrayDict.from_ipc(path) == ad
+        assert ArrayDict.from_ipc(str(path)) == ad
+        assert [chunk.array_length for chunk in ArrayDict.iter_ipc(path)] == [2, 1]
+        assert feather.read_table(path).num_rows == 3
+
+        feather.write_feather(ad.to_arrow(exclude=["tensorial"]), tmp_path / "ad.feather")
+        assert ArrayDict.from_ipc(tmp_path / "ad.feather") == ad[["scalar", "vectorial"]]
+
+        buffer = io.BytesIO()
+        ArrayDict.write_ipc(buffer, ad.iterbatches(1), compression="zstd")
+        buffer.seek(0)
+        chunks = list(ArrayDict.iter_ipc(buffer))
+        assert len(chunks) == 3
+        assert ArrayDict().concat(chunks) == ad
+        assert ArrayDict.from_ipc(buffer.getvalue()) == ad
+
+    def test_groupby(self):
+
+        rng = np.random.default_rng(0)
+        ad = ArrayDict({
+            "mol": rng.integers(0, 5, 100),
+            "chain": rng.integers(0, 2, 100),
+            "q": rng.random(100),
+            "pos": rng.random((100, 3)),
+            "flag": rng.random(100) > 0.5,
+        })
+        result = ad.groupby("mol").agg({"q": ["sum", "mean", "min", "max", "count", "first"], "pos": "mean", "flag": "sum"})
+        assert result["mol"].tolist() == [0, 1, 2, 3, 4]
+        for i, mol in enumerate(result["mol"]):
+            rows = ad[ad["mol"] == mol]
+            assert np.isclose(result["q_sum"][i], rows["q"].sum())
+            assert np.isclose(result["q_mean"][i], rows["q"].mean())
+            assert result["q_min"][i] == rows["q"].min()
+            assert result["q_max"][i] == rows["q"].max()
+            assert result["q_count"][i] == rows.array_length
+            assert result["q_first"][i] == rows["q"][0]
+            assert np.allclose(result["pos"][i], rows["pos"].mean(axis=0))
+            assert result["flag"][i] == rows["flag"].sum()
+
+        grouped = ad.groupby(["mol", "chain"])
+        result = grouped.agg({"q": "count"})
+        pairs = sorted(set(zip(ad["mol"].tolist(), ad["chain"].tolist())))
+        assert len(grouped) == len(pairs)
+        assert list(zip(result["mol"].tolist(), result["chain"].tolist())) == pairs
+        assert result["q"].sum() == 100
+
+        empty = ad[:0].groupby("mol").agg({"pos": ["mean", "count"]})
+        assert empty["pos_mean"].shape == (0, 3)
+        assert empty["pos_count"].shape == (0,)
+
+        with pytest.raises(ValueError):
+            ad.groupby("mol").agg({"q": "median"})
+        with pytest.raises(ValueError):
+            ad.groupby("pos")
+
+    @pytest.mark.parametrize("kind", ["sorted", "hash"])
+    def test_set_index(self, kind):
+
+        ids = np.array([40, 10, 30, 20, 30])
+        ad = ArrayDict({"id": ids, "x": np.arange(5.0), "pos": np.arange(15.0).reshape(5, 3)})
+        with pytest.raises(KeyError):
+            ad.loc[10]
+        assert ad.set_index("id", kind=kind) is ad
+
+        assert ad.loc[10]["x"].tolist() == [1.0]
+        assert ad.loc[30]["x"].tolist() == [2.0, 4.0]
+        assert ad.loc[np.int64(20)]["pos"].tolist() == [[9.0, 10.0, 11.0]]
+        assert ad.loc[[40, 30, 10]]["x"].tolist() == [0.0, 2.0, 4.0, 1.0]
+        assert ad.loc[np.array([20, 10])]["id"].tolist() == [20, 10]
+        assert ad.loc[20:30]["id"].tolist() == [20, 30, 30]
+        assert ad.loc[:15]["id"].tolist() == [10]
+        assert ad.loc[35:]["id"].tolist() == [40]
+        with pytest.raises(KeyError):
+            ad.loc[15]
+        with pytest.raises(KeyError):
+            ad.loc[[10, 15]]
+
+        ad["id"] = np.array([1, 2, 3, 4, 5])
+        assert ad.loc[5]["x"].tolist() == [4.0]
+        ad.append({"id": 6, "x": 5.0, "pos": np.zeros(3)})
+        assert ad.loc[6]["x"].tolist() == [5.0]
+        ad[0:1] = ArrayDict({"id": [7], "x": [0.0], "pos": [[0.0, 0.0, 0.0]]})
+        assert ad.loc[7]["x"].tolist() == [0.0]
+        ad.concat(ad.loc[[7]])
+        assert ad.loc[7].array_length == 2
+
+        with pytest.raises(ValueError):
+            ad.set_index("id", kind="btree")
+        with pytest.raises(ValueError):
+            ad.set_index("pos")
+
+    def test_merge(self):
+
+        frames = ArrayDict({
+            "res": np.array([3, 1, 2, 9, 1]),
+            "x": np.arange(5.0),
+            "pos": np.arange(10.0).reshape(5, 2),
+        })
+        residues = ArrayDict({
+            "res": np.array([1, 2, 3, 2]),
+            "name": np.array(["ALA", "GLY", "SER", "PRO"]),
+            "charge": np.array([0, 1, -1, 2]),
+            "x": np.array([10.0, 20.0, 30.0, 40.0]),
+        })
+
+        inner = frames.merge(residues, on="res")
+        assert list(inner.keys()) == ["res", "x_x", "pos", "name", "charge", "x_y"]
+        assert inner["res"].tolist() == [3, 1, 2, 2, 1]
+        assert inner["name"].tolist() == ["SER", "ALA", "GLY", "PRO", "ALA"]
+        assert inner["x_x"].tolist() == [0.0, 1.0, 2.0, 2.0, 4.0]
+        assert inner["pos"].tolist() == [[0.0, 1.0], [2.0, 3.0], [4.0, 5.0], [4.0, 5.0], [8.0, 9.0]]
+        assert inner["charge"].dtype == residues["charge"].dtype
+
+        left = frames.merge(residues, on="res", how="left")
+        assert left["res"].tolist() == [3, 1, 2, 2, 9, 1]
+        assert left["name"].tolist() == ["SER", "ALA", "GLY", "PRO", "", "ALA"]
+        assert np.isnan(left["x_y"][4]) and np.isnan(left["charge"][4])
+        assert left["charge"].dtype == np.float64
+        filled = frames.merge(residues, on="res", how="left", fill_value=0)
+        assert filled["charge"].tolist() == [-1, 0, 1, 2, 0, 0]
+        assert frames.merge(residues[:0], on="res", how="left")["name"].tolist() == [""] * 5
+        assert frames.merge(residues[:0], on="res").array_length == 0
+
+        names = ArrayDict({"name": np.array(["GLY", "ALA"]), "size": np.array([1, 5])})
+        assert inner.merge(names, on="name")["size"].tolist() == [5, 1, 5]
+        sparse = ArrayDict({"res": np.array([1, 10**9]), "seen": np.array([True, True])})
+        assert frames.merge(sparse, on="res", how="left", fill_value=False)["seen"].tolist() == [False, True, False, False, True]
+
+        residues.set_index("res")
+        assert frames.merge(residues, on="res")["name"].tolist() == inner["name"].tolist()
+
+        bonds = ArrayDict({"a": [0, 0, 1], "b": [1, 2, 2], "order": [1, 2, 1]})
+        pairs = ArrayDict({"a": [1, 0, 2], "b": [2, 2, 0], "w": [0.5, 1.5, 2.5]})
+        joined = pairs.merge(bonds, on=["a", "b"], how="left", fill_value=-1)
+        assert joined["order"].tolist() == [1, 2, -1]
+        assert joined["w"].tolist() == [0.5, 1.5, 2.5]
+
+        with pytest.raises(ValueError):
+            frames.merge(residues, on="res", how="outer")
+        with pytest.raises(ValueError):
+            frames.merge(frames, on="pos")
+
+    def test_query(self):
+
+        rng = np.random.default_rng(0)
+        ad = ArrayDict({
+            "a": rng.integers(0, 10, 1000),
+            "b": rng.random(1000),
+            "pos": rng.random((1000, 3)),
+            "name": rng.choice(["C", "N", "O"], 1000),
+        })
+        mask = (ad["a"] > 3) & (ad["b"] < 0.5)
+        for block_rows in (None, 7, 1000):
+            result = ad.query("a > 3 & b < 0.5", block_rows=block_rows)
+            assert list(result.keys()) == list(ad.keys())
+            assert result["a"].tolist() == ad["a"][mask].tolist()
+            assert np.array_equal(result["pos"], ad["pos"][mask])
+
+        result = ad.query("a > 3 & b < 0.5", columns=["pos"])
+        assert list(result.keys()) == ["pos"]
+        assert ad.query("a in [1, 2] | ~(name == 'C')")["a"].tolist() == ad["a"][np.isin(ad["a"], [1, 2]) | (ad["name"] != "C")].tolist()
+        assert ad.query("2 <= a < 4 and not b * 2 > 1")["a"].tolist() == ad["a"][(ad["a"] >= 2) & (ad["a"] < 4) & (ad["b"] <= 0.5)].tolist()
+        assert ad.query("a - 1 == -1")["a"].tolist() == ad["a"][ad["a"] == 0].tolist()
+        assert ad.query("a not in (0, 1, 2, 3, 4, 5, 6, 7, 8, 9)").array_length == 0
+        assert ad[:0].query("a > 3")["pos"].shape == (0, 3)
+
+        compact = ad.copy()
+        expected = ad.query("a > 3 & b < 0.5", columns=["a", "pos"])
+        assert compact.query("a > 3 & b < 0.5", columns=["a", "pos"], inplace=True, block_rows=64) is compact
+        assert list(compact.keys()) == ["a", "pos"]
+        assert compact == expected
+        compact.append({"a": 1, "pos": np.zeros(3)})
+        assert compact["a"][-1] == 1 and compact.array_length == expected.array_length + 1
+        assert compact.query("a >= 0", inplace=True).array_length == expected.array_length + 1
+        # owned buffers are compacted in place
+        buffer = compact._buffers["a"]
+        compact.query("a > 3", inplace=True, block_rows=64)
+        assert compact["a"].base is buffer
+
+        # arrays that may be shared are left untouched
+        base = ArrayDict({"a": np.arange(10)})
+        for shared in (base[0:6], base[["a"]], next(base.iterbatches(6))):
+            odd = [a for a in shared["a"].tolist() if a % 2]
+            assert shared.query("a % 2 == 1", inplace=True)["a"].tolist() == odd
+            assert base["a"].tolist() == list(range(10))
+        mine = np.arange(10)
+        passed = ArrayDict({"a": mine}, copy=False)
+        passed.query("a % 2 == 1", inplace=True)
+        passed.append({"a": 11})
+        assert mine.tolist() == list(range(10)) and passed["a"].tolist() == [1, 3, 5, 7, 9, 11]
+
+        with pytest.raises(KeyError):
+            ad.query("c > 1")
+        with pytest.raises(KeyError):
+            ad.query("a > 1", columns=["c"])
+        with pytest.raises(ValueError):
+            ad.query("a.max() > 1")
+        with pytest.raises(ValueError):
+            ad.query("a +")
+        with pytest.raises(ValueError):
+            ad.query("a + 1")
+        with pytest.raises(ValueError):
+            ad.query("pos > 0.5")
+
+    def test_schema(self):
+
+        schema = {"id": np.int64, "pos": (np.float32, 3), "name": str}
+        ad = ArrayDict(schema=schema)
+        assert ad.array_length == 0
+        assert ad["pos"].shape == (0, 3) and ad["pos"].dtype == np.float32
+        ad.append({"id": 1, "pos": [0, 1, 2], "name": "CA"})
+        ad.extend({"id": [2, 3], "pos": np.ones((2, 3)), "name": ["N", "OXT"]})
+        assert ad.array_length == 3
+        assert ad["name"].tolist() == ["CA", "N", "OXT"]
+        assert ad.schema["pos"].shape == (3,)
+        with pytest.raises(ValueError):
+            ad.append({"id": 1.7, "pos": [0, 1, 2], "name": "CB"})
+        with pytest.raises(ValueError):
+            ad.append({"id": 4, "pos": [0, 1, 2], "name": 5})
+        with pytest.raises(ValueError):
+            ad.extend({"id": [4], "pos": np.ones((1, 2)), "name": ["CB"]})
+        assert ad.array_length == 3 and ad["id"].tolist() == [1, 2, 3]
+
+        ad["id"] = np.array([4, 5, 6], dtype=np.int32)
+        assert ad["id"].dtype == np.int64
+        ad["pos"] = [[0, 0, 0]] * 3
+        assert ad["pos"].dtype == np.float32
+        ad["name"] = np.array(["CA", "CB", "CG"])
+        with pytest.raises(ValueError):
+            ad["id"] = np.array([1.5, 2.5, 3.5])
+        with pytest.raises(ValueError):
+            ad["pos"] = np.zeros((3, 2))
+        with pytest.raises(ValueError):
+            ad["name"] = np.arange(3)
+        with pytest.raises(KeyError):
+            ArrayDict({"id": [1]}, schema=schema)
+
+        view = ad[1:]
+        assert view.array_length == 2 and view.schema == ad.schema
+        with pytest.raises(ValueError):
+            view["id"] = np.array([1.5, 2.5])
+        assert ad[["id"]].schema == {"id": ad.schema["id"]}
+        assert ad.copy().schema == ad.schema
+        assert ArrayDict({"a": [1]}).schema is None
+
+        ad.concat([ad, ad[:1]])
+        assert ad.array_length == 7 and len(ad["name"]) == 7
+        ad.update({"id": [1], "pos": np.zeros((1, 3)), "name": ["X"]})
+        assert ad.array_length == 1
+        for key in list(ad.keys()):
+            del ad[key]
+        assert ad.array_length == 0
+
+    def test_fingerprint(self, ad):
+
+        first = ad.fingerprint()
+        assert first == ad.fingerprint()
+        same = ArrayDict({k: ad[k] for k in reversed(list(ad.keys()))})
+        assert same.fingerprint() == first
+        assert ad[:2].fingerprint() != first
+
+        digests = dict(ad._digests)
+        ad["scalar"] = np.array([1, 2, 4])
+        assert ad._fingerprint is None and "scalar" not in ad._digests
+        assert ad._digests["vectorial"] is digests["vectorial"]
+        changed = ad.fingerprint()
+        assert changed != first
+        ad[0:1] = ad[0:1].copy()
+        assert ad.fingerprint() == changed
+        ad.append({k: v[0] for k, v in ad.items()})
+        assert ad.fingerprint() != changed
+
+        # equality stops early, and compares str columns exactly
+        other = ad.copy()
+        assert ad == other and ad == ad
+        other["vectorial"][0, 0] += 1
+        assert ad != other
+        names = ArrayDict({"name": ["C", "N"]})
+        assert names == ArrayDict({"name": ["C", "N"]})
+        assert names != ArrayDict({"name": ["C", "O"]})
+        assert names.fingerprint() == ArrayDict({"name": ["C", "N"]}).fingerprint()
+
+        # writes in place are seen by fingerprints and equality
+        a, b = ArrayDict({"x": np.arange(3)}), ArrayDict({"x": np.arange(3)})
+        assert a.fingerprint() == b.fingerprint() and a == b
+        a["x"][0] = 99
+        assert a != b and a.fingerprint() != b.fingerprint()
+        a["x"][0] = 0
+        assert a == b and a.fingerprint() == b.fingerprint()
+        frozen = np.arange(3)
+        frozen.flags.writeable = False
+        c = ArrayDict({"x": frozen}, copy=False)
+        c.fingerprint()
+        digest = c._digests["x"]
+        assert c.fingerprint() == b.fingerprint() and c._digests["x"] is digest
+
+    def test_shared_memory(self, ad):
+
+        import multiprocessing
+        import pickle
+
+        ad["name"] = np.array(["C", "N", "O"])
+        with ad.to_shared_memory() as handle:
+            assert handle.length == 3 and len(pickle.dumps(handle)) < 1024
+            shared = ArrayDict.attach(pickle.loads(pickle.dumps(handle)))
+            assert shared == ad
+            assert shared["name"].tolist() == ["C", "N", "O"]
+            assert all(v.ctypes.data % 64 == 0 for v in shared.values())
+            with pytest.raises(ValueError):
+                shared["scalar"][0] = 0
+
+            writable = ArrayDict.attach(handle, readonly=False)
+            writable["scalar"][0] = 10
+            assert shared["scalar"][0] == 10
+            with pytest.raises(BufferError):
+                handle.close()
+
+            if "fork" in multiprocessing.get_all_start_methods():
+                with multiprocessing.get_context("fork").Pool(1) as pool:
+                    assert pool.apply(_shared_sum, (handle,)) == shared["vectorial"].sum()
+            del shared, writable
+        handle.close()
+        with pytest.raises(FileNotFoundError):
+            ArrayDict.attach(handle)
+
+        with pytest.raises(ValueError):
+            ArrayDict({"x": np.array([None])}).to_shared_memory()
+        with ArrayDict({"x": np.zeros((0, 3))}).to_shared_memory() as empty:
+            assert ArrayDict.attach(empty)["x"].shape == (0, 3)
+
+    @pytest.mark.parametrize("backend", ["thread", "process"])
+    def test_map_batches(self, backend):
+        ad = ArrayDict({"x": np.arange(10.0), "pos": np.random.rand(10, 3)})
+        result = ad.map_batches(_positive_norms, batch_size=3, workers=2, backend=backend)
+        assert result == _positive_norms(ad)
+        assert ad.map_batches(_positive_norms, workers=1, backend=backend) == _positive_norms(ad)
+        assert ad.map_batches(_positive_norms, batch_size=4, workers=2, backend=backend)["x"].tolist() == list(range(1, 10))
+
+        # the result may view the batch; it outlives the shared block
+        assert ad.map_batches(_select_pos, batch_size=4, workers=2, backend=backend) == ad[["pos"]]
+        names = ArrayDict({"name": np.array(["C", None, "O"], dtype=object)})
+        assert names.map_batches(_select_name, batch_size=2, workers=2, backend=backend) == names
+        empty = ad[:0].map_batches(_positive_norms, workers=2, backend=backend)
+        assert empty.array_length == 0 and list(empty.keys()) == ["x", "norm"]
+
+        with pytest.raises(ValueError):
+            ad.map_batches(_positive_norms, backend="gpu")
+        with pytest.raises(ValueError):
+            ad.map_batches(_positive_norms, batch_size=0, backend=backend)
+        with pytest.raises(TypeError):
+            ad.map_batches(len, batch_size=5, workers=2, backend=backend)
+
+
+def _positive_norms(batch):
+    rows = batch["x"] > 0
+    return {"x": batch["x"][rows], "norm": np.linalg.norm(batch["pos"][rows], axis=1)}
+
+
+def _select_pos(batch):
+    return batch[["pos"]]
+
+
+def _select_name(batch):
+    return batch[["name"]]
+
+
+def _shared_sum(handle):
+    return ArrayDict.attach(handle)["vectorial"].sum()
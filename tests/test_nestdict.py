@@ -1,6 +1,7 @@
 import pytest
 import numpy as np
-from nesteddict import NestDict
+from collections.abc import MutableMapping
+from nesteddict import ArrayDict, FlatNestDict, NestDict, concat, memoize
 import io
 try:
     import h5py
@@ -9,14 +10,15 @@ except ImportError:
 
 class TestNestDict:
 
-    @pytest.fixture(scope="function", name="nd")
-    def test_init(self):
+    @pytest.fixture(scope="function", name="nd", params=["nested", "flat"])
+    def test_init(self, request):
         return NestDict(
             {
                 "a1": 1,
                 "a2": {"b1": 2, "b2": {"c1": 3, "c2": {"d1": 4, "d2": 5}}},
                 3: "a",
-            }
+            },
+            storage=request.param,
         )
 
     def test_init_failed(self):
@@ -45,6 +47,79 @@ class TestNestDict:
         assert NestDict({"a": 1}) == {"a": 1}
         assert NestDict({"a": {"b": 2}}) != {"a": {"b": 1}}
 
+        tree = NestDict({"x": {"pos": np.zeros((2, 3)), "ids": [np.arange(2)]}, "t": 0.5})
+        assert tree == {"t": 0.5, "x": {"pos": np.zeros((2, 3)), "ids": [np.arange(2)]}}
+        assert tree != {"t": 0.5, "x": {"pos": np.ones((2, 3)), "ids": [np.arange(2)]}}
+        assert tree != {"t": 0.5, "x": {"pos": np.zeros((2, 3))}}
+        assert tree == tree.snapshot()
+        assert tree != 1
+
+    def test_fingerprint(self, nd):
+
+        pos = np.random.rand(10, 3)
+        nd["pos"] = pos
+        nd[["a2", "table"]] = ArrayDict({"x": np.arange(4)})
+        first = nd.fingerprint()
+        assert first == nd.fingerprint()
+        plain = {
+            "a1": 1,
+            "a2": {"b1": 2, "b2": {"c1": 3, "c2": {"d1": 4, "d2": 5}}, "table": ArrayDict({"x": np.arange(4)})},
+            3: "a",
+            "pos": pos.copy(),
+        }
+        assert NestDict(plain).fingerprint() == first
+        assert NestDict(plain, storage="flat").fingerprint() == first
+
+        nd.set("a2.b2.c1", 4)
+        assert nd.fingerprint() != first
+        nd.set("a2.b2.c1", 3)
+        assert nd.fingerprint() == first
+
+        # only the replaced array is hashed again
+        cached = dict(nd._digests)
+        nd["pos"] = pos + 1
+        changed = nd.fingerprint()
+        assert changed != first
+        assert all(nd._digests[path][0] is leaf for path, (leaf, _) in cached.items() if path != ("pos",))
+        nd["a2"]["b1"] = 3  # a write on a child node is seen too
+        assert nd.fingerprint() != changed
+
+        nd[["a2", "table"]]["x"] = np.arange(1, 5)
+        assert nd.fingerprint() != changed
+        with pytest.raises(TypeError):
+            NestDict({"f": lambda x: x}).fingerprint()
+
+    def test_memoize(self):
+
+        calls = []
+
+        @memoize(maxsize=2)
+        def norm(tree, scale=1.0):
+            calls.append(1)
+            return sum(np.abs(v).sum() for _, v in tree.iter_items()) * scale
+
+        a = NestDict({"x": np.arange(3), "y": {"z": np.ones(2)}})
+        assert norm(a) == 5.0
+        assert norm(NestDict({"y": {"z": np.ones(2)}, "x": np.arange(3)})) == 5.0
+        assert len(calls) == 1
+        assert norm(a, scale=2.0) == 10.0
+        assert len(calls) == 2
+        a.set("y.z", np.zeros(2))
+        assert norm(a) == 3.0
+        assert len(calls) == 3
+        norm.cache_clear()
+        norm(a)
+        assert len(calls) == 4
+
+        # a write in place is a new key, and makes the trees unequal
+        b = NestDict({"x": np.arange(3), "y": {"z": np.zeros(2)}})
+        assert a == b
+        a["x"][0] = 3
+        assert norm(a) == 6.0
+        assert len(calls) == 5
+        assert a != b
+        assert a.fingerprint() != b.fingerprint()
+
     def test_bool(self, nd):
         assert nd
         assert not NestDict()
@@ -56,6 +131,14 @@ class TestNestDict:
         assert nd[["a2", "b2", "c1"]] == 3
         assert nd[["a2", "b2", "c2", "d1"]] == 4
 
+        # interior nodes are mappings whose writes reach the tree, `copy` gives a plain dict
+        node = nd["a2"]
+        assert isinstance(node, MutableMapping)
+        assert type(node) is (dict if nd.storage == "nested" else FlatNestDict)
+        assert type(node.copy()) is dict and node.copy()["b1"] == 2
+        node["b1"] = 20
+        assert nd[["a2", "b1"]] == 20
+
     def test_setitem(self, nd):
 
         nd["a1"] = 10
@@ -105,6 +188,89 @@ class TestNestDict:
         assert ("a1",) in fd
         assert ("a2", "b1") in fd
 
+    def test_path(self, nd):
+
+        path = NestDict.path("a2.b2.c1")
+        assert path is NestDict.path("a2.b2.c1")
+        assert NestDict.path(path) is path
+        assert nd[path] == 3
+        assert path in nd
+        assert NestDict.path("a2.b3") not in nd
+
+        nd[NestDict.path("a3.b1")] = 50
+        assert nd[["a3", "b1"]] == 50
+        assert nd.get(NestDict.path("a3.b1")) == 50
+
+        del nd[path]
+        assert "c1" not in nd[["a2", "b2"]]
+        with pytest.raises(KeyError):
+            nd[path]
+
+    def test_path_separator(self, nd):
+
+        path = NestDict.path("a2/b2/c2/d1", sep="/")
+        assert path.keys == ("a2", "b2", "c2", "d1")
+        assert nd.get("a2/b2/c2/d1", sep="/") == 4
+        assert nd[NestDict.path(["a2", "b1"])] == 2
+
+    def test_iter_items(self, nd):
+
+        items = list(nd.iter_items())
+        assert items[0] == (("a1",), 1)
+        assert items[-1] == ((3,), "a")
+        assert list(nd.iter_items("a2.b2.c2")) == [
+            (("a2", "b2", "c2", "d1"), 4),
+            (("a2", "b2", "c2", "d2"), 5),
+        ]
+        assert list(nd.iter_items(["a2", "b1"])) == [(("a2", "b1"), 2)]
+        assert list(nd.iter_leaves()) == [1, 2, 3, 4, 5, "a"]
+
+    def test_iter_items_deep(self):
+
+        nd = NestDict()
+        nd[["k"] * 5000] = 1
+        assert list(nd.iter_items()) == [(("k",) * 5000, 1)]
+
+    def test_unflatten(self, nd):
+
+        fd = nd.flatten()
+        assert NestDict.unflatten(fd) == nd
+        assert NestDict.unflatten({"a.b": 1, "a.c": 2}) == {"a": {"b": 1, "c": 2}}
+        assert NestDict.unflatten({"a/b": 1}, sep="/") == {"a": {"b": 1}}
+        assert NestDict.unflatten({"a.b": 1}, sep=None) == {"a.b": 1}
+
+    def test_get_many(self, nd):
+
+        paths = ["a2.b2.c1", "a2.b1", ["a2", "b2", "c2", "d2"], "a3.b1", "a2.b2"]
+        values = nd.get_many(paths)
+        assert values[:4] == [3, 2, 5, None]
+        assert values[4] == nd[["a2", "b2"]]
+        assert nd.get_many([NestDict.path("a1"), "a1"]) == [1, 1]
+        assert nd.get_many(["a1.x", "a2.b1.c1", "a2.b1"]) == [None, None, 2]
+
+    def test_set_many(self, nd):
+
+        nd.set_many({"a2.b2.c1": 30, "a2.b1": 20, ("a3", "b1"): 50, "a3/b2": 60}, sep="/")
+        assert nd[["a2", "b2"]]["c1"] == 3
+        assert nd["a2.b2.c1"] == 30
+        assert nd[["a3", "b1"]] == 50
+        assert nd[["a3", "b2"]] == 60
+
+        nd.set_many({"a2.b2.c1": 30, "a2.b1": 20, "a4.b1.c1": 70})
+        assert nd.get_many(["a2.b2.c1", "a2.b1", "a4.b1.c1"]) == [30, 20, 70]
+        assert isinstance(nd["a4"], NestDict)
+
+        # a path below another one: the later write wins, as with `set` in order
+        nd.set_many({"a5.b": 1, "a5": 5})
+        assert nd["a5"] == 5
+        with pytest.raises(TypeError):
+            nd.set_many({"a6": 5, "a6.b": 1})
+        assert nd["a6"] == 5
+        nd.track_changes()
+        nd.set_many({"a7.b.c": 1, "a7.b": {"d": 2}, "a7.b.e": 3})
+        assert nd["a7"]["b"] == {"d": 2, "e": 3}
+        assert nd.changes() == {("a7", "b")}
+
     def test_get(self, nd):
 
         assert nd.get("a1") == 1
@@ -170,23 +336,33 @@ class TestNestDict:
         assert new_nd[["a2", "b2", "c1"]] == 3
         assert new_nd[["a2", "b2", "c2", "d1"]] == 4
 
-    def test_concat_lists(self):
-        a = NestDict({'x': [1, 2]})
-        b = NestDict({'x': [3, 4]})
+    @pytest.mark.parametrize("storage", ["nested", "flat"])
+    def test_concat_lists(self, storage):
+        a = NestDict({'x': [1, 2]}, storage=storage)
+        b = NestDict({'x': [3, 4]}, storage=storage)
         a.concat(b)
-        assert a._data['x'] == [1, 2, 3, 4]
+        assert a['x'] == [1, 2, 3, 4]
 
-    def test_concat_numpy_arrays(self):
-        a = NestDict({'x': np.array([1, 2])})
-        b = NestDict({'x': np.array([3, 4])})
+    @pytest.mark.parametrize("storage", ["nested", "flat"])
+    def test_concat_numpy_arrays(self, storage):
+        a = NestDict({'x': np.array([1, 2])}, storage=storage)
+        b = NestDict({'x': np.array([3, 4])}, storage=storage)
         a.concat(b)
-        np.testing.assert_array_equal(a._data['x'], np.array([1, 2, 3, 4]))
+        np.testing.assert_array_equal(a['x'], np.array([1, 2, 3, 4]))
 
-    def test_concat_nested_dict(self):
-        a = NestDict({'x': {'a': 1}})
-        b = NestDict({'x': {'b': 2}})
+    @pytest.mark.parametrize("storage", ["nested", "flat"])
+    def test_concat_nested_dict(self, storage):
+        a = NestDict({'x': {'a': 1}}, storage=storage)
+        b = NestDict({'x': {'b': 2}}, storage=storage)
         a.concat(b)
-        assert a._data['x'] == {'a': 1, 'b': 2}
+        assert a['x'] == {'a': 1, 'b': 2}
+
+        # dict children are merged, not concatenated, whatever the storage
+        a = NestDict({'a': {'b': np.arange(2)}}, storage=storage)
+        np.testing.assert_array_equal(concat([a, a])[['a', 'b']], [0, 1])
+        np.testing.assert_array_equal((a + a)[['a', 'b']], [0, 1])
+        assert a.get('a.b.c') is None and a.get_many(['a.b.c']) == [None]
+        assert NestDict({'c': 1}, storage=storage).get('c.d') is None
 
     def test_concat_nested_nestdict(self):
         a = NestDict({'x': NestDict({'a': [1]})})
@@ -194,24 +370,61 @@ class TestNestDict:
         a.concat(b)
         assert a._data['x']._data['a'] == [1, 2, 3]
 
-    def test_missing_key_raises(self):
-        a = NestDict({'x': [1]})
-        b = NestDict({'y': [2]})
+    @pytest.mark.parametrize("storage", ["nested", "flat"])
+    def test_missing_key_raises(self, storage):
+        a = NestDict({'x': [1]}, storage=storage)
+        b = NestDict({'y': [2]}, storage=storage)
         with pytest.raises(KeyError):
             a.concat(b)
 
-    def test_incompatible_type_raises(self):
-        a = NestDict({'x': [1]})
+    @pytest.mark.parametrize("storage", ["nested", "flat"])
+    def test_incompatible_type_raises(self, storage):
+        a = NestDict({'x': [1]}, storage=storage)
         b = NestDict({'x': {'a': [1]}})
         a.concat(b, {dict: lambda x, y: x + y['a']})
         assert a['x'] == [1, 1]
 
-    def test_multiple_concat(self):
-        a = NestDict({'x': [1]})
-        b = NestDict({'x': [2, 3]})
-        c = NestDict({'x': [4, 5]})
+    @pytest.mark.parametrize("storage", ["nested", "flat"])
+    def test_multiple_concat(self, storage):
+        a = NestDict({'x': [1]}, storage=storage)
+        b = NestDict({'x': [2, 3]}, storage=storage)
+        c = NestDict({'x': [4, 5]}, storage=storage)
+        a.concat([b, c])
+        assert a['x'] == [1, 2, 3, 4, 5]
+
+    def test_concat_kway(self):
+        parts = [
+            NestDict({"x": np.arange(i, i + 2), "l": [i], "t": NestDict({"a": np.array([i])})})
+            for i in range(5)
+        ]
+        result = concat(parts)
+        np.testing.assert_array_equal(result["x"], [0, 1, 1, 2, 2, 3, 3, 4, 4, 5])
+        assert result["l"] == [0, 1, 2, 3, 4]
+        np.testing.assert_array_equal(result[["t", "a"]], np.arange(5))
+        np.testing.assert_array_equal(parts[0]["x"], [0, 1])
+        assert parts[0]["l"] == [0]
+        np.testing.assert_array_equal(parts[0][["t", "a"]], [0])
+
+    def test_concat_dicts(self):
+        result = concat([{"x": [1], "d": {"a": 1}}, {"x": [2], "d": {"b": 2}}])
+        assert isinstance(result, NestDict)
+        assert result == {"x": [1, 2], "d": {"a": 1, "b": 2}}
+
+    @pytest.mark.parametrize("storage", ["nested", "flat"])
+    def test_concat_arraydict_leaves(self, storage):
+        a = NestDict({"ad": ArrayDict({"p": [1, 2], "q": [[1, 1], [2, 2]]})}, storage=storage)
+        b = NestDict({"ad": ArrayDict({"p": [3], "q": [[3, 3]]})}, storage=storage)
+        c = NestDict({"ad": ArrayDict({"p": [4], "q": [[4, 4]]})}, storage=storage)
         a.concat([b, c])
-        assert a._data['x'] == [1, 2, 3, 4, 5]
+        np.testing.assert_array_equal(a["ad"]["p"], [1, 2, 3, 4])
+        assert a["ad"]["q"].shape == (4, 2)
+
+    @pytest.mark.parametrize("storage", ["nested", "flat"])
+    def test_concat_mixed_fold(self, storage):
+        a = NestDict({"x": [1]}, storage=storage)
+        others = [NestDict({"x": [2]}, storage=storage), NestDict({"x": (3,)}), NestDict({"x": [4]})]
+        a.concat(others, {tuple: lambda x, y: x + list(y)})
+        assert a["x"] == [1, 2, 3, 4]
 
     def test_nested(self):
 
@@ -236,4 +449,337 @@ class TestNestDict:
             assert f["a1"][()] == 1
             assert f["a2/b1"][()]== 2
             assert f["a2/b2/c1"][()] == 3
-            assert f["a2/b2/c2/d1"][()] == 4
\ No newline at end of file
+            assert f["a2/b2/c2/d1"][()] == 4
+
+    def test_to_hdf5_options(self):
+
+        nd = NestDict({"x": {"pos": np.random.rand(10, 3)}, "ad": ArrayDict({"v": np.arange(10)})})
+        buffer = io.BytesIO()
+        with h5py.File(buffer, "w") as f:
+            nd.to_hdf5(f, chunks=4, compression="gzip", resizable=True)
+
+        with h5py.File(buffer, "r") as f:
+            assert f["x/pos"].chunks == (4, 3)
+            assert f["x/pos"].compression == "gzip"
+            assert f["x/pos"].maxshape == (None, 3)
+            assert np.array_equal(f["ad/v"][:], np.arange(10))
+            assert f["ad/v"].maxshape == (None,)
+
+    def test_append_hdf5(self):
+
+        frame = NestDict({"step": 0, "x": {"pos": np.zeros((2, 3))}, "ad": ArrayDict({"v": np.arange(2)})})
+        buffer = io.BytesIO()
+        with h5py.File(buffer, "w") as f:
+            for step in range(3):
+                frame["step"] = step
+                frame[["x", "pos"]] = np.full((2, 3), step)
+                frame.append_hdf5(f, compression="lzf")
+
+        with h5py.File(buffer, "r") as f:
+            assert f["step"][()] == 2
+            assert f["x/pos"].shape == (6, 3)
+            assert f["x/pos"].compression == "lzf"
+            assert np.array_equal(f["x/pos"][4:], np.full((2, 3), 2))
+            assert np.array_equal(f["ad/v"][:], np.tile(np.arange(2), 3))
+
+    def test_from_hdf5(self):
+
+        nd = NestDict({"a": 1, "s": "text", "b": {"c": np.arange(5)}, "ad": ArrayDict({"x": np.arange(4)})})
+        buffer = io.BytesIO()
+        with h5py.File(buffer, "w") as f:
+            nd.to_hdf5(f)
+
+        for lazy in (True, False):
+            result = NestDict.from_hdf5(buffer, lazy=lazy)
+            assert result["a"] == 1
+            assert result["s"] == "text"
+            assert np.array_equal(result[["b", "c"]], np.arange(5))
+            assert isinstance(result["b"], NestDict)
+            assert isinstance(result["ad"], ArrayDict)
+            assert np.array_equal(result["ad"][1:3]["x"], [1, 2])
+
+    def test_from_hdf5_lazy(self):
+
+        from nesteddict.hdf5 import LeafCache
+
+        nd = NestDict({"x": {str(i): np.full(100, i) for i in range(10)}})
+        buffer = io.BytesIO()
+        with h5py.File(buffer, "w") as f:
+            nd.to_hdf5(f)
+
+        cache = LeafCache(max_bytes=3 * 800)
+        lazy = NestDict.from_hdf5(buffer, cache=cache)
+        assert len(cache) == 0
+        for i in range(10):
+            assert lazy[["x", str(i)]][0] == i
+        assert len(cache) == 3
+        assert cache.nbytes <= cache.max_bytes
+        with pytest.raises(ValueError):
+            lazy[["x", "0"]][0] = 1
+
+        lazy[["x", "0"]] = np.zeros(1)
+        lazy.set("y.z", 2)
+        assert np.array_equal(lazy[["x", "0"]], np.zeros(1))
+        assert lazy.get("y.z") == 2
+        del lazy[["x", "1"]]
+        assert "1" not in lazy["x"]
+        assert len(lazy.flatten()) == 10
+
+        # a snapshot of a lazy tree stays lazy
+        cache = LeafCache(max_bytes=3 * 800)
+        lazy = NestDict.from_hdf5(buffer, cache=cache)
+        snap = lazy.snapshot()
+        lazy[["x", "0"]] = np.zeros(1)
+        lazy.set("y", 1)
+        assert len(cache) == 0
+        assert type(lazy._data) is type(snap._data) and type(lazy["x"]._data) is type(snap["x"]._data)
+        assert len(snap[["x", "0"]]) == 100 and snap[["x", "5"]][0] == 5 and "y" not in snap
+        assert np.array_equal(lazy[["x", "0"]], np.zeros(1)) and lazy[["x", "5"]][0] == 5
+        assert len(cache) == 2
+
+        # a tree read from a buffer owns its file, one read from an open file does not
+        with NestDict.from_hdf5(buffer, cache=LeafCache()) as lazy:
+            file = lazy._data.file
+            assert lazy.snapshot()._data.file is file
+            assert lazy[["x", "3"]][0] == 3
+        assert not file
+        with h5py.File(buffer, "r") as f:
+            lazy = NestDict.from_hdf5(f)
+            lazy.close()
+            assert f and lazy[["x", "3"]][0] == 3
+        NestDict({"a": 1}).close()
+
+    def test_track_changes(self, nd):
+
+        assert nd.changes() == set()
+        nd["a1"] = 2
+        nd.track_changes()
+        nd[["a2", "b2", "c1"]] = 4
+        nd.set("a2.b2.c2.d1", 5)
+        nd.set_many({"a2.b2.c2.d2": 6, "x.y": 1})
+        del nd[["a2", "b1"]]
+        assert nd.changes() == {("a2", "b2", "c1"), ("a2", "b2", "c2", "d1"), ("a2", "b2", "c2", "d2"), ("x", "y"), ("a2", "b1")}
+
+        nd.update({"a2": {}})
+        assert nd.changes() == {("a2",), ("x", "y")}
+        nd.clear_changes()
+        nd.concat(NestDict({"x": NestDict({"y": 2})}), fallback={int: lambda a, b: a + b})
+        assert nd.changes() == {("x",)}
+        nd.clear()
+        assert nd.changes() == {("a1",), ("a2",), ("x",), (3,)}
+
+        nd.track_changes(False)
+        nd["a1"] = 1
+        assert nd.changes() == set()
+
+    def test_to_hdf5_incremental(self, nd):
+
+        nd.track_changes()
+        buffer = io.BytesIO()
+        with h5py.File(buffer, "w") as f:
+            with pytest.raises(ValueError):
+                NestDict().to_hdf5(f, incremental=True)
+            nd.to_hdf5(f)
+            nd[["a2", "b2", "c1"]] = np.arange(3)
+            nd.set("a2.x", {"y": 7})
+            del nd[["a2", "b2", "c2"]]
+            del nd["a1"]
+            nd.to_hdf5(f, incremental=True)
+            assert nd.changes() == set()
+
+        with h5py.File(buffer, "r") as f:
+            assert np.array_equal(f["a2/b2/c1"][:], np.arange(3))
+            assert f["a2/x/y"][()] == 7
+            assert f["a2/b1"][()] == 2
+            assert "c2" not in f["a2/b2"]
+            assert "a1" not in f
+
+    def test_append_hdf5_not_resizable(self):
+
+        nd = NestDict({"pos": np.zeros((2, 3))})
+        buffer = io.BytesIO()
+        with h5py.File(buffer, "w") as f:
+            nd.to_hdf5(f)
+            with pytest.raises(ValueError):
+                nd.append_hdf5(f)
+
+class TestFlatStorage:
+
+    @pytest.fixture(scope="function", name="fd")
+    def test_init(self):
+        return NestDict({"a": {"b": {"c": 1, "d": 2}}, "e": [1]}, storage="flat")
+
+    def test_storage(self, fd):
+
+        assert isinstance(fd, NestDict)
+        assert fd.storage == "flat"
+        assert NestDict().storage == "nested"
+        with pytest.raises(ValueError):
+            NestDict({}, storage="tree")
+
+    def test_leaves_keyed_by_path(self, fd):
+
+        assert fd._data.store.leaves == {("a", "b", "c"): 1, ("a", "b", "d"): 2, ("e",): [1]}
+        assert list(fd._data.store.children[("a", "b")]) == ["c", "d"]
+
+    def test_view(self, fd):
+
+        view = fd["a"]
+        assert isinstance(view, NestDict)
+        assert view == {"b": {"c": 1, "d": 2}}
+        view[["b", "f"]] = 3
+        assert fd[["a", "b", "f"]] == 3
+        assert list(view.keys()) == ["b"]
+        assert view.flatten() == {("b", "c"): 1, ("b", "d"): 2, ("b", "f"): 3}
+
+    def test_replace_subtree(self, fd):
+
+        fd["a"] = {"x": 1}
+        assert ("a", "b", "c") not in fd._data.store.leaves
+        assert fd == {"a": {"x": 1}, "e": [1]}
+        fd[["a", "x"]] = {"y": 2}
+        assert fd.get("a.x.y") == 2
+        fd["a"] = 5
+        assert fd.flatten() == {("a",): 5, ("e",): [1]}
+        with pytest.raises(TypeError):
+            fd[["a", "z"]] = 1
+
+    def test_delete_subtree(self, fd):
+
+        del fd["a"]
+        assert fd._data.store.leaves == {("e",): [1]}
+        assert list(fd) == ["e"]
+        with pytest.raises(KeyError):
+            del fd["a"]
+
+    def test_matches_nested(self, fd):
+
+        nd = NestDict({"a": {"b": {"c": 1, "d": 2}}, "e": [1]})
+        assert fd == nd and nd == fd
+        assert repr(fd) == repr(nd)
+        assert fd.flatten() == nd.flatten()
+        assert fd.copy() == nd.copy()
+
+    def test_copy(self, fd):
+
+        other = fd.__copy__()
+        other[["a", "b", "c"]] = 10
+        assert fd[["a", "b", "c"]] == 1
+        assert other["e"] is fd["e"]
+
+    def test_concat(self, fd):
+
+        fd.concat(NestDict({"a": NestDict({"b": {"c": 5}}), "e": [2]}))
+        assert fd[["a", "b", "c"]] == 5
+        assert fd["e"] == [1, 2]
+
+
+class TestSnapshot:
+
+    @pytest.fixture(scope="function", name="nd")
+    def test_init(self):
+        return NestDict({
+            "a": {"b": {"c": 1}, "x": np.arange(3)},
+            "n": NestDict({"m": {"k": [1]}}),
+            "s": "leaf",
+        })
+
+    def test_shares_untouched(self, nd):
+
+        snap = nd.snapshot()
+        assert snap._data is nd._data
+        nd[["a", "b", "c"]] = 2
+        assert snap[["a", "b", "c"]] == 1
+        assert nd._data["n"] is snap._data["n"]
+        assert nd._data["a"]["x"] is snap._data["a"]["x"]
+        assert nd._data["a"] is not snap._data["a"]
+
+    def test_writes(self, nd):
+
+        snap = nd.snapshot()
+        nd.set("a.y", 1)
+        nd[NestDict.path("n.m.k")] = [2]
+        del nd[["a", "b"]]
+        nd.set_many({"a.z": 3, "n.m.j": 4})
+        nd.update({"s": "new"})
+        assert snap == {
+            "a": {"b": {"c": 1}, "x": snap[["a", "x"]]},
+            "n": {"m": {"k": [1]}},
+            "s": "leaf",
+        }
+        assert nd.get_many(["a.y", "n.m.k", "a.z", "n.m.j", "s"]) == [1, [2], 3, 4, "new"]
+        snap.clear()
+        assert nd["s"] == "new"
+
+    def test_exposed_nodes(self, nd):
+
+        snap = nd.snapshot()
+        nd["a"]["b"]["c"] = 2
+        nd.get("n.m")["k"] = [2]
+        for value in nd.values():
+            if isinstance(value, NestDict):
+                value["extra"] = 1
+        assert snap[["a", "b", "c"]] == 1
+        assert snap[["n", "m", "k"]] == [1]
+        assert "extra" not in snap["n"]
+
+    def test_views_copy_the_path(self):
+
+        nd = NestDict({"state": {f"g{i}": {f"l{j}": {"v": j} for j in range(3)} for i in range(3)}})
+        snap = nd.snapshot()
+        state = nd["state"]
+        assert isinstance(state, NestDict)
+        state["g0"]["l0"] = 1
+        assert snap[["state", "g0", "l0"]] == {"v": 0}
+        assert nd[["state", "g0", "l0"]] == 1
+        # only state and g0 were copied
+        ours, theirs = nd._data["state"], snap._data["state"]
+        assert ours is not theirs and ours["g0"] is not theirs["g0"]
+        assert all(ours[g] is theirs[g] for g in ("g1", "g2"))
+        assert ours["g0"]["l1"] is theirs["g0"]["l1"]
+        for value in nd.values():
+            value["g1"]["l1"]["v"] = 10
+        assert snap[["state", "g1", "l1", "v"]] == 1
+        assert nd._data["state"]["g2"] is snap._data["state"]["g2"]
+
+    def test_concat(self, nd):
+
+        nd = NestDict({"x": np.arange(2), "d": {"k": 1}, "t": NestDict({"l": [1]})})
+        snap = nd.snapshot()
+        nd.concat(NestDict({"x": np.arange(2), "d": {"k": 2}, "t": NestDict({"l": [2]})}))
+        assert len(snap["x"]) == 2
+        assert snap == {"x": snap["x"], "d": {"k": 1}, "t": {"l": [1]}}
+        assert nd[["t", "l"]] == [1, 2]
+
+        table = ArrayDict({"id": np.arange(2, dtype=np.int32)}, schema={"id": np.int32})
+        nd = NestDict({"table": table})
+        snap = nd.snapshot()
+        nd.concat(NestDict({"table": ArrayDict({"id": np.arange(3)})}))
+        assert nd["table"].schema == table.schema
+        assert nd["table"]["id"].dtype == np.int32 and nd["table"].array_length == 5
+        assert snap["table"] is table and table.array_length == 2
+
+        # flat copies share their leaves with the inputs
+        a = NestDict({"ad": ArrayDict({"p": [1, 2]})}, storage="flat")
+        b = NestDict({"ad": ArrayDict({"p": [3]})}, storage="flat")
+        assert (a + b)["ad"].array_length == 3
+        assert concat([a, b])["ad"].array_length == 3
+        assert a["ad"].array_length == 2 and list(a["ad"]["p"]) == [1, 2]
+
+    def test_add(self):
+
+        a = NestDict({"x": [1], "t": NestDict({"l": [1]})})
+        b = NestDict({"x": [2], "t": NestDict({"l": [2]})})
+        c = a + b
+        assert c == {"x": [1, 2], "t": {"l": [1, 2]}}
+        assert a == {"x": [1], "t": {"l": [1]}}
+        assert b == {"x": [2], "t": {"l": [2]}}
+        assert (a + {"x": [3]})["x"] == [1, 3]
+        assert a._owned is None and a._data["t"]._owned is None
+
+    def test_flat(self):
+
+        fd = NestDict({"a": {"b": 1}}, storage="flat")
+        snap = fd.snapshot()
+        fd[["a", "b"]] = 2
+        assert snap[["a", "b"]] == 1
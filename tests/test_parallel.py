@@ -0,0 +1,74 @@
+import threading
+
+import numpy as np
+import pytest
+from nesteddict import ArrayDict, NestDict, concat, get_executor, set_executor, tree_map
+from nesteddict import parallel
+
+
+class TestParallel:
+
+    @pytest.fixture(autouse=True)
+    def reset_executor(self):
+        yield
+        set_executor(None, threshold=parallel.PARALLEL_THRESHOLD)
+
+    @pytest.fixture(scope="function", name="nd")
+    def test_init(self):
+        return NestDict({
+            "a": {"x": np.arange(10.0), "y": np.arange(20.0)},
+            "b": NestDict({"z": np.ones((4, 3))}),
+            "c": ArrayDict({"p": np.arange(3.0), "q": np.ones((3, 2))}),
+            "s": "label",
+        })
+
+    def test_set_executor(self):
+        assert get_executor() is None
+        set_executor(2)
+        assert get_executor() is parallel.resolve_executor(2)
+        assert parallel.resolve_executor(1) is None
+
+    def test_parallel_map_threshold(self):
+        threads = []
+
+        def record(x):
+            threads.append(threading.current_thread().name)
+            return x * 2
+
+        set_executor(None, threshold=100)
+        assert parallel.parallel_map(record, [1, 2, 3], [10, 200, 10], workers=2) == [2, 4, 6]
+        assert sum(name.startswith("nesteddict") for name in threads) == 1
+
+    def test_concat_workers(self, nd):
+        set_executor(None, threshold=0)
+        del nd["s"]
+        parts = [nd, nd, nd]
+        nd["a"] = NestDict(nd["a"])
+        result = concat(parts, workers=4)
+        assert result[["a", "x"]].shape == (30,)
+        assert result[["b", "z"]].shape == (12, 3)
+        assert result[["c", "q"]].shape == (9, 2)
+        assert nd[["a", "x"]].shape == (10,)
+
+    def test_arraydict_concat_workers(self):
+        set_executor(4, threshold=0)
+        ad = ArrayDict({"p": np.arange(3.0), "q": np.ones((3, 2))})
+        result = ArrayDict().concat([ad, ad])
+        np.testing.assert_array_equal(result["p"], [0, 1, 2, 0, 1, 2])
+
+    def test_tree_map(self, nd):
+        set_executor(None, threshold=0)
+        result = tree_map(np.negative, nd, workers=4)
+        assert isinstance(result, NestDict)
+        assert isinstance(result["a"], dict)
+        assert isinstance(result["b"], NestDict)
+        assert isinstance(result["c"], ArrayDict)
+        np.testing.assert_array_equal(result[["a", "y"]], -np.arange(20.0))
+        np.testing.assert_array_equal(result[["c", "p"]], -np.arange(3.0))
+        assert result["s"] == "label"
+        assert list(result.flatten()) == list(nd.flatten())
+        np.testing.assert_array_equal(nd[["a", "y"]], np.arange(20.0))
+
+    def test_tree_map_arraydict(self):
+        ad = ArrayDict({"p": np.arange(3.0)})
+        assert tree_map(lambda v: v + 1, ad) == {"p": np.arange(1.0, 4.0)}